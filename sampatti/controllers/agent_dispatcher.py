@@ -0,0 +1,79 @@
+import os, threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from dotenv import load_dotenv
+
+load_dotenv()
+SUPER_AGENT_WORKERS = int(os.environ.get("SUPER_AGENT_WORKERS", 8))
+
+
+class KeyedDispatcher:
+    """Runs tasks sharing a key one after another and tasks with different keys in parallel"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-dispatch")
+        self.lock = threading.Lock()
+        self.pending: Dict[str, deque] = {}
+        self.active = set()
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn behind any earlier task for the same key and return its future"""
+        future = Future()
+        item = (fn, args, kwargs, future)
+
+        with self.lock:
+            if key in self.active:
+                self.pending.setdefault(key, deque()).append(item)
+                return future
+            self.active.add(key)
+
+        self.executor.submit(self._run, key, item)
+        return future
+
+    def _run(self, key: str, item):
+        fn, args, kwargs, future = item
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        with self.lock:
+            queue = self.pending.get(key)
+            if not queue:
+                self.pending.pop(key, None)
+                self.active.discard(key)
+                return
+            next_item = queue.popleft()
+
+        # the next message of this key goes to the back of the pool queue so a
+        # chatty employer does not hold a worker while other employers wait
+        self.executor.submit(self._run, key, next_item)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "workers": self.max_workers,
+                "active_shards": len(self.active),
+                "queued_messages": sum(len(queue) for queue in self.pending.values())
+            }
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> KeyedDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = KeyedDispatcher(SUPER_AGENT_WORKERS)
+        return _dispatcher
+
+
+def dispatch_super_agent_query(employer_number, type_of_message: str, query: str, media_id: str = "", formatted_json: Dict[str, Any] = None, raise_errors: bool = False) -> Future:
+    """Hand a message to the super agent on the shard of its wa_id"""
+    from .super_agent import super_agent_query
+    return get_dispatcher().submit(str(employer_number), super_agent_query, employer_number, type_of_message, query, media_id, formatted_json, raise_errors)
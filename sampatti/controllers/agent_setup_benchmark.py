@@ -0,0 +1,63 @@
+import argparse, importlib, time
+from langchain.agents import AgentExecutor
+
+# agent modules that build a shared `agent_executor` at import time
+AGENT_MODULES = ["onboarding_agent", "attendance_agent", "survey_agent", "cash_advance_agent"]
+
+
+def build_executor_like(executor: AgentExecutor) -> AgentExecutor:
+    """Construct a new executor with the same settings, which is what every message used to do"""
+    return AgentExecutor(
+        agent=executor.agent,
+        tools=executor.tools,
+        memory=executor.memory,
+        verbose=executor.verbose,
+        handle_parsing_errors=executor.handle_parsing_errors,
+        max_iterations=executor.max_iterations,
+        early_stopping_method=executor.early_stopping_method
+    )
+
+
+def measure_agent(module_name: str, iterations: int) -> dict:
+    started = time.perf_counter()
+    module = importlib.import_module(f"{__package__}.{module_name}")
+    import_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        build_executor_like(module.agent_executor)
+    per_message_before = (time.perf_counter() - started) * 1000 / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        executor = module.agent_executor
+    per_message_after = (time.perf_counter() - started) * 1000 / iterations
+
+    return {
+        "agent": module_name,
+        "import_ms": round(import_ms, 1),
+        "setup_per_message_before_ms": round(per_message_before, 4),
+        "setup_per_message_after_ms": round(per_message_after, 4)
+    }
+
+
+def main(iterations: int, agents: list):
+    for module_name in agents:
+        try:
+            result = measure_agent(module_name, iterations)
+        except Exception as e:
+            print(f"{module_name}: could not be measured: {e}")
+            continue
+        print(
+            f"{result['agent']}: import {result['import_ms']} ms, per-message setup "
+            f"{result['setup_per_message_before_ms']} ms before -> {result['setup_per_message_after_ms']} ms after"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-message agent executor setup cost.")
+    parser.add_argument("--iterations", type=int, default=200, help="Executor constructions timed per agent.")
+    parser.add_argument("--agents", nargs="*", default=AGENT_MODULES, help="Agent modules to measure.")
+
+    args = parser.parse_args()
+    main(args.iterations, args.agents)
@@ -13,7 +13,8 @@ from urllib.parse import urlparse
 
 from sampatti.controllers.onboarding_tools import get_worker_details
 from .utility_functions import call_sarvam_api
-from ..database import get_db_session, get_db
+from ..database import get_db_session
+from .tool_session import get_tool_db, release_tool_db
 from sqlalchemy.orm import Session
 from ..models import CashAdvanceManagement, worker_employer
 from fastapi import Depends
@@ -48,7 +49,7 @@ wiki_tool = WikipediaQueryRun(api_wrapper=api_wrapper)
 
 def get_workers_for_employer(employer_number: int) -> str:
 
-    db = next(get_db())
+    db = get_tool_db()
     try:
         # Query to get all workers for this employer
         workers = db.query(models.worker_employer).filter(models.worker_employer.c.employer_number == employer_number).all()
@@ -84,11 +85,13 @@ def get_workers_for_employer(employer_number: int) -> str:
             "message": f"Error fetching workers: {str(e)}",
             "workers": []
         }
+    finally:
+        release_tool_db(db)
 
 def manage_attendance_records(action: str, dates: str, worker_id: str, employer_id: str):
     """Core function for managing attendance records"""
     
-    db = next(get_db())
+    db = get_tool_db()
     try:
         # Convert comma-separated string into list of trimmed date strings
         date_list = [date.strip() for date in dates.split(",")] if dates else []
@@ -187,6 +190,8 @@ def manage_attendance_records(action: str, dates: str, worker_id: str, employer_
         return {
             "status": "error", "message": f"Unexpected error: {str(e)}"
         }
+    finally:
+        release_tool_db(db)
 
 
 def get_attendance_summary(
@@ -194,7 +199,7 @@ def get_attendance_summary(
     worker_name: Optional[str] = None
 ) -> str:
     
-    db = next(get_db())
+    db = get_tool_db()
     try:
         worker_employer = db.query(models.worker_employer).filter(models.worker_employer.c.employer_number == employer_number, models.worker_employer.c.worker_name == worker_name).first()
 
@@ -228,6 +233,8 @@ def get_attendance_summary(
         return {
             "status": "error", "message": f"Unexpected error: {str(e)}"
         }
+    finally:
+        release_tool_db(db)
 
 
 get_workers_for_employer_tool = StructuredTool.from_function(
@@ -0,0 +1,304 @@
+import asyncio, json, os, sqlite3, threading, time, uuid
+from typing import Callable, Dict, Iterable, Optional
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from .. import models
+from . import cashfree_api, whatsapp_async
+from .rate_limiter import TokenBucket, chunked
+
+load_dotenv()
+BROADCAST_DB_PATH = os.environ.get('BROADCAST_DB_PATH', os.path.join(os.getcwd(), 'broadcasts.db'))
+BROADCAST_WORKERS = int(os.environ.get('BROADCAST_WORKERS', 8))
+BROADCAST_MESSAGES_PER_SECOND = float(os.environ.get('BROADCAST_MESSAGES_PER_SECOND', os.environ.get('WHATSAPP_MESSAGES_PER_SECOND', 20)))
+BROADCAST_CHUNK_SIZE = int(os.environ.get('BROADCAST_CHUNK_SIZE', 200))
+BROADCAST_MAX_ATTEMPTS = int(os.environ.get('BROADCAST_MAX_ATTEMPTS', 3))
+BROADCAST_RETRY_DELAY = float(os.environ.get('BROADCAST_RETRY_DELAY', 5))
+# a running broadcast whose owner has not checkpointed for this long is treated as abandoned
+BROADCAST_STALE_SECONDS = float(os.environ.get('BROADCAST_STALE_SECONDS', 300))
+
+# every recipient of a run is stored up front as pending and moves to delivered,
+# skipped or failed once its chunk is checkpointed. Running a broadcast again with
+# the same run_id only sends to recipients that are still pending, so a crashed or
+# restarted run resumes where it stopped; at most the chunk in flight is sent again.
+# A run is sent by one process at a time: the sender records itself as owner and
+# refreshes heartbeat_at at every checkpoint, and a run is only taken over once its
+# owner released it or stopped heartbeating for BROADCAST_STALE_SECONDS.
+
+_local = threading.local()
+
+
+def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(BROADCAST_DB_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                throttled INTEGER NOT NULL DEFAULT 0,
+                rate_limit_waits INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                owner TEXT,
+                heartbeat_at REAL
+            )
+        """)
+        # runs tables created before owner, heartbeat_at and rate_limit_waits existed
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+        for column, column_type in (("owner", "TEXT"), ("heartbeat_at", "REAL"), ("rate_limit_waits", "INTEGER NOT NULL DEFAULT 0")):
+            if column not in columns:
+                try:
+                    conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {column_type}")
+                except sqlite3.OperationalError:
+                    # added by another process in the meantime
+                    pass
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS recipients (
+                run_id TEXT NOT NULL,
+                recipient_key TEXT NOT NULL,
+                send_to TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (run_id, recipient_key)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_recipients_run_status ON recipients (run_id, status)")
+        _local.conn = conn
+    return conn
+
+
+# senders are coroutines returning the WhatsApp response, or None when the recipient no longer needs the message.
+# buckets holds the run's rate limits: "whatsapp" for messages, "cashfree" for order lookups.
+
+async def _send_template(send_to, params, options, buckets):
+    await buckets["whatsapp"].acquire_async()
+    return await whatsapp_async.send_greetings(send_to, options["template_name"])
+
+
+async def _send_media_template(send_to, params, options, buckets):
+    await buckets["whatsapp"].acquire_async()
+    return await whatsapp_async.send_greetings_with_file_type(send_to, options["template_name"], options["file_type"], options["file_url"])
+
+
+async def _send_salary_reminder(send_to, params, options, buckets):
+    # the Cashfree lookup only blocks, so it runs on the default executor; cached orders skip the bucket
+    order = await asyncio.to_thread(cashfree_api.check_order_status, params["order_id"], buckets["cashfree"])
+    if order.get("order_status") == "PAID":
+        return None
+    await buckets["whatsapp"].acquire_async()
+    return await whatsapp_async.send_whatsapp_message(send_to, params["worker_name"], options["period"], order.get("payment_session_id"), options["template_name"])
+
+
+SENDERS: Dict[str, Callable] = {
+    "template": _send_template,
+    "media_template": _send_media_template,
+    "salary_reminder": _send_salary_reminder,
+}
+
+
+# audiences yield (recipient_key, send_to, params)
+
+def all_employers(db: Session):
+    for employer in db.query(models.Employer.employerNumber).distinct().all():
+        yield str(employer.employerNumber), employer.employerNumber, {}
+
+
+def employers_with_workers(db: Session):
+    for employer in db.query(models.worker_employer.c.employer_number).distinct().all():
+        yield str(employer.employer_number), employer.employer_number, {}
+
+
+REMINDER_EXCLUDED_EMPLOYER_NUMBERS = cashfree_api.EXCLUDED_EMPLOYER_NUMBERS + [919845445408]
+
+
+def salary_reminder_audience(db: Session):
+    relations = db.query(
+        models.worker_employer.c.employer_number,
+        models.worker_employer.c.worker_number,
+        models.worker_employer.c.worker_name,
+        models.worker_employer.c.order_id
+    ).all()
+    for item in relations:
+        if item.employer_number in REMINDER_EXCLUDED_EMPLOYER_NUMBERS:
+            continue
+        yield f"{item.employer_number}:{item.worker_number}", item.employer_number, {"worker_name": item.worker_name, "order_id": item.order_id}
+
+
+async def _send_one(sender, row, options, buckets):
+    """Returns (recipient_key, status, error, http_status); http_status is None when no response came back"""
+    try:
+        response = await sender(row["send_to"], json.loads(row["params"]), options, buckets)
+    except Exception as e:
+        print(f"Broadcast to {row['send_to']} failed: {e}")
+        status_code = getattr(getattr(e, "response", None), "status_code", None)
+        return row["recipient_key"], "retry" if cashfree_api.is_retryable_error(e) else "failed", str(e), status_code
+
+    if response is None:
+        return row["recipient_key"], "skipped", None, None
+    if 200 <= response.status_code < 300:
+        return row["recipient_key"], "delivered", None, response.status_code
+    status = "retry" if response.status_code in cashfree_api.RETRYABLE_STATUS_CODES else "failed"
+    return row["recipient_key"], status, f"{response.status_code} {response.text}", response.status_code
+
+
+def _checkpoint(run_id: str, results, max_attempts: int):
+    conn = get_connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    for recipient_key, status, error, _ in results:
+        if status == "retry":
+            # stays pending for the next pass until it runs out of attempts
+            conn.execute(
+                "UPDATE recipients SET attempts = attempts + 1, error = ?, updated_at = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE run_id = ? AND recipient_key = ?",
+                (error, now, max_attempts, run_id, recipient_key)
+            )
+        else:
+            conn.execute(
+                "UPDATE recipients SET status = ?, attempts = attempts + 1, error = ?, updated_at = ? WHERE run_id = ? AND recipient_key = ?",
+                (status, error, now, run_id, recipient_key)
+            )
+    conn.execute("UPDATE runs SET updated_at = ?, heartbeat_at = ? WHERE run_id = ?", (now, now, run_id))
+    conn.execute("COMMIT")
+
+
+def new_run_id(prefix: str) -> str:
+    """A run_id for a new broadcast; pass an existing run_id to run_broadcast to resume that run instead"""
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+def _claim_run(run_id: str, owner: str) -> bool:
+    now = time.time()
+    cursor = get_connection().execute(
+        "UPDATE runs SET owner = ?, heartbeat_at = ?, status = 'running' WHERE run_id = ? "
+        "AND (owner IS NULL OR heartbeat_at IS NULL OR heartbeat_at < ?)",
+        (owner, now, run_id, now - BROADCAST_STALE_SECONDS)
+    )
+    return cursor.rowcount == 1
+
+
+def _stale_running_runs():
+    return get_connection().execute(
+        "SELECT run_id, kind FROM runs WHERE status = 'running' AND (owner IS NULL OR heartbeat_at IS NULL OR heartbeat_at < ?)",
+        (time.time() - BROADCAST_STALE_SECONDS,)
+    ).fetchall()
+
+
+def _pending(run_id: str):
+    return get_connection().execute(
+        "SELECT recipient_key, send_to, params FROM recipients WHERE run_id = ? AND status = 'pending' ORDER BY rowid",
+        (run_id,)
+    ).fetchall()
+
+
+def broadcast_status(run_id: str) -> Optional[dict]:
+    conn = get_connection()
+    run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    if run is None:
+        return None
+    counts = {status: count for status, count in conn.execute(
+        "SELECT status, COUNT(*) FROM recipients WHERE run_id = ? GROUP BY status", (run_id,)
+    ).fetchall()}
+    return {
+        "run_id": run_id,
+        "status": run["status"],
+        "total": sum(counts.values()),
+        "delivered": counts.get("delivered", 0),
+        "skipped": counts.get("skipped", 0),
+        "failed": counts.get("failed", 0),
+        "pending": counts.get("pending", 0),
+        # 429s from WhatsApp or Cashfree; rate_limit_waits counts sends the run's own limiter held back
+        "throttled": run["throttled"],
+        "rate_limit_waits": run["rate_limit_waits"],
+    }
+
+
+def run_broadcast(
+    run_id: str,
+    kind: str,
+    options: dict,
+    audience: Iterable = (),
+    max_workers: int = BROADCAST_WORKERS,
+    messages_per_second: float = BROADCAST_MESSAGES_PER_SECOND,
+    chunk_size: int = BROADCAST_CHUNK_SIZE,
+    max_attempts: int = BROADCAST_MAX_ATTEMPTS
+) -> dict:
+    """Send a template to an audience with at most max_workers sends in flight, resuming run_id if it was started before"""
+    sender = SENDERS[kind]
+    conn = get_connection()
+    owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    now = time.time()
+
+    run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    if run is None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO runs (run_id, kind, options, created_at, updated_at, owner, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, kind, json.dumps(options), now, now, owner, now)
+            )
+        except sqlite3.IntegrityError:
+            # started by another process between the lookup and the insert
+            conn.execute("ROLLBACK")
+            run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        else:
+            conn.executemany(
+                "INSERT OR IGNORE INTO recipients (run_id, recipient_key, send_to, params) VALUES (?, ?, ?, ?)",
+                ((run_id, key, str(send_to), json.dumps(params)) for key, send_to, params in audience)
+            )
+            conn.execute("COMMIT")
+
+    if run is not None:
+        if not _claim_run(run_id, owner):
+            print(f"Broadcast {run_id} is being sent by another process")
+            summary = broadcast_status(run_id)
+            summary["message"] = "This broadcast is being sent by another process; check broadcast_status for its progress."
+            return summary
+        # the audience and options of the first start are kept, so a resumed run sends the same message
+        options = json.loads(run["options"])
+        print(f"Resuming broadcast {run_id}")
+
+    buckets = {"whatsapp": TokenBucket(messages_per_second), "cashfree": TokenBucket(cashfree_api.cashfree_lookups_per_second)}
+    throttled = 0
+    start_time = time.monotonic()
+
+    try:
+        for attempt in range(max_attempts):
+            pending = _pending(run_id)
+            if not pending:
+                break
+            if attempt:
+                time.sleep(BROADCAST_RETRY_DELAY)
+
+            for chunk in chunked(pending, chunk_size):
+                # _send_one catches its sender's errors, so every result is a (key, status, error) row
+                results = whatsapp_async.run_concurrently([_send_one(sender, row, options, buckets) for row in chunk], max_workers)
+                _checkpoint(run_id, results, max_attempts)
+                throttled += len([result for result in results if result[3] == 429])
+                print(f"Broadcast {run_id}: {len(results)} sent in this chunk")
+    finally:
+        # released, so a run left with pending recipients can be resumed right away
+        remaining = len(_pending(run_id))
+        conn.execute(
+            "UPDATE runs SET status = ?, throttled = throttled + ?, rate_limit_waits = rate_limit_waits + ?, updated_at = ?, owner = NULL WHERE run_id = ? AND owner = ?",
+            ("running" if remaining else "finished", throttled, sum(bucket.waits for bucket in buckets.values()), time.time(), run_id, owner)
+        )
+
+    summary = broadcast_status(run_id)
+    summary["elapsed_seconds"] = round(time.monotonic() - start_time, 2)
+    print("Broadcast summary: ", summary)
+    return summary
+
+
+def resume_unfinished_broadcasts() -> list:
+    """Finish runs left running by a crashed or restarted process; runs another process is still sending are left alone"""
+    return [run_broadcast(run["run_id"], run["kind"], {}) for run in _stale_running_runs()]
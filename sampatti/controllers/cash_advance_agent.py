@@ -14,10 +14,13 @@ from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain.tools import StructuredTool
 from sqlalchemy.orm import Session
 
+from . import conversation_log, tool_session
+from .lazy import build_once
 from .userControllers import send_audio_message
 from .whatsapp_message import send_message_user, send_v2v_message
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import OpenAIEmbeddings
+from .embedding_cache import cached_embeddings
 from langchain_groq import ChatGroq
 from ..models import CashAdvanceManagement, worker_employer, SalaryDetails, SalaryManagementRecords
 from .cash_advance_tool import (
@@ -33,13 +36,17 @@ load_dotenv()
 groq_api_key = os.environ.get("GROQ_API_KEY")
 openai_api_key = os.environ.get("OPENAI_API_KEY")
 openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
-llm = ChatOpenAI(
+@build_once
+def get_llm():
+    return ChatOpenAI(
         model="openai/gpt-4o", 
         api_key=openrouter_api_key,
         base_url="https://openrouter.ai/api/v1"
-)
+    )
 #llm = ChatGroq(model="llama3-8b-8192", api_key=groq_api_key)
-embedding = OpenAIEmbeddings(api_key=openai_api_key)
+@build_once
+def get_embedding():
+    return cached_embeddings(OpenAIEmbeddings(api_key=openai_api_key))
 
 
 # Updated prompt template for the agent
@@ -282,44 +289,55 @@ tools = [
    update_salary_tool,
 ]
 
-agent = create_tool_calling_agent(
-    llm=llm,
-    prompt=prompt,
-    tools=tools  
-)
+@build_once
+def get_agent_executor():
+    """Built on first use and shared by every message; per-request state goes through the invoke inputs"""
+    agent = create_tool_calling_agent(
+        llm=get_llm(),
+        prompt=prompt,
+        tools=tools
+    )
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        memory=None,  # using custom vector memory
+        verbose=True,
+        handle_parsing_errors=True,
+        max_iterations=10,
+        early_stopping_method="generate"
+    )
 
 # ChromaDB setup for conversation memory
 PERSIST_DIR = "../../chroma_db"
 
-vectordb = Chroma(
-    persist_directory=PERSIST_DIR,
-    collection_name="CashAdvanceConversations",
-    embedding_function=embedding
-)
+CONVERSATION_AGENT = "CashAdvanceConversations"
+@build_once
+def get_vectordb():
+    """Conversation vector store, opened on first use rather than at import"""
+    return Chroma(
+        persist_directory=PERSIST_DIR,
+        collection_name=CONVERSATION_AGENT,
+        embedding_function=get_embedding()
+    )
 
 def store_conversation(employer_number: int, message: str):
-    """Store conversation in vector database"""
-    vectordb.add_texts(
-        texts=[message],
-        metadatas=[{
-            "employerNumber": str(employer_number),
-            "timestamp": time.time()
-        }]
-    )
-    vectordb.persist()
+    """Store conversation in the conversation log"""
+    timestamp = time.time()
+    conversation_log.append_message(CONVERSATION_AGENT, employer_number, message, timestamp)
+
+    if conversation_log.CONVERSATION_VECTOR_INDEX:
+        get_vectordb().add_texts(
+            texts=[message],
+            metadatas=[{
+                "employerNumber": str(employer_number),
+                "timestamp": timestamp
+            }]
+        )
+        get_vectordb().persist()
 
 def get_sorted_chat_history(employer_number: int) -> str:
-    """Retrieve sorted chat history for an employer"""
-    raw_results = vectordb.get(where={"employerNumber": str(employer_number)})
-
-    if not raw_results or not raw_results.get("documents"):
-        return ""
-
-    messages = list(zip(raw_results["metadatas"], raw_results["documents"]))
-    sorted_messages = sorted(messages, key=lambda x: x[0].get("timestamp", 0))
-    sorted_text = "\n".join(msg for _, msg in sorted_messages)
-
-    return sorted_text
+    """Retrieve recent chat history for an employer"""
+    return conversation_log.get_chat_history(CONVERSATION_AGENT, employer_number, vectordb=get_vectordb())
 
 
 def queryE(employer_number: int, typeofMessage: str, query: str, mediaId: str):
@@ -331,17 +349,6 @@ def queryE(employer_number: int, typeofMessage: str, query: str, mediaId: str):
     current_month = today.month
     current_year = today.year
 
-    # Create agent executor
-    agent_executor = AgentExecutor(
-        agent=agent,
-        tools=tools,
-        memory=None,  # using custom vector memory
-        verbose=True,
-        handle_parsing_errors=True,
-        max_iterations=10,
-        early_stopping_method="generate"
-    )
-
     # Prepare input for the agent
     full_query = f"Employer number: {employer_number}. Query: {query}. Type: {typeofMessage}. MediaId: {mediaId}"
 
@@ -356,7 +363,8 @@ def queryE(employer_number: int, typeofMessage: str, query: str, mediaId: str):
 
     try:
         # Execute the agent
-        response = agent_executor.invoke(inputs)
+        with tool_session.agent_turn():
+            response = get_agent_executor().invoke(inputs)
         assistant_response = response.get('output') if response and isinstance(response, dict) else str(response)
         # Defensive: ensure assistant_response is not None or invalid
         if not assistant_response or assistant_response == 'None':
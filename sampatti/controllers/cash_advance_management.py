@@ -1,39 +1,54 @@
 from datetime import datetime
 import json
-import chromadb, os
+import chromadb, os, uuid
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings
+from .embedding_cache import cached_embeddings
 from langchain_community.chat_models import ChatOpenAI
 from .. import models
+from .conversation_log import next_sequence
+from .lazy import build_once
 from sqlalchemy.orm import Session
 
 load_dotenv()
 openai_api_key = os.environ.get('OPENAI_API_KEY')
 
-chroma_client = chromadb.PersistentClient(path="../../chroma_db")
+@build_once
+def get_chroma_client():
+    return chromadb.PersistentClient(path="../../chroma_db")
 
-llm = ChatOpenAI(name="gpt-4o-mini", api_key=openai_api_key)
-embedding_model = OpenAIEmbeddings(model="text-embedding-3-large")
+@build_once
+def get_llm():
+    return ChatOpenAI(name="gpt-4o-mini", api_key=openai_api_key)
+@build_once
+def get_embedding_model():
+    return cached_embeddings(OpenAIEmbeddings(model="text-embedding-3-large"))
 
 
 def get_advance_chat_collection():
-    cash_advance_chat_collection = chroma_client.get_or_create_collection(name="cashAdvanceConversations")
+    cash_advance_chat_collection = get_chroma_client().get_or_create_collection(name="cashAdvanceConversations")
     return cash_advance_chat_collection
 
 
 def store_conversation(chat_id, message):
     advance_chat_collection = get_advance_chat_collection()
+    sequence = next_sequence("cashAdvanceConversations", chat_id)
     advance_chat_collection.add(
-        ids=[f"chat_{chat_id}_{len(advance_chat_collection.get()['ids'])}"],
+        ids=[f"chat_{chat_id}_{uuid.uuid4().hex}"],
         documents=[message],
-        metadatas=[{"chat_id": chat_id}]
+        metadatas=[{"chat_id": chat_id, "sequence": sequence}]
     )
 
 
 def get_conversation_history(chat_id):
     advance_chat_collection = get_advance_chat_collection()
     results = advance_chat_collection.get(where={"chat_id": chat_id})
-    return "\n".join(results["documents"]) if results["documents"] else ""
+    if not results["documents"]:
+        return ""
+
+    messages = list(zip(results["metadatas"], results["documents"]))
+    messages.sort(key=lambda x: (x[0] or {}).get("sequence", 0))
+    return "\n".join(document for _, document in messages)
 
 # This is your fixed JSON structure
 import json
@@ -169,7 +184,7 @@ def process_advance_query(chat_id, query, workerId, employerId, db : Session):
     salary = relation.salary_amount
     prompt = build_prompt_with_context(conversation_history, query, salary)
 
-    raw_response = llm.predict(prompt).strip()
+    raw_response = get_llm().predict(prompt).strip()
 
     try:
         response_json = json.loads(raw_response)
@@ -10,13 +10,13 @@ import requests, os, tempfile
 from pydub import AudioSegment
 from urllib.parse import urlparse
 from .utility_functions import call_sarvam_api
-from ..database import get_db
+from .tool_session import get_tool_db, release_tool_db
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from ..models import CashAdvanceManagement, worker_employer, SalaryDetails, SalaryManagementRecords
 from .. import models
 from datetime import datetime
-from ..routers.auth import get_auth_headers
+from . import service_calls
 
 
 
@@ -59,7 +59,7 @@ class AgentResponse(BaseModel):
 # Tools for the agent
 def fetch_all_workers_linked_to_employer(employer_number: int) -> dict:
     """Check how many workers are linked to an employer and return appropriate response."""
-    db = next(get_db())
+    db = get_tool_db()
     try:
         # Fetch all workers for this employer
         results = db.execute(
@@ -110,11 +110,11 @@ def fetch_all_workers_linked_to_employer(employer_number: int) -> dict:
             "worker_count": 0
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def fetch_worker_employer_relation(worker_name: str, employer_number: int) -> dict:
     """Find worker details by name and employer number from worker_employer table."""
-    db = next(get_db())
+    db = get_tool_db()
     try:
         # Normalize input name for better matching
         worker_name_lowercase = worker_name.strip().lower()
@@ -169,11 +169,11 @@ def fetch_worker_employer_relation(worker_name: str, employer_number: int) -> di
         print(f"Error finding worker: {e}")
         return {"found": False, "error": str(e)}
     finally:
-        db.close()
+        release_tool_db(db)
 
 def fetch_existing_cash_advance_details(worker_id: str, employer_id: str) -> dict:
     """Get existing cash advance record for a worker and employer."""
-    db = next(get_db())
+    db = get_tool_db()
     try:
         cash_advance_records = db.query(models.CashAdvanceManagement).filter(
             models.CashAdvanceManagement.worker_id == worker_id,
@@ -212,7 +212,7 @@ def fetch_existing_cash_advance_details(worker_id: str, employer_id: str) -> dic
         print(f"Error getting existing cash advance: {e}")
         return {"found": False, "error": str(e)}
     finally:
-        db.close()
+        release_tool_db(db)
 
 
 def generate_payment_link_func(
@@ -237,8 +237,6 @@ def generate_payment_link_func(
     try:
 
         # API endpoint
-        url = "https://conv.sampatticards.com/cashfree/cash_advance_link"
-        
         # Prepare payload
         payload = {
             "employerNumber": employer_number,
@@ -258,7 +256,7 @@ def generate_payment_link_func(
         print("Print Payload: ", payload)
         
         # Make API call
-        response = requests.get(url, params=payload, headers=get_auth_headers())
+        response = service_calls.get("/cashfree/cash_advance_link", params=payload)
         
         if response.status_code == 200:
             response_data = response.json()
@@ -272,7 +270,7 @@ def generate_payment_link_func(
 
             if order_id:
                 # If order_id is present, store it in the database
-                db = next(get_db())
+                db = get_tool_db()
                 try:
                     # Get worker and employer details
                     worker_employer = db.query(models.worker_employer).filter(
@@ -340,7 +338,7 @@ def generate_payment_link_func(
                         "error": f"Failed to save records: {str(e)}"
                     }
                 finally:
-                    db.close()
+                    release_tool_db(db)
 
             return {
                 "success": True,
@@ -366,12 +364,9 @@ def generate_payment_link_func(
         }
 
 def update_salary_func(employer_number: int, worker_name: str, new_salary: int, chat_id: str = "") -> dict:
-    db = next(get_db())
+    db = get_tool_db()
     try:
-        # API endpoint for salary update
-        url = "https://conv.sampatticards.com/user/update_salary"
-        
-        # Parameters for the API call
+        # Parameters for the salary update call
         params = {
             "employerNumber": employer_number,
             "workerName": worker_name,
@@ -406,7 +401,7 @@ def update_salary_func(employer_number: int, worker_name: str, new_salary: int,
             print(f"Warning: Could not retrieve worker data: {db_error}")
         
         # Make the API call to update salary
-        response = requests.put(url, params=params, headers=get_auth_headers())
+        response = service_calls.put("/user/update_salary", params=params)
         
         if response.status_code == 200:
             # If worker data was found, create a SalaryManagementRecords entry
@@ -465,7 +460,7 @@ def update_salary_func(employer_number: int, worker_name: str, new_salary: int,
         }
     finally:
         if 'db' in locals():
-            db.close()
+            release_tool_db(db)
 
 # Create the tool
 update_salary_tool = StructuredTool.from_function(
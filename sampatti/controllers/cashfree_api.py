@@ -1,7 +1,9 @@
 import calendar
 from datetime import datetime
 from fastapi import HTTPException
-import json, uuid, requests, os
+import json, uuid, requests, os, time
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from cashfree_pg.api_client import Cashfree
 from cashfree_verification.api_client import Cashfree as Cashfree_Verification
 from cashfree_verification.models.upi_mobile_request_schema import UpiMobileRequestSchema
@@ -12,13 +14,16 @@ from cashfree_pg.models.customer_details import CustomerDetails
 from .. import models
 from .whatsapp_message import send_whatsapp_message, rashmita_sample_payment_link
 from .utility_functions import generate_unique_id, current_month, current_date, current_year, previous_month
+from .rate_limiter import TokenBucket, chunked
 from sqlalchemy.orm import Session
 from sqlalchemy import update
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, bindparam
 from sqlalchemy import update
 from .. import schemas
+from . import http_client
+from .order_status_cache import order_status_cache
 
 load_dotenv()
 verification_id= os.environ.get('CASHFREE_VERIFICATION_ID')
@@ -71,7 +76,7 @@ def fetch_multiple_vpa(workerNumber : int):
         "x-client-secret": verification_secret
     }
 
-    response = requests.post(url, json=payload, headers=headers)
+    response = http_client.post(url, json=payload, headers=headers)
 
     print(response.text)
     response_data = json.loads(response.text)
@@ -149,7 +154,7 @@ def add_a_vendor(request : schemas.Vendor):
 
     url = "https://api.cashfree.com/pg/easy-split/vendors"
 
-    response = requests.post(url, json=payload, headers=headers)
+    response = http_client.post(url, json=payload, headers=headers)
 
     response_data = json.loads(response.text)
     vendorId = response_data.get('vendor_id')
@@ -174,7 +179,7 @@ def check_vendor_status(vendorId):
             'Content-Type': 'application/json'
         }
 
-        response = requests.get(url, headers=headers, data=payload)
+        response = http_client.get(url, headers=headers, data=payload)
         response_data = json.loads(response.text)
         print(response_data)
         return response_data
@@ -195,7 +200,7 @@ def fetch_bank_ref(order_id):
         "x-client-secret": pg_secret
     }
 
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
 
     if response.status_code == 200:
         response_data = json.loads(response.text)
@@ -213,7 +218,15 @@ def fetch_bank_ref(order_id):
 
 
 # checking the order status
-def check_order_status(order_id):
+def check_order_status(order_id, bucket : TokenBucket = None):
+
+    cached = order_status_cache.get(order_id)
+    if cached is not None:
+        return cached
+
+    # batch callers pass their Cashfree bucket; only lookups that reach Cashfree spend a token
+    if bucket is not None:
+        bucket.acquire()
 
     url = f"https://api.cashfree.com/pg/orders/{order_id}"
 
@@ -224,8 +237,12 @@ def check_order_status(order_id):
         "x-api-version" : "2023-08-01"
     }
 
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
+    if bucket is not None and response.status_code in RETRYABLE_STATUS_CODES:
+        # a throttled or failed lookup is retried by the batch instead of being read as the order
+        response.raise_for_status()
     response_data = json.loads(response.text)
+    order_status_cache.put(order_id, response_data)
     return response_data
     
 # pan verification
@@ -250,110 +267,158 @@ def pan_verification(pan : str, name : str):
 
 # payment link generation
 
-def payment_link_generation(db : Session):
+EXCLUDED_EMPLOYER_NUMBERS = [917015645195, 919731011117, 917022878346, 919920802613, 919380496287]
+
+payment_link_workers = int(os.environ.get('PAYMENT_LINK_WORKERS', 8))
+payment_link_chunk_size = int(os.environ.get('PAYMENT_LINK_CHUNK_SIZE', 200))
+cashfree_orders_per_second = float(os.environ.get('CASHFREE_ORDERS_PER_SECOND', 10))
+cashfree_lookups_per_second = float(os.environ.get('CASHFREE_LOOKUPS_PER_SECOND', cashfree_orders_per_second))
+whatsapp_messages_per_second = float(os.environ.get('WHATSAPP_MESSAGES_PER_SECOND', 20))
+
+RETRYABLE_STATUS_CODES = [408, 425, 429, 500, 502, 503, 504]
+
+
+def is_retryable_error(e):
+    status = getattr(e, "status", None) or getattr(getattr(e, "response", None), "status_code", None)
+    if status in RETRYABLE_STATUS_CODES:
+        return True
+    return isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, httpx.TransportError))
+
+
+def create_payment_link_for_relation(item, cr_month, cr_year, number_of_month_days, cashfree_bucket, whatsapp_bucket):
+
+    x_api_version = "2023-08-01"
+    result = {
+        "worker_number": item.worker_number,
+        "employer_number": item.employer_number,
+        "status": "failed",
+        "order_id": None,
+        "payment_session_id": None,
+        "error": None
+    }
+
+    dummy_number = item.employer_number
+    actual_number = int(str(dummy_number)[2:])
+    customerDetails = CustomerDetails(customer_id= f"{item.worker_number}", customer_phone= f"{actual_number}")
+
+    total_salary = item.salary_amount
+
+    note = {
+        'salary': item.salary_amount,
+        'cashAdvance': 0,
+        'bonus': 0,
+        'repayment': 0,
+        'deduction': 0,
+        'attendance': number_of_month_days,
+        'repaymentStartMonth': 0,
+        'repaymentStartYear': 0,
+        'frequency': 0
+    }
+
+    order_splits = [
+        {
+            "vendor_id": f"{item.vendor_id}",
+            "amount": total_salary
+        }
+    ]
+    note_string = json.dumps(note)
+    createOrderRequest = CreateOrderRequest(order_amount = total_salary, order_currency="INR", customer_details=customerDetails, order_note=note_string, order_splits=order_splits)
+
+    try:
+        cashfree_bucket.acquire()
+        api_response = Cashfree().PGCreateOrder(x_api_version, createOrderRequest, None, None)
+        response = dict(api_response.data)
+    except Exception as e:
+        print(e)
+        result["status"] = "retryable" if is_retryable_error(e) else "failed"
+        result["error"] = f"order creation: {e}"
+        return result
+
+    result["order_id"] = response["order_id"]
+    result["payment_session_id"] = response["payment_session_id"]
+
+    # the order exists from here on, so its order_id is written back even if the message fails.
+    try:
+        whatsapp_bucket.acquire()
+        message_response = send_whatsapp_message(employerNumber=item.employer_number, worker_name=item.worker_name, param3=f"{cr_month} {cr_year}", link_param=result["payment_session_id"], template_name="payment_link_adjust_salary")
+    except Exception as e:
+        print(e)
+        result["status"] = "retryable" if is_retryable_error(e) else "failed"
+        result["error"] = f"whatsapp message: {e}"
+        return result
+
+    if message_response.status_code != 200:
+        result["status"] = "retryable" if message_response.status_code in RETRYABLE_STATUS_CODES else "failed"
+        result["error"] = f"whatsapp message: {message_response.status_code} {message_response.text}"
+        return result
+
+    result["status"] = "success"
+    return result
+
+
+def payment_link_generation(db : Session, max_workers : int = payment_link_workers, chunk_size : int = payment_link_chunk_size):
     Cashfree.XClientId = pg_id
     Cashfree.XClientSecret = pg_secret
     Cashfree.XEnvironment = Cashfree.XProduction
-    x_api_version = "2023-08-01"
 
     cr_month = current_month()
     cr_year = current_year()
-    
-    month_to_number = {
-        "January": 1, "February": 2, "March": 3, "April": 4,
-        "May": 5, "June": 6,
-        "July": 7, "August": 8, "September": 9,
-        "October": 10, "November": 11, "December": 12
-    }
+    number_of_month_days = calendar.monthrange(cr_year, datetime.now().month)[1]
+
+    cashfree_bucket = TokenBucket(cashfree_orders_per_second)
+    whatsapp_bucket = TokenBucket(whatsapp_messages_per_second)
 
-    payment_ids = []
     total_relations = db.query(models.worker_employer).all()
-    
-    for item in total_relations: 
+    relations = [item for item in total_relations if item.employer_number not in EXCLUDED_EMPLOYER_NUMBERS]
 
-        # if item.employer_number != 918208804525:
-        #     continue
-        if item.employer_number == 917015645195 or item.employer_number == 919731011117 or item.employer_number == 917022878346 or item.employer_number == 919920802613 or item.employer_number == 919380496287:
-            continue
+    update_statement = update(models.worker_employer).where(
+        models.worker_employer.c.worker_number == bindparam("b_worker_number"),
+        models.worker_employer.c.employer_number == bindparam("b_employer_number")
+    ).values(order_id=bindparam("b_order_id"))
 
-        else:
-            dummy_number = item.employer_number
-            actual_number = int(str(dummy_number)[2:])
-            customerDetails = CustomerDetails(customer_id= f"{item.worker_number}", customer_phone= f"{actual_number}")
-
-            total_salary = item.salary_amount
-            number_of_month_days = calendar.monthrange(cr_year, datetime.now().month)[1]
-
-            # # Cash advance repayment logic
-            # repayment_amount = 0
-            # repayment_start_month = None
-            # repayment_frequency = None 
-            # payment_status = None
-            # repayment_start_year = None
-            # cash_advance = 0
-
-            # # Fetch cash advance record for this worker-employer pair
-            # cash_advance_record = db.query(models.CashAdvanceManagement).filter(
-            #     models.CashAdvanceManagement.worker_id == item.worker_id,
-            #     models.CashAdvanceManagement.employer_id == item.employer_id
-            # ).first()
-
-            # if cash_advance_record:
-            #     repayment_amount = cash_advance_record.repaymentAmount or 0
-            #     repayment_start_month = cash_advance_record.repaymentStartMonth
-            #     repayment_frequency = cash_advance_record.frequency
-            #     payment_status = cash_advance_record.payment_status
-            #     repayment_start_year = cash_advance_record.repaymentStartYear
-            #     cash_advance = cash_advance_record.cashAdvance or 0
-
-            # current_month_num = datetime.now().month
-            # current_year_num = datetime.now().year
-            # should_deduct_repayment = False
-            # if payment_status == "COMPLETED" and repayment_start_month and repayment_frequency and repayment_start_year:
-            #     # Calculate the difference in months between current and repayment start
-            #     month_diff = (current_year_num - repayment_start_year) * 12 + (current_month_num - repayment_start_month)
-            #     if month_diff >= 0 and month_diff % repayment_frequency == 0:
-            #         should_deduct_repayment = True
-
-            # actual_repayment = min(cash_advance, repayment_amount) if should_deduct_repayment else 0
-            # amount_payable = total_salary - actual_repayment
-            note = {
-                'salary': item.salary_amount,
-                'cashAdvance': 0,
-                'bonus': 0,
-                'repayment': 0,
-                'deduction': 0,
-                'attendance': number_of_month_days,
-                'repaymentStartMonth': 0,
-                'repaymentStartYear': 0,
-                'frequency': 0
-            }
+    payment_ids = []
+    results = []
+    start_time = time.monotonic()
 
-            order_splits = [
-                {
-                    "vendor_id": f"{item.vendor_id}",
-                    "amount": total_salary
-                }
-            ]
-            note_string = json.dumps(note)
-            createOrderRequest = CreateOrderRequest(order_amount = total_salary, order_currency="INR", customer_details=customerDetails, order_note=note_string, order_splits=order_splits)
-            try:
-                api_response = Cashfree().PGCreateOrder(x_api_version, createOrderRequest, None, None)
-                response = dict(api_response.data)
-                payment_session_id = response["payment_session_id"]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in chunked(relations, chunk_size):
 
-                send_whatsapp_message(employerNumber=item.employer_number, worker_name=item.worker_name, param3=f"{cr_month} {cr_year}", link_param=payment_session_id, template_name="payment_link_adjust_salary")
+            futures = [executor.submit(create_payment_link_for_relation, item, cr_month, cr_year, number_of_month_days, cashfree_bucket, whatsapp_bucket) for item in chunk]
+            chunk_results = [future.result() for future in futures]
 
-                update_statement = update(models.worker_employer).where(models.worker_employer.c.worker_number == item.worker_number, models.worker_employer.c.employer_number == item.employer_number).values(order_id= response["order_id"])
+            order_updates = [
+                {"b_worker_number": result["worker_number"], "b_employer_number": result["employer_number"], "b_order_id": result["order_id"]}
+                for result in chunk_results if result["order_id"]
+            ]
 
-                db.execute(update_statement)
+            # one bulk UPDATE per chunk instead of a commit per relation
+            if order_updates:
+                db.execute(update_statement, order_updates)
                 db.commit()
-                payment_ids.append(payment_session_id)
 
-            except Exception as e:
-                print(e)
+            for result in chunk_results:
+                if result["status"] == "success":
+                    payment_ids.append(result["payment_session_id"])
+
+            results.extend(chunk_results)
+            print(f"Payment links processed: {len(results)}/{len(relations)}")
+
+    summary = {
+        "total": len(relations),
+        "success": len([result for result in results if result["status"] == "success"]),
+        "failed": len([result for result in results if result["status"] == "failed"]),
+        "retryable": len([result for result in results if result["status"] == "retryable"]),
+        "cashfree_rate_limit_waits": cashfree_bucket.waits,
+        "whatsapp_rate_limit_waits": whatsapp_bucket.waits,
+        "elapsed_seconds": round(time.monotonic() - start_time, 2)
+    }
+    print("Payment link generation summary: ", summary)
 
-    return payment_ids
+    return {
+        "payment_ids": payment_ids,
+        "summary": summary,
+        "results": results
+    }
 
 
 # creating dynamic payment links
@@ -447,7 +512,7 @@ def unsettled_balance(db : Session):
         }
 
         json_data = json.dumps(data)
-        response = requests.post(url, headers=headers, data=json_data)
+        response = http_client.post(url, headers=headers, data=json_data)
         print(response.text)
     return {
         "message" : "Splits created."
@@ -468,7 +533,7 @@ def bank_account_verification(account_number : str, ifsc_code : str):
         "Content-Type": "application/json"
     }
 
-    response = requests.request("POST", url, json=payload, headers=headers)
+    response = http_client.request("POST", url, json=payload, headers=headers)
 
     print(response.text)
     response_data = json.loads(response.text)
@@ -585,7 +650,7 @@ def fetch_payment_details(order_id):
         "x-client-secret": pg_secret
     }
 
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
 
     if response.status_code == 200:
         response_data = json.loads(response.text)
@@ -633,7 +698,7 @@ def create_cashfree_beneficiary(employer_number: int, upi_id: str, db : Session)
             "x-client-secret": verification_secret
         }
 
-        response = requests.post("https://api.cashfree.com/payout/beneficiary", headers=headers, json=payload)
+        response = http_client.post("https://api.cashfree.com/payout/beneficiary", headers=headers, json=payload)
 
         print("Create Beneficiary Response: ", response.text)
         if response.status_code == 200 or response.status_code == 201:
@@ -688,7 +753,7 @@ def transfer_cashback_amount(beneficiary_id: str, amount: int = None, transfer_m
             "x-client-secret": verification_secret
         }
             
-        response = requests.post(
+        response = http_client.post(
             "https://api.cashfree.com/payout/transfers",
             headers=header,
             json=payload
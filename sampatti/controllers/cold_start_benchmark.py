@@ -0,0 +1,47 @@
+import argparse, os, statistics, subprocess, sys, time
+import requests
+
+
+def time_to_first_request(port: int, path: str, timeout: float, env: dict) -> float:
+    """Start the app in a fresh process and return seconds until it answers its first request"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "sampatti.main:app", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                requests.get(f"http://127.0.0.1:{port}{path}", timeout=1)
+                return time.perf_counter() - started
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.05)
+        raise TimeoutError(f"no response within {timeout} seconds")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(runs: int, port: int, path: str, timeout: float, warm_agents: bool):
+    env = dict(os.environ, WARM_AGENTS_ON_STARTUP="true" if warm_agents else "false")
+    timings = [time_to_first_request(port, path, timeout, env) for _ in range(runs)]
+    print(
+        f"time to first served request over {runs} runs (warm agents: {warm_agents}): "
+        f"median {statistics.median(timings):.2f}s, min {min(timings):.2f}s, max {max(timings):.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold start as time to the first served request.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh server processes to start.")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the benchmark server.")
+    parser.add_argument("--path", type=str, default="/docs", help="Path requested once the server is up.")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for each start.")
+    parser.add_argument("--warm-agents", action="store_true", help="Build the super agent during startup.")
+
+    args = parser.parse_args()
+    main(args.runs, args.port, args.path, args.timeout, args.warm_agents)
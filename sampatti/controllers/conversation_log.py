@@ -0,0 +1,141 @@
+import os, time, uuid
+from datetime import datetime
+from dotenv import load_dotenv
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from .. import models
+from ..database import get_db_session
+
+load_dotenv()
+CHAT_HISTORY_LIMIT = int(os.environ.get("CHAT_HISTORY_LIMIT", 50))
+
+# Chroma is kept as an optional semantic index on top of the log; history reads never go to it.
+CONVERSATION_VECTOR_INDEX = os.environ.get("CONVERSATION_VECTOR_INDEX", "true").lower() == "true"
+
+
+def append_message(agent: str, employer_number, message: str, timestamp: float = None):
+    """Append one turn to the conversation log of an agent"""
+    with get_db_session() as db:
+        db.add(models.ConversationLog(
+            id=str(uuid.uuid4()),
+            agent=agent,
+            employerNumber=str(employer_number),
+            timestamp=timestamp if timestamp is not None else time.time(),
+            message=message
+        ))
+        db.commit()
+
+
+def get_recent_messages(agent: str, employer_number, limit: int = CHAT_HISTORY_LIMIT) -> list:
+    """Return the last `limit` messages in chronological order, read from the index tail"""
+    with get_db_session() as db:
+        rows = db.query(models.ConversationLog.message).filter(
+            models.ConversationLog.agent == agent,
+            models.ConversationLog.employerNumber == str(employer_number)
+        ).order_by(models.ConversationLog.timestamp.desc()).limit(limit).all()
+
+    return [row.message for row in reversed(rows)]
+
+
+def get_chat_history(agent: str, employer_number, limit: int = CHAT_HISTORY_LIMIT, vectordb=None) -> str:
+    """Recent history as one string, importing older Chroma history once per employer if a store is given"""
+    if vectordb is not None:
+        backfill_from_vectordb(agent, employer_number, vectordb)
+
+    return "\n".join(get_recent_messages(agent, employer_number, limit))
+
+
+def backfill_from_vectordb(agent: str, employer_number, vectordb):
+    """Copy history written before the conversation log existed; runs once per (agent, employer)"""
+    employer_str = str(employer_number)
+
+    with get_db_session() as db:
+        marker = db.query(models.ConversationLogBackfill).filter(
+            models.ConversationLogBackfill.agent == agent,
+            models.ConversationLogBackfill.employerNumber == employer_str
+        ).first()
+        if marker:
+            return 0
+
+        try:
+            raw_results = vectordb.get(where={"employerNumber": employer_str})
+        except Exception as e:
+            print(f"Error reading {agent} history from vector store: {e}")
+            return 0
+
+        documents = (raw_results.get("documents") or []) if raw_results else []
+        metadatas = (raw_results.get("metadatas") or []) if raw_results else []
+
+        # turns already written to both stores are not imported twice
+        existing_timestamps = {row.timestamp for row in db.query(models.ConversationLog.timestamp).filter(
+            models.ConversationLog.agent == agent,
+            models.ConversationLog.employerNumber == employer_str
+        ).all()}
+
+        for metadata, document in zip(metadatas, documents):
+            timestamp = float((metadata or {}).get("timestamp", 0))
+            if timestamp in existing_timestamps:
+                continue
+            db.add(models.ConversationLog(
+                id=str(uuid.uuid4()),
+                agent=agent,
+                employerNumber=employer_str,
+                timestamp=timestamp,
+                message=document
+            ))
+
+        db.add(models.ConversationLogBackfill(
+            agent=agent,
+            employerNumber=employer_str,
+            importedCount=len(documents),
+            date=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ))
+        db.commit()
+
+    return len(documents)
+
+
+def clear_history(agent: str, employer_number) -> int:
+    """Delete an employer's log for one agent and return the number of removed messages"""
+    employer_str = str(employer_number)
+    with get_db_session() as db:
+        result = db.execute(delete(models.ConversationLog).where(
+            models.ConversationLog.agent == agent,
+            models.ConversationLog.employerNumber == employer_str
+        ))
+        # keep the backfill marker so cleared history is not imported again from Chroma
+        if not db.query(models.ConversationLogBackfill).filter(
+            models.ConversationLogBackfill.agent == agent,
+            models.ConversationLogBackfill.employerNumber == employer_str
+        ).first():
+            db.add(models.ConversationLogBackfill(agent=agent, employerNumber=employer_str, importedCount=0, date=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        db.commit()
+    return result.rowcount
+
+
+def next_sequence(scope: str, chat_key) -> int:
+    """Next per-chat sequence number, so appends never need to count the existing messages"""
+    key = str(chat_key)
+    with get_db_session() as db:
+        updated = db.execute(update(models.ConversationSequence).where(
+            models.ConversationSequence.scope == scope,
+            models.ConversationSequence.chatKey == key
+        ).values(lastSequence=models.ConversationSequence.lastSequence + 1)).rowcount
+
+        if not updated:
+            try:
+                db.add(models.ConversationSequence(scope=scope, chatKey=key, lastSequence=1))
+                db.commit()
+                return 1
+            except IntegrityError:
+                # another writer created the counter first
+                db.rollback()
+                return next_sequence(scope, chat_key)
+
+        # the row stays locked by the UPDATE until commit, so this read sees our own increment
+        sequence = db.query(models.ConversationSequence.lastSequence).filter(
+            models.ConversationSequence.scope == scope,
+            models.ConversationSequence.chatKey == key
+        ).scalar()
+        db.commit()
+    return sequence
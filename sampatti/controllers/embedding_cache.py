@@ -0,0 +1,152 @@
+import hashlib, os, sqlite3, threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+load_dotenv()
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", os.path.join(os.getcwd(), "embedding_cache.db"))
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 10000))
+
+
+class EmbeddingStore:
+    """Content-addressed embedding cache: an in-memory LRU in front of a SQLite file"""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)")
+            self.local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key: str, vector: List[float]):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self.lock:
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                    self.stats["memory_hits"] += 1
+
+        remaining = [key for key in keys if key not in found]
+        for start in range(0, len(remaining), 500):
+            batch = remaining[start:start + 500]
+            placeholders = ",".join("?" for _ in batch)
+            rows = self.connection().execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch).fetchall()
+            with self.lock:
+                for key, blob in rows:
+                    vector = array("d", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.stats["disk_hits"] += 1
+
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        conn = self.connection()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+            [(key, model, array("d", vector).tobytes()) for key, vector in items.items()]
+        )
+        conn.commit()
+        with self.lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+
+    def record_misses(self, count: int):
+        with self.lock:
+            self.stats["misses"] += count
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0
+        return stats
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embeddings client and only sends texts that are not cached yet"""
+
+    def __init__(self, underlying: Embeddings, model: str, store: EmbeddingStore):
+        self.underlying = underlying
+        self.model = model
+        self.store = store
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [EmbeddingStore.make_key(self.model, text) for text in texts]
+        found = self.store.get_many(list(dict.fromkeys(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            self.store.record_misses(len(missing))
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.store.put_many(self.model, computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = EmbeddingStore.make_key(self.model, text)
+        found = self.store.get_many([key])
+        if key in found:
+            return found[key]
+
+        self.store.record_misses(1)
+        vector = self.underlying.embed_query(text)
+        self.store.put_many(self.model, {key: vector})
+        return vector
+
+
+_store = None
+_instances: Dict[str, CachedEmbeddings] = {}
+_lock = threading.Lock()
+
+
+def get_store() -> EmbeddingStore:
+    global _store
+    with _lock:
+        if _store is None:
+            _store = EmbeddingStore()
+        return _store
+
+
+def cached_embeddings(underlying: Embeddings) -> CachedEmbeddings:
+    """Shared cached wrapper per embedding model, so every agent reuses the same cache"""
+    model = getattr(underlying, "model", None) or type(underlying).__name__
+    store = get_store()
+    with _lock:
+        if model not in _instances:
+            _instances[model] = CachedEmbeddings(underlying, model, store)
+        return _instances[model]
+
+
+def embedding_cache_stats() -> Dict[str, int]:
+    return get_store().get_stats()
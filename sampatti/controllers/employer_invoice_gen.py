@@ -1,12 +1,19 @@
 import os
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
 from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
+from reportlab.platypus import Table
 from sqlalchemy.orm import Session
 from .. import models
 from .cashfree_api import fetch_bank_ref
 from .utility_functions import current_year, current_date, current_month, previous_month
+from . import pdf_assets
+
+INVOICE_NOTE = """NOTE : This is a digitally issued salary payment receipt and does not require attestation.
+The money has been debited in the corresponding bank account."""
+
+INVOICE_DECLARATION = """Declaration : The transaction trail is verified with an employment agreement between the employer and the 
+employee basis which the salary payment receipt is issued. Propublica Finance and Investment Services Pvt. Ltd. is not the 
+employer for the worker for whom salary payment receipt is generated."""
 
 
 def employer_invoice_generation(employerNumber, workerNumber, employerId, workerId, salary, cashAdvance, bonus, repayment, attendance, order_amount, deduction, db:Session) :
@@ -36,33 +43,8 @@ def employer_invoice_generation(employerNumber, workerNumber, employerId, worker
     w, h = A4
     c = canvas.Canvas(pdf_path, pagesize=A4)
     
-    flat_logo = os.path.join(os.getcwd(), 'logos/flat_logo.jpg')
-    circular_logo = os.path.join(os.getcwd(), 'logos/circular_logo.png')
-
-    c.setFont("Helvetica-Bold", 18)
-
-    c.setFillColorRGB(0.078, 0.33, 0.45)
-    c.drawImage(flat_logo, w-120, h-55, width=100, height=45)
-    text = "Propublica Finance and Investment Services Pvt. Ltd."
-    size = len(text)
-    c.drawString(w/2 - size*4.5, h-80, text=text)
-
     x = 15
-    y = h - 110
-
-    c.setFont("Helvetica", 14)
-
-    cin = "CIN : 20369785412547852"
-    udyam = "Udyam Registration Number : UDYAM-5689-120356"
-
-    c.drawString(w/2 - size*3, y, cin)
-    y -= 20
-    c.drawString(w/2 - size*3, y, udyam)
-
-    y -= 40
-    c.setFont("Helvetica-Bold", 14)
-    size = len("Salary Payment Receipt")
-    c.drawString(w/2-size*5, y, "Salary Payment Receipt") 
+    y = pdf_assets.draw_company_header(c, w, h, "Salary Payment Receipt")
 
     c.setFont("Times-Roman", 10)
 
@@ -90,20 +72,9 @@ def employer_invoice_generation(employerNumber, workerNumber, employerId, worker
     rows += 1
     ct += 1
 
-    receipt_style = TableStyle([
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.Color(0.078, 0.33, 0.45)),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('RIGHTPADDING', (0,0), (-1,-1), 10),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ])
-
     y = y - rows*25 - 70
     receipt_table = Table(receipt_data)
-    receipt_table.setStyle(receipt_style)
+    receipt_table.setStyle(pdf_assets.RECEIPT_TABLE_STYLE)
     receipt_table.wrapOn(c, 0, 0)
     receipt_table.drawOn(c, x, y)
 
@@ -124,35 +95,8 @@ def employer_invoice_generation(employerNumber, workerNumber, employerId, worker
     c.setFont("Helvetica-Bold", 10)
     y -= 30
           
-    note = """NOTE : This is a digitally issued salary payment receipt and does not require attestation.
-The money has been debited in the corresponding bank account."""
-    lines = note.split('\n')
-    c.setFont("Helvetica", 8)
-
-    y = 110
-    for line in lines:
-        c.drawString(x+40, y, line)
-        y -= 10
-
-    y -= 10
-
-    c.drawImage(circular_logo, 15, y-20 , 30, 30)
-
-    declaration = """Declaration : The transaction trail is verified with an employment agreement between the employer and the 
-employee basis which the salary payment receipt is issued. Propublica Finance and Investment Services Pvt. Ltd. is not the 
-employer for the worker for whom salary payment receipt is generated."""
-
-    lines = declaration.split('\n')
-    for line in lines:
-        c.drawString(x+40, y, line)
-        y -= 10
-
-
-    c.setFont("Helvetica", 10)
-    c.rect(0,0,w,30, fill=True)
-    c.setFillColorRGB(1,1,1)
-    c.drawString(x+20, 12.5, "Phone : +91 86603 52558")
-    c.drawString(x+ 170, 12.5, "website : www.sampatticard.in          support : support@sampatticard.in")
+    pdf_assets.draw_note_and_declaration(c, x+40, INVOICE_NOTE, INVOICE_DECLARATION)
+    pdf_assets.draw_contact_bar(c, w, x+20, x+170)
 
     c.showPage()
     c.save()
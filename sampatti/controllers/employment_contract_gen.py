@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from .. import models
 from .. import schemas
 from datetime import datetime
+from . import pdf_assets
 
 def create_employment_record_pdf(request: schemas.Contract, db:Session):
   
@@ -19,18 +20,15 @@ def create_employment_record_pdf(request: schemas.Contract, db:Session):
     if not os.path.exists('contracts'):
         os.makedirs('contracts')
 
-    flat_logo = os.path.join(os.getcwd(), 'logos/flat_logo.jpg')
-    circular_logo = os.path.join(os.getcwd(), 'logos/circular_logo.png')
-
     c = canvas.Canvas(pdf_path, pagesize=A4)
     w,h = A4
 
     y = h-55
-    c.drawImage(flat_logo, w-120, y, width=100, height=45)
+    c.drawImage(pdf_assets.flat_logo(), w-120, y, width=100, height=45)
     x = 40
     y = y - 40
     c.setFont("Helvetica-Bold", 36)
-    c.setFillColorRGB(0.078, 0.33, 0.45)
+    c.setFillColorRGB(*pdf_assets.BRAND_RGB)
     c.drawString(x, y, "Digital Employment Record")
 
     # Employer Information
@@ -92,7 +90,7 @@ Thanks."""
 
 
     y = y - 50
-    c.drawImage(circular_logo, 25, y-30 , 30, 30)
+    c.drawImage(pdf_assets.circular_logo(), 25, y-30 , 30, 30)
     declaration = """Verified by Sampatti Card
 The employment record is digitally created and verified and does not require attestation or physical signature. 
 As per Evidence Act, 1872, Section 65B whatsapp messages form electronic evidence and thus contract over whatsapp 
@@ -107,11 +105,7 @@ is legally valid. """
 
     y = y - 20
     # Company Contact
-    c.setFont("Helvetica", 10)
-    c.rect(0,0,w,30, fill=True)
-    c.setFillColorRGB(1,1,1)
-    c.drawString(x, 12.5, "Phone : +91 86603 52558")
-    c.drawString(x+ 150, 12.5, "website : www.sampatticard.in          support : support@sampatticard.in")
+    pdf_assets.draw_contact_bar(c, w, x, x+150)
 
     c.showPage()
     c.save()
@@ -0,0 +1,120 @@
+import asyncio, os, threading, weakref
+from http.cookiejar import DefaultCookiePolicy
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 60))
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 20))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 20))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+
+
+class PooledSession(requests.Session):
+    """requests.Session that applies default timeouts to calls that do not pass one"""
+
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+def build_session(max_retries: int = HTTP_MAX_RETRIES, pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE) -> PooledSession:
+    """Keep-alive session with one connection pool per host (WhatsApp, Cashfree, Sarvam, ...)"""
+    session = PooledSession()
+
+    # only idempotent methods (GET, PUT, DELETE, ...) are retried, so a timed out
+    # payment or message POST is never sent twice
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    # the session is shared by every integration, so no cookies are carried between them
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> requests.Session:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = build_session()
+        return _client
+
+
+def set_http_client(client: requests.Session):
+    """Swap the shared client, e.g. for one whose adapters point at local stubs in tests"""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    return get_http_client().request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return get_http_client().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return get_http_client().post(url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return get_http_client().put(url, **kwargs)
+
+
+# async callers (webhook handlers, concurrent sends) share one httpx pool per event loop;
+# an AsyncClient's connections belong to the loop that opened them
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def build_async_client(pool_maxsize: int = HTTP_POOL_MAXSIZE) -> httpx.AsyncClient:
+    client = httpx.AsyncClient(
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+    )
+    client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_clients[loop] = build_async_client()
+        return client
+
+
+def set_async_http_client(client: httpx.AsyncClient):
+    """Swap the running loop's client, e.g. for one with a MockTransport in tests"""
+    with _client_lock:
+        _async_clients[asyncio.get_running_loop()] = client
+
+
+async def close_async_http_client():
+    with _client_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
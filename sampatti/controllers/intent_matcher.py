@@ -0,0 +1,219 @@
+import os, random, threading, time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+INTENT_FASTPATH_THRESHOLD = float(os.environ.get("INTENT_FASTPATH_THRESHOLD", 0.85))
+INTENT_SHADOW_SAMPLE_RATE = float(os.environ.get("INTENT_SHADOW_SAMPLE_RATE", 0.0))
+
+GREETING_WORDS = ["hello", "hi", "hey", "good morning", "good evening"]
+HELP_WORDS = ["help", "what can you do", "capabilities"]
+
+# fields the super agent expects for each intent, same values as its keyword fallback
+INTENT_DEFAULTS = {
+    "worker_info": (False, "worker_info_request"),
+    "finance_related_inquiry": (True, "finance_related_request"),
+    "cash_advance": (True, "cash_advance_related"),
+    "onboarding": (True, "onboarding_related"),
+    "greeting": (False, "greeting"),
+    "help": (False, "help_request"),
+    "general_conversation": (False, "general_chat"),
+}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over keyword phrases, matching whole words only"""
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        # node 0 is the root; each node has transitions, a failure link and its output (keyword, labels)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[str, Tuple[str, ...]]]] = [[]]
+
+        labels_by_keyword: Dict[str, set] = {}
+        for label, phrases in keywords.items():
+            for phrase in phrases:
+                labels_by_keyword.setdefault(phrase.lower().strip(), set()).add(label)
+
+        for phrase, labels in labels_by_keyword.items():
+            if phrase:
+                self._add(phrase, tuple(sorted(labels)))
+        self._build()
+
+    def _add(self, phrase: str, labels: Tuple[str, ...]):
+        node = 0
+        for char in phrase:
+            if char not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][char] = len(self.goto) - 1
+            node = self.goto[node][char]
+        self.output[node].append((phrase, labels))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def search(self, text: str) -> List[Tuple[int, int, str, Tuple[str, ...]]]:
+        """All (start, end, keyword, labels) matches that start and end on word boundaries"""
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for phrase, labels in self.output[node]:
+                start = index - len(phrase) + 1
+                end = index + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    matches.append((start, end, phrase, labels))
+        return matches
+
+
+def covered_length(spans: List[Tuple[int, int]]) -> int:
+    total = 0
+    current_start, current_end = None, None
+    for start, end in sorted(spans):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+class IntentPreClassifier:
+    """Scores messages against the intent keywords and keeps a report of how it compares with the LLM"""
+
+    def __init__(self, intent_keywords: Dict[str, List[str]], threshold: float = INTENT_FASTPATH_THRESHOLD, shadow_sample_rate: float = INTENT_SHADOW_SAMPLE_RATE):
+        self.automaton = KeywordAutomaton(intent_keywords)
+        self.threshold = threshold
+        self.shadow_sample_rate = shadow_sample_rate
+        self.lock = threading.Lock()
+        self.report = {
+            "messages": 0,
+            "fast_path": 0,
+            "llm_calls": 0,
+            "compared": 0,
+            "agreed": 0,
+            "local_ms_total": 0.0,
+            "llm_ms_total": 0.0,
+            # agreement with the LLM bucketed by local score, used to tune the threshold
+            "by_score": {}
+        }
+
+    def predict(self, user_message: str) -> Optional[Dict]:
+        """Best local guess as {intent, score, keywords}, or None when nothing matched"""
+        text = " ".join((user_message or "").lower().split())
+        if not text:
+            return None
+
+        matches = self.automaton.search(text)
+        if not matches:
+            return None
+
+        spans_by_label: Dict[str, List[Tuple[int, int]]] = {}
+        keywords_by_label: Dict[str, List[str]] = {}
+        for start, end, phrase, labels in matches:
+            for label in labels:
+                spans_by_label.setdefault(label, []).append((start, end))
+                if phrase not in keywords_by_label.setdefault(label, []):
+                    keywords_by_label[label].append(phrase)
+
+        coverage = {label: covered_length(spans) / len(text) for label, spans in spans_by_label.items()}
+        best_label = max(coverage, key=lambda label: (coverage[label], len(keywords_by_label[label])))
+
+        # a message matching more than one intent is left to the LLM, and so is a lone one-word
+        # keyword: replies like "Bank" or "hi" usually answer the conversation in progress,
+        # which only the LLM sees (through the chat history)
+        exclusive = len(spans_by_label) == 1
+        multi_word = any(" " in keyword for keyword in keywords_by_label[best_label])
+        corroborated = multi_word or len(keywords_by_label[best_label]) > 1
+        score = 0.5 * coverage[best_label] + (0.35 if exclusive and corroborated else 0) + (0.15 if multi_word else 0)
+
+        intent = best_label
+        if intent == "general_conversation":
+            if any(keyword in GREETING_WORDS for keyword in keywords_by_label[best_label]):
+                intent = "greeting"
+            elif any(keyword in HELP_WORDS for keyword in keywords_by_label[best_label]):
+                intent = "help"
+
+        return {
+            "intent": intent,
+            "score": round(min(score, 1.0), 3),
+            "keywords": keywords_by_label[best_label]
+        }
+
+    def classify(self, user_message: str, llm_classify):
+        """Return the local classification when confident, otherwise the LLM's; llm_classify is called lazily"""
+        started = time.perf_counter()
+        prediction = self.predict(user_message)
+        local_ms = (time.perf_counter() - started) * 1000
+
+        confident = prediction is not None and prediction["score"] >= self.threshold
+        shadow = confident and self.shadow_sample_rate > 0 and random.random() < self.shadow_sample_rate
+
+        with self.lock:
+            self.report["messages"] += 1
+            self.report["local_ms_total"] += local_ms
+
+        if confident and not shadow:
+            with self.lock:
+                self.report["fast_path"] += 1
+            return self.to_intent_fields(prediction)
+
+        started = time.perf_counter()
+        result = llm_classify()
+        llm_ms = (time.perf_counter() - started) * 1000
+
+        with self.lock:
+            self.report["llm_calls"] += 1
+            self.report["llm_ms_total"] += llm_ms
+            if prediction is not None:
+                llm_intent = getattr(result, "primary_intent", None)
+                agreed = llm_intent == prediction["intent"]
+                bucket = f"{int(prediction['score'] * 10) / 10:.1f}"
+                stats = self.report["by_score"].setdefault(bucket, {"compared": 0, "agreed": 0})
+                stats["compared"] += 1
+                stats["agreed"] += 1 if agreed else 0
+                self.report["compared"] += 1
+                self.report["agreed"] += 1 if agreed else 0
+
+        return result
+
+    @staticmethod
+    def to_intent_fields(prediction: Dict) -> Dict:
+        requires_specialized_agent, conversation_context = INTENT_DEFAULTS.get(prediction["intent"], (False, "general_chat"))
+        return {
+            "primary_intent": prediction["intent"],
+            "confidence": prediction["score"],
+            "keywords_found": prediction["keywords"],
+            "requires_specialized_agent": requires_specialized_agent,
+            "conversation_context": conversation_context,
+            "user_emotional_state": "neutral"
+        }
+
+    def get_report(self) -> Dict:
+        with self.lock:
+            report = {key: (dict(value) if isinstance(value, dict) else value) for key, value in self.report.items()}
+        messages = report["messages"] or 1
+        report["threshold"] = self.threshold
+        report["fast_path_rate"] = round(report["fast_path"] / messages, 4)
+        report["agreement_rate"] = round(report["agreed"] / report["compared"], 4) if report["compared"] else None
+        report["avg_local_ms"] = round(report.pop("local_ms_total") / messages, 3)
+        llm_ms_total = report.pop("llm_ms_total")
+        report["avg_llm_ms"] = round(llm_ms_total / report["llm_calls"], 1) if report["llm_calls"] else None
+        return report
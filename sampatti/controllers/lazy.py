@@ -0,0 +1,25 @@
+import threading
+from functools import wraps
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def build_once(builder: Callable[[], T]) -> Callable[[], T]:
+    """Accessor for an object built on first use (LLM clients, agents, vector stores).
+
+    Unlike lru_cache, concurrent first calls wait for one build instead of each running
+    the builder; a builder that raises is tried again on the next call.
+    """
+    lock = threading.Lock()
+    built = []
+
+    @wraps(builder)
+    def get() -> T:
+        if not built:
+            with lock:
+                if not built:
+                    built.append(builder())
+        return built[0]
+
+    return get
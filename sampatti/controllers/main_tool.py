@@ -11,40 +11,42 @@ import asyncio
 from pydub import AudioSegment
 from urllib.parse import urlparse
 from .utility_functions import call_sarvam_api, format_bullets_whatsapp
-from ..database import get_db
+from .tool_session import get_tool_db, release_tool_db
 from sqlalchemy.orm import Session
 from .. import models
 from .utility_functions import generate_unique_id
-from ..routers.auth import get_auth_headers
+from . import service_calls
 
 
 def add_employer(employer_number: int):
   
-    db = next(get_db())
-
-    employer = db.query(models.Employer).where(models.Employer.employerNumber == employer_number).first()
-
-    if not employer:
-        unique_id = generate_unique_id()
-        new_user = models.Employer(
-            id=unique_id, 
-            employerNumber=employer_number,
-            referralCode = '',
-            accountNumber = '',
-            ifsc = '',
-            upiId = '',
-            cashbackAmountCredited=0,
-            FirstPaymentDone=False,
-            numberofReferral=0,
-            totalPaymentAmount=0
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        return new_user
-    
-    else:
-        return employer
+    db = get_tool_db()
+    try:
+        employer = db.query(models.Employer).where(models.Employer.employerNumber == employer_number).first()
+
+        if not employer:
+            unique_id = generate_unique_id()
+            new_user = models.Employer(
+                id=unique_id, 
+                employerNumber=employer_number,
+                referralCode = '',
+                accountNumber = '',
+                ifsc = '',
+                upiId = '',
+                cashbackAmountCredited=0,
+                FirstPaymentDone=False,
+                numberofReferral=0,
+                totalPaymentAmount=0
+            )
+            db.add(new_user)
+            db.commit()
+            db.refresh(new_user)
+            return new_user
+        
+        else:
+            return employer
+    finally:
+        release_tool_db(db)
 
 
 def get_employer_workers_info(employer_number: int):
@@ -53,10 +55,12 @@ def get_employer_workers_info(employer_number: int):
     Returns a structured dictionary the AI agent can use to generate responses.
     """
 
-    db = next(get_db())
-
-    # Fetch all mapped workers for the employer
-    result = db.query(models.worker_employer).where(models.worker_employer.c.employer_number == employer_number).all()
+    db = get_tool_db()
+    try:
+        # Fetch all mapped workers for the employer
+        result = db.query(models.worker_employer).where(models.worker_employer.c.employer_number == employer_number).all()
+    finally:
+        release_tool_db(db)
 
     # Build structured data
     workers_data = []
@@ -79,16 +83,22 @@ def get_employer_workers_info(employer_number: int):
 
 
 def check_employer_exists(employer_number: int) -> bool:
-    db = next(get_db())
-    employer = db.query(models.Employer).where(models.Employer.employerNumber == employer_number).first()
+    db = get_tool_db()
+    try:
+        employer = db.query(models.Employer).where(models.Employer.employerNumber == employer_number).first()
+    finally:
+        release_tool_db(db)
     
     if employer:
         return True
     return False
     
 def check_worker_employer_exists(employer_number: int) -> bool:
-    db = next(get_db())
-    mapping = db.query(models.worker_employer).where(models.worker_employer.c.employer_number == employer_number).first()
+    db = get_tool_db()
+    try:
+        mapping = db.query(models.worker_employer).where(models.worker_employer.c.employer_number == employer_number).first()
+    finally:
+        release_tool_db(db)
     
     if mapping:
         return True
@@ -100,11 +110,10 @@ def financial_query_response(employerNumber: int, query: str) -> str:
     Tool to handle financial queries related to employers and workers.
     It uses an external API to fetch accurate financial information.
     """
-    api_url = "https://conv.sampatticards.com/user/rag_process_query"  # Replace with actual API endpoint
     payload = {"employerNumber" : employerNumber, "query": query}
     
     try:
-        response = requests.post(api_url, params=payload, headers=get_auth_headers())
+        response = service_calls.post("/user/rag_process_query", params=payload)
         response.raise_for_status()
         data = response.json()
         answer_to_user_query = data.get("response", "")
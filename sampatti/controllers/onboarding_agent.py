@@ -8,12 +8,15 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent, AgentExecutor
+from . import conversation_log, tool_session
+from .lazy import build_once
 from .onboarding_tools import worker_onboarding_tool, transcribe_audio_tool, send_audio_tool, get_worker_details_tool, process_referral_code_tool, confirm_worker_and_add_to_employer_tool, employer_details_tool, pan_verification_tool, upi_or_bank_validation_tool, send_whatsapp_message_tool
 from .userControllers import send_audio_message
 from .whatsapp_message import send_v2v_message
 from langchain.memory import VectorStoreRetrieverMemory
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import OpenAIEmbeddings
+from .embedding_cache import cached_embeddings
 from langchain_core.documents import Document
 from langchain_groq import ChatGroq
 from .whatsapp_message import send_message_user
@@ -22,12 +25,16 @@ load_dotenv()
 
 openai_api_key = os.environ.get("OPENAI_API_KEY")
 openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
-llm = ChatOpenAI(
+@build_once
+def get_llm():
+    return ChatOpenAI(
         model="openai/gpt-4o", 
         api_key=openrouter_api_key,
         base_url="https://openrouter.ai/api/v1"
-)
-embedding = OpenAIEmbeddings(api_key=openai_api_key)
+    )
+@build_once
+def get_embedding():
+    return cached_embeddings(OpenAIEmbeddings(api_key=openai_api_key))
 
 prompt = ChatPromptTemplate.from_messages(
     [
@@ -233,58 +240,56 @@ prompt = ChatPromptTemplate.from_messages(
 
 
 tools = [worker_onboarding_tool, get_worker_details_tool, process_referral_code_tool, confirm_worker_and_add_to_employer_tool, employer_details_tool, pan_verification_tool, upi_or_bank_validation_tool, send_whatsapp_message_tool]
-agent = create_tool_calling_agent(
-    llm=llm,
-    prompt=prompt,
-    tools=tools  
-)
+@build_once
+def get_agent_executor():
+    """Built on first use and shared by every message; per-request state goes through the invoke inputs"""
+    agent = create_tool_calling_agent(
+        llm=get_llm(),
+        prompt=prompt,
+        tools=tools
+    )
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        memory=None,  # not using built-in memory
+        verbose=True,
+        handle_parsing_errors=True
+    )
 
 PERSIST_DIR = "../../chroma_db"
 
-# Global vectorstore (reused)
-vectordb = Chroma(
-    persist_directory=PERSIST_DIR,
-    collection_name="OnboardingConversations",
-    embedding_function=embedding
-)
+CONVERSATION_AGENT = "OnboardingConversations"
 
-def store_conversation(employer_number: int, message: str):
-    vectordb.add_texts(
-        texts=[message],
-        metadatas=[{
-            "employerNumber": str(employer_number),
-            "timestamp": time.time()
-        }]
+@build_once
+def get_vectordb():
+    """Conversation vector store, opened on first use rather than at import"""
+    return Chroma(
+        persist_directory=PERSIST_DIR,
+        collection_name=CONVERSATION_AGENT,
+        embedding_function=get_embedding()
     )
-    vectordb.persist()
-
 
+def store_conversation(employer_number: int, message: str):
+    timestamp = time.time()
+    conversation_log.append_message(CONVERSATION_AGENT, employer_number, message, timestamp)
+
+    if conversation_log.CONVERSATION_VECTOR_INDEX:
+        get_vectordb().add_texts(
+            texts=[message],
+            metadatas=[{
+                "employerNumber": str(employer_number),
+                "timestamp": timestamp
+            }]
+        )
+        get_vectordb().persist()
 
 def get_sorted_chat_history(employer_number: int) -> str:
-    raw_results = vectordb.get(where={"employerNumber": str(employer_number)})
-
-    if not raw_results or not raw_results.get("documents"):
-        return ""
-
-    messages = list(zip(raw_results["metadatas"], raw_results["documents"]))
-    sorted_messages = sorted(messages, key=lambda x: x[0].get("timestamp", 0))
-    sorted_text = "\n".join(msg for _, msg in sorted_messages)
-
-    return sorted_text
+    return conversation_log.get_chat_history(CONVERSATION_AGENT, employer_number, vectordb=get_vectordb())
 
 
 def queryExecutor(employer_number: int, typeofMessage : str, query : str, mediaId : str):
     sorted_history = get_sorted_chat_history(employer_number)
 
-    # Register all tools with the agent
-    agent_executor = AgentExecutor(
-        agent=agent,
-        tools=tools,
-        memory=None,  # not using built-in memory
-        verbose=True,
-        handle_parsing_errors=True
-    )
-
     # Pass all relevant info so the agent can reason and use tools
     full_query = f"The employer number is {employer_number}. Query: {query}."
 
@@ -293,7 +298,8 @@ def queryExecutor(employer_number: int, typeofMessage : str, query : str, mediaI
         "chat_history": sorted_history
     }
 
-    response = agent_executor.invoke(inputs)
+    with tool_session.agent_turn():
+        response = get_agent_executor().invoke(inputs)
 
     try:
         assistant_response = response.get('output') or ""
@@ -313,8 +319,9 @@ def clear_employer_cache_super_agent(employer_number: int) -> dict:
         vectordb = Chroma(
             persist_directory=PERSIST_DIR,
             collection_name="SuperAgentConversations",
-            embedding_function=embedding
+            embedding_function=get_embedding()
         )
+        log_deleted = conversation_log.clear_history("SuperAgentConversations", employer_number)
         
         # Get documents for this employer
         results = vectordb.get(where={"employerNumber": str(employer_number)})
@@ -323,9 +330,9 @@ def clear_employer_cache_super_agent(employer_number: int) -> dict:
         if document_ids:
             vectordb.delete(ids=document_ids)
             vectordb.persist()
-            return {"status": "success", "deleted": len(document_ids)}
+            return {"status": "success", "deleted": len(document_ids), "log_deleted": log_deleted}
         
-        return {"status": "success", "deleted": 0}
+        return {"status": "success", "deleted": 0, "log_deleted": log_deleted}
         
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -337,8 +344,9 @@ def clear_employer_cache_onboarding_agent(employer_number: int) -> dict:
         vectordb = Chroma(
             persist_directory=PERSIST_DIR,
             collection_name="OnboardingConversations",
-            embedding_function=embedding
+            embedding_function=get_embedding()
         )
+        log_deleted = conversation_log.clear_history("OnboardingConversations", employer_number)
         
         # Get documents for this employer
         results = vectordb.get(where={"employerNumber": str(employer_number)})
@@ -347,9 +355,9 @@ def clear_employer_cache_onboarding_agent(employer_number: int) -> dict:
         if document_ids:
             vectordb.delete(ids=document_ids)
             vectordb.persist()
-            return {"status": "success", "deleted": len(document_ids)}
+            return {"status": "success", "deleted": len(document_ids), "log_deleted": log_deleted}
         
-        return {"status": "success", "deleted": 0}
+        return {"status": "success", "deleted": 0, "log_deleted": log_deleted}
         
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -361,8 +369,9 @@ def clear_employer_cache_cash_advance_agent(employer_number: int) -> dict:
         vectordb = Chroma(
             persist_directory=PERSIST_DIR,
             collection_name="CashAdvanceConversations",
-            embedding_function=embedding
+            embedding_function=get_embedding()
         )
+        log_deleted = conversation_log.clear_history("CashAdvanceConversations", employer_number)
         
         # Get documents for this employer
         results = vectordb.get(where={"employerNumber": str(employer_number)})
@@ -371,9 +380,9 @@ def clear_employer_cache_cash_advance_agent(employer_number: int) -> dict:
         if document_ids:
             vectordb.delete(ids=document_ids)
             vectordb.persist()
-            return {"status": "success", "deleted": len(document_ids)}
+            return {"status": "success", "deleted": len(document_ids), "log_deleted": log_deleted}
         
-        return {"status": "success", "deleted": 0}
+        return {"status": "success", "deleted": 0, "log_deleted": log_deleted}
         
     except Exception as e:
         return {"status": "error", "message": str(e)}
\ No newline at end of file
@@ -8,23 +8,36 @@ from .talk_to_agent_excel_file  import (
 )
 
 
-def run_tasks_till_add_vendor():
+# each task returns the sheet cells it changed. With dry_run nothing is written to the sheet or the
+# database and no vendor, verification, extraction or WhatsApp call is made; the changes and the
+# skipped actions are only reported. Vendor status lookups are read only and still run.
+# incremental runs only look at rows that are new or changed since the task last finished
+# with them (see SheetWatermark); incremental=False rescans the whole sheet.
+
+def run_tasks_till_add_vendor(dry_run : bool = False, incremental : bool = True):
+    changes = {}
+
     print("Running: fetch_pan_bank_details_from_image")
-    fetch_pan_bank_details_from_image()
+    changes["fetch_pan_bank_details_from_image"] = fetch_pan_bank_details_from_image(dry_run, incremental)
 
     print("Running: bank_account_validation_status")
-    bank_account_validation_status()
+    changes["bank_account_validation_status"] = bank_account_validation_status(dry_run, incremental)
 
     print("Running: add_vendor_to_cashfree")
-    add_vendor_to_cashfree()
+    changes["add_vendor_to_cashfree"] = add_vendor_to_cashfree(dry_run, incremental)
 
+    return changes
 
-def run_tasks_after_vendor_addition():
+
+def run_tasks_after_vendor_addition(dry_run : bool = False, incremental : bool = True):
+    changes = {}
 
     with get_db_session() as db:
         print("Running: process_vendor_status")
-        process_vendor_status(db)
+        changes["process_vendor_status"] = process_vendor_status(db, dry_run, incremental)
 
     with get_db_session() as db:
         print("Running: create_relations_in_db")
-        create_relations_in_db(db)
\ No newline at end of file
+        changes["create_relations_in_db"] = create_relations_in_db(db, dry_run, incremental)
+
+    return changes
@@ -10,7 +10,8 @@ import requests, os, tempfile
 from pydub import AudioSegment
 from urllib.parse import urlparse
 from .utility_functions import transcribe_audio_from_file_path, get_main_transcript, call_sarvam_api, generate_unique_id, current_date
-from ..database import get_db_session, get_db
+from ..database import get_db_session
+from .tool_session import get_tool_db, release_tool_db
 from sqlalchemy.orm import Session
 from ..models import CashAdvanceManagement, worker_employer
 from fastapi import Depends
@@ -18,9 +19,10 @@ from .. import models
 from .main_tool import add_employer
 from . import userControllers
 from ..controllers import onboarding_tasks, talk_to_agent_excel_file, userControllers, cashfree_api, whatsapp_message
-from ..routers.auth import get_auth_headers
+from . import service_calls
 import re
 from dotenv import load_dotenv
+from . import http_client
 
 load_dotenv()
 orai_api_key = os.environ.get('ORAI_API_KEY')
@@ -130,8 +132,7 @@ def onboard_worker_employer( worker_number: int, employer_number: int, pan_numbe
         "referral_code": referral_code or ""
     }
 
-    url = "https://conv.sampatticards.com/user/ai_agent/onboarding_worker_sheet/create"
-    response = requests.post(url, json=data, headers=get_auth_headers())
+    response = service_calls.post("/user/ai_agent/onboarding_worker_sheet/create", json_body=data)
     
     if response.status_code == 200:
         onboarding_tasks.run_tasks_till_add_vendor()
@@ -152,7 +153,7 @@ def transcribe_audio(mediaId: str):
         "D360-API-KEY": orai_api_key
     }
 
-    response_1 = requests.get(f"https://waba-v2.360dialog.io/{mediaId}", headers=headers)
+    response_1 = http_client.get(f"https://waba-v2.360dialog.io/{mediaId}", headers=headers)
 
     if response_1.status_code != 200:
         return f"Failed to get audio info: {response_1.status_code} {response_1.text}"
@@ -165,7 +166,7 @@ def transcribe_audio(mediaId: str):
     whatsapp_index = audio_url.find("whatsapp")
     whatsapp_path = audio_url[whatsapp_index:]
 
-    response_2 = requests.get(f"https://waba-v2.360dialog.io/{whatsapp_path}", headers=headers, stream=True)
+    response_2 = http_client.get(f"https://waba-v2.360dialog.io/{whatsapp_path}", headers=headers, stream=True)
     if response_2.status_code != 200:
         return f"Failed to download audio: {response_2.status_code} {response_2.text}"
 
@@ -206,14 +207,13 @@ def send_audio(text: str, employerNumber: int, user_language: str = "en-IN"):
     Returns:
         dict: The response from the API.
     """
-    url = "https://conv.sampatticards.com/user/send_audio_message"
     payload = {
         "text": text,
         "user_language": user_language,
         "employerNumber": employerNumber
     }
     try:
-        response = requests.post(url, params=payload, headers=get_auth_headers())
+        response = service_calls.post("/user/send_audio_message", params=payload)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
@@ -225,7 +225,7 @@ def normalize_name(name: str) -> str:
     return re.sub(r'\s+', ' ', name.strip().lower())
 
 def get_worker_by_name_and_employer(worker_name: str, employer_number: int) -> dict:
-    db = next(get_db())
+    db = get_tool_db()
     """
     Find worker details by name and employer number from worker_employer table.
     Returns worker information if found, empty dict if not found.
@@ -279,7 +279,7 @@ def get_worker_by_name_and_employer(worker_name: str, employer_number: int) -> d
         print(f"Error finding worker: {e}")
         return {"found": False, "error": str(e)}
     finally:
-        db.close()
+        release_tool_db(db)
 
 
 def get_worker_details(workerNumber : int, employer_number: int):
@@ -295,13 +295,12 @@ def get_worker_details(workerNumber : int, employer_number: int):
     
     if str(workerNumber) == employer_without_prefix:
         return "Error: You cannot onboard yourself as a worker. Please provide a different worker number."
-    url = "https://conv.sampatticards.com/user/check_worker"
     payload = {
         "workerNumber": workerNumber
     }
 
     try:
-        response = requests.get(url, params=payload, headers=get_auth_headers())
+        response = service_calls.get("/user/check_worker", params=payload)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
@@ -328,7 +327,7 @@ def process_referral_code(employer_number: int, referral_code: Optional[str] = N
     try:
         print(f"Starting referral processing for employer {employer_number} with code {referral_code}")
         
-        db = next(get_db())
+        db = get_tool_db()
 
         # STEP 1: Validate referral code
         referring_employer = db.query(models.Employer).where(
@@ -487,7 +486,7 @@ def process_referral_code(employer_number: int, referral_code: Optional[str] = N
             "message": f"Error processing referral code: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def upi_or_bank_validation(method: str, upi: Optional[str] = None, bank_account_number: Optional[str] = None, ifsc_code: Optional[str] = None) -> bool:
     if method == "UPI":
@@ -531,7 +530,7 @@ def send_whatsapp_message(employerNumber: int):
         "type": "template"
     }
 
-    response = requests.post(url, headers=headers, json=data)
+    response = http_client.post(url, headers=headers, json=data)
 
     if response.status_code == 200:
         print(f"Message sent successfully, Employer name : {employerNumber}")
@@ -542,14 +541,13 @@ def pan_verify(pan_number: str):
     """
     Verifies the validity of a PAN number using an external API.
     """
-    url = "https://conv.sampatticards.com/cashfree/pan_verification"
     payload = {
         "pan": pan_number,
         "name": "sample"
     }
 
     try:
-        response = requests.get(url, params=payload, headers=get_auth_headers())
+        response = service_calls.get("/cashfree/pan_verification", params=payload)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
@@ -564,7 +562,7 @@ def confirm_worker_and_add_to_employer(worker_number: int, employer_number: int,
     # Remove +91 prefix from employer_number for comparison
     
     try:
-        db = next(get_db())
+        db = get_tool_db()
         
         employer_number_str = str(employer_number)
         worker_number_str = str(worker_number)
@@ -691,12 +689,12 @@ def confirm_worker_and_add_to_employer(worker_number: int, employer_number: int,
             "message": f"Error adding worker to employer: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def employer_details(employer_number: int) -> dict:
 
     try:
-        db = next(get_db())
+        db = get_tool_db()
         employer = db.query(models.Employer).filter(
             models.Employer.employerNumber == employer_number
         ).first()
@@ -733,7 +731,7 @@ def employer_details(employer_number: int) -> dict:
             "error": f"Database error: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 get_worker_details_tool = StructuredTool.from_function(
     func=get_worker_details,
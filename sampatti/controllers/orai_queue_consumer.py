@@ -0,0 +1,89 @@
+import os, time, threading, multiprocessing
+from concurrent.futures import Future
+from dotenv import load_dotenv
+from . import webhook_queue, agent_dispatcher, service_calls
+
+load_dotenv()
+ORAI_QUEUE_CONSUMERS = int(os.environ.get('ORAI_QUEUE_CONSUMERS', 4))
+POLL_INTERVAL = float(os.environ.get('ORAI_QUEUE_POLL_INTERVAL', 0.5))
+HEARTBEAT_INTERVAL = webhook_queue.VISIBILITY_TIMEOUT / 3
+
+
+def run_consumer(consumer_id : str):
+
+    # imported here so every consumer process builds its own agents and db engine
+    from ..routers.webhook import process_orai_webhook
+    service_calls.mark_in_service()
+
+    in_flight = threading.Semaphore(agent_dispatcher.SUPER_AGENT_WORKERS)
+
+    # a job waits on the dispatcher behind earlier messages of its shard and then runs the
+    # whole agent turn, which can outlast the visibility timeout; the heartbeat extends it
+    # so the job is only reclaimed when this process is gone
+    running_jobs = set()
+    running_lock = threading.Lock()
+
+    def heartbeat():
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with running_lock:
+                job_ids = list(running_jobs)
+            try:
+                webhook_queue.extend(job_ids, consumer_id)
+            except Exception as e:
+                print(f"{consumer_id} heartbeat failed: {e}")
+
+    threading.Thread(target=heartbeat, name=f"{consumer_id}-heartbeat", daemon=True).start()
+
+    def finish_job(job_id, future):
+        try:
+            future.result()
+            webhook_queue.ack(job_id)
+        except Exception as e:
+            print(f"{consumer_id} failed job {job_id}: {e}")
+            webhook_queue.fail(job_id, str(e))
+        finally:
+            with running_lock:
+                running_jobs.discard(job_id)
+            in_flight.release()
+
+    print(f"{consumer_id} started")
+    while True:
+        in_flight.acquire()
+        job = webhook_queue.claim(consumer_id)
+        if job is None:
+            in_flight.release()
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        try:
+            result = process_orai_webhook(job["payload"], raise_errors=True)
+        except Exception as e:
+            print(f"{consumer_id} failed job {job['id']}: {e}")
+            webhook_queue.fail(job["id"], str(e))
+            in_flight.release()
+            continue
+
+        # super agent messages run on the dispatcher; the job is acked once the agent is done
+        if isinstance(result, Future):
+            with running_lock:
+                running_jobs.add(job["id"])
+            result.add_done_callback(lambda future, job_id=job["id"]: finish_job(job_id, future))
+        else:
+            webhook_queue.ack(job["id"])
+            in_flight.release()
+
+
+def main():
+
+    processes = []
+    for index in range(ORAI_QUEUE_CONSUMERS):
+        process = multiprocessing.Process(target=run_consumer, args=(f"consumer-{os.getpid()}-{index}",), daemon=True)
+        process.start()
+        processes.append(process)
+
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
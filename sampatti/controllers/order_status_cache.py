@@ -0,0 +1,72 @@
+import copy, os, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+ORDER_STATUS_TTL = float(os.environ.get("ORDER_STATUS_TTL", 30))
+ORDER_STATUS_CACHE_SIZE = int(os.environ.get("ORDER_STATUS_CACHE_SIZE", 20000))
+
+# a paid or expired order never changes again, so it is served from the cache for good
+TERMINAL_ORDER_STATUSES = {"PAID", "EXPIRED", "TERMINATED"}
+
+
+class OrderStatusCache:
+    """Cashfree order entities keyed by order_id; non-terminal ones are refetched after a short TTL"""
+
+    def __init__(self, ttl: float = ORDER_STATUS_TTL, max_entries: int = ORDER_STATUS_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "webhook_updates": 0}
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(order_id)
+            if entry is not None:
+                order, fetched_at = entry
+                if order.get("order_status") in TERMINAL_ORDER_STATUSES or time.time() - fetched_at < self.ttl:
+                    self.entries.move_to_end(order_id)
+                    self.stats["hits"] += 1
+                    return copy.deepcopy(order)
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, order_id: str, order: Dict[str, Any]):
+        # error bodies from Cashfree carry no order_status and are never cached
+        if not isinstance(order, dict) or "order_status" not in order:
+            return
+        with self.lock:
+            self.entries[order_id] = (copy.deepcopy(order), time.time())
+            self.entries.move_to_end(order_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def record_payment(self, order_id: str, payment_status: str):
+        """Apply a payment webhook: a successful payment makes the order PAID without asking Cashfree"""
+        with self.lock:
+            entry = self.entries.get(order_id)
+            if entry is None:
+                return
+            if payment_status != "SUCCESS":
+                # the order stays payable, let the next lookup see Cashfree's view
+                self.entries.pop(order_id, None)
+                return
+            order, _ = entry
+            # amount, note and splits of an order never change; only its status does
+            order["order_status"] = "PAID"
+            self.entries[order_id] = (order, time.time())
+            self.stats["webhook_updates"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["cashfree_calls_saved"] = stats["hits"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0
+        return stats
+
+
+order_status_cache = OrderStatusCache()
@@ -0,0 +1,162 @@
+import json, os, time, threading
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import get_db_session
+
+load_dotenv()
+MAX_ATTEMPTS = int(os.environ.get('PAYMENT_EVENT_MAX_ATTEMPTS', 3))
+# a failed event waits RETRY_BACKOFF_SECONDS, then twice that, ... before its next attempt
+RETRY_BACKOFF_SECONDS = float(os.environ.get('PAYMENT_EVENT_RETRY_BACKOFF_SECONDS', 60))
+# how often the app retries due events; the first pass runs at startup
+RECOVERY_INTERVAL_SECONDS = float(os.environ.get('PAYMENT_EVENT_RECOVERY_INTERVAL_SECONDS', 300))
+# a processing event not finished after this long belongs to a process that died
+STALE_PROCESSING_SECONDS = 600
+
+
+class PaymentWebhookEvent(BaseModel):
+    """The fields of a Cashfree payment webhook the pipeline uses, parsed once"""
+    order_id: str
+    employer_number: str
+    customer_id: Optional[str] = None
+    payment_status: str
+    payment_amount: float = 0
+    bank_reference: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "PaymentWebhookEvent":
+        data = payload["data"]
+        customer = data.get("customer_details") or {}
+        payment = data.get("payment") or {}
+        return cls(
+            order_id=data["order"]["order_id"],
+            employer_number=f"91{customer.get('customer_phone')}",
+            customer_id=customer.get("customer_id"),
+            payment_status=payment.get("payment_status") or "",
+            payment_amount=payment.get("payment_amount") or 0,
+            bank_reference=payment.get("bank_reference")
+        )
+
+
+def record_event(event: PaymentWebhookEvent, payload: dict, db: Session) -> bool:
+    """Persist the event; returns False when this order was already delivered"""
+    db.add(models.PaymentEvent(
+        orderId=event.order_id,
+        employerNumber=event.employer_number,
+        paymentStatus=event.payment_status,
+        paymentAmount=event.payment_amount,
+        payload=json.dumps(payload, separators=(',', ':')),
+        status="pending",
+        receivedAt=time.time()
+    ))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def _stale_processing():
+    return and_(models.PaymentEvent.status == "processing", models.PaymentEvent.claimedAt < time.time() - STALE_PROCESSING_SECONDS)
+
+
+def _retryable():
+    return and_(
+        models.PaymentEvent.attempts < MAX_ATTEMPTS,
+        or_(
+            models.PaymentEvent.status == "pending",
+            and_(models.PaymentEvent.status == "failed", or_(models.PaymentEvent.retryAt.is_(None), models.PaymentEvent.retryAt <= time.time())),
+            _stale_processing()
+        )
+    )
+
+
+def _claim(order_id: str, db: Session) -> bool:
+    claimed = db.execute(update(models.PaymentEvent).where(
+        models.PaymentEvent.orderId == order_id,
+        _retryable()
+    ).values(status="processing", attempts=models.PaymentEvent.attempts + 1, claimedAt=time.time())).rowcount
+    db.commit()
+    return claimed == 1
+
+
+def process_payment_event(order_id: str):
+    """Run the invoice, salary ledger and cashback stages of one recorded payment"""
+    from . import userControllers
+
+    with get_db_session() as db:
+        if not _claim(order_id, db):
+            return
+
+        event = db.get(models.PaymentEvent, order_id)
+        try:
+            # worker_employer row, salary period and order note are loaded once for every stage
+            context = userControllers.load_order_context(event.employerNumber, order_id, db)
+            payload = json.loads(event.payload)
+
+            # each stage is marked done on its own, so a retry resumes at the stage
+            # that failed and never sends an invoice or cashback twice
+            stages = [
+                ("invoiceSent", lambda: userControllers.send_employer_invoice(employerNumber=event.employerNumber, orderId=order_id, db=db, context=context)),
+                ("salaryLedgerUpdated", lambda: userControllers.update_salary_details(employerNumber=event.employerNumber, orderId=order_id, db=db, context=context)),
+                ("cashbackProcessed", lambda: userControllers.process_employer_cashback_for_first_payment(employerNumber=event.employerNumber, payload=payload, db=db)),
+            ]
+            for flag, run_stage in stages:
+                if getattr(event, flag):
+                    continue
+                run_stage()
+                setattr(event, flag, True)
+                db.commit()
+
+            event.status = "done"
+            event.error = None
+            event.processedAt = time.time()
+            db.commit()
+
+        except Exception as e:
+            print(f"Payment event {order_id} failed: {e}")
+            db.rollback()
+            event = db.get(models.PaymentEvent, order_id)
+            event.error = str(e)
+            if event.attempts >= MAX_ATTEMPTS:
+                event.status = "dead"
+                print(f"Payment event {order_id} gave up after {event.attempts} attempts")
+            else:
+                event.status = "failed"
+                event.retryAt = time.time() + RETRY_BACKOFF_SECONDS * 2 ** (event.attempts - 1)
+            db.commit()
+
+
+def process_pending_payment_events() -> dict:
+    """Retry events that failed or never ran (e.g. the process restarted before the background task)"""
+    with get_db_session() as db:
+        # a process died holding the last attempt; nothing will retry it, so park it as dead
+        dead = db.execute(update(models.PaymentEvent).where(
+            models.PaymentEvent.attempts >= MAX_ATTEMPTS,
+            _stale_processing()
+        ).values(status="dead", error="process died during the last attempt")).rowcount
+        db.commit()
+        order_ids = [row.orderId for row in db.query(models.PaymentEvent.orderId).filter(_retryable()).all()]
+
+    for order_id in order_ids:
+        process_payment_event(order_id)
+
+    return {"processed": len(order_ids), "dead": dead}
+
+
+def run_recovery(stop: threading.Event, interval: float = RECOVERY_INTERVAL_SECONDS):
+    """Retry due events now and then every interval until stop is set; started by the app lifespan"""
+    while True:
+        try:
+            result = process_pending_payment_events()
+            if result["processed"] or result["dead"]:
+                print(f"Payment event recovery: {result}")
+        except Exception as e:
+            print(f"Payment event recovery failed: {e}")
+        if stop.wait(interval):
+            return
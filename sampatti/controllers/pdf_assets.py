@@ -0,0 +1,136 @@
+import os
+from functools import lru_cache
+from PIL import Image
+from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import TableStyle
+
+# logos, styles and the company header/footer shared by the salary slip, invoice,
+# salary summary and employment record PDFs. Logos are loaded once per process
+# and reused by every document drawn after that.
+
+BRAND_RGB = (0.078, 0.33, 0.45)
+BRAND_COLOR = colors.Color(*BRAND_RGB)
+
+COMPANY_NAME = "Propublica Finance and Investment Services Pvt. Ltd."
+COMPANY_CIN = "CIN : 20369785412547852"
+COMPANY_UDYAM = "Udyam Registration Number : UDYAM-5689-120356"
+COMPANY_PHONE = "Phone : +91 86603 52558"
+SUPPORT_EMAIL = "support@sampatticard.in"
+
+RECEIPT_TABLE_STYLE = TableStyle([
+    ('TEXTCOLOR', (0, 0), (-1, -1), BRAND_COLOR),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('RIGHTPADDING', (0,0), (-1,-1), 10),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+WORKER_TABLE_STYLE = TableStyle([
+    ('TEXTCOLOR', (0, 0), (-1, -1), BRAND_COLOR),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0,0), (-1,-1), 100),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica')
+])
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('TEXTCOLOR', (0,0), (-1,-1), BRAND_COLOR),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+    ('FONTSIZE', (0,0), (-1,-1), 8),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),    # HEADER bold
+    ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),  # TOTAL row bold
+    ('BACKGROUND', (0,0), (-1,0), colors.white),
+    ('TEXTCOLOR', (0,0), (-1,0), BRAND_COLOR),
+    ('GRID', (0,0), (-1,-1), 1, BRAND_COLOR)
+])
+
+
+# the logo files are far larger than they are drawn (the 818px circular logo fills 30pt),
+# and ReportLab compresses and encodes the full image into every document. Scaling them
+# once to print resolution for their drawn width is what makes a document cheap to render.
+LOGO_DPI = 300
+FLAT_LOGO_WIDTH = 100
+CIRCULAR_LOGO_WIDTH = 30
+
+
+def _load_logo(filename, drawn_width) -> ImageReader:
+    image = Image.open(os.path.join(os.getcwd(), 'logos', filename))
+    width = round(drawn_width * LOGO_DPI / 72)
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    return ImageReader(image)
+
+
+@lru_cache()
+def flat_logo() -> ImageReader:
+    return _load_logo('flat_logo.jpg', FLAT_LOGO_WIDTH)
+
+
+@lru_cache()
+def circular_logo() -> ImageReader:
+    return _load_logo('circular_logo.png', CIRCULAR_LOGO_WIDTH)
+
+
+def clear_caches():
+    """Drop the cached logos, e.g. after the logo files change or to time uncached renders"""
+    flat_logo.cache_clear()
+    circular_logo.cache_clear()
+
+
+def draw_company_header(c, w, h, title):
+    """Logo, company name, CIN/Udyam and the document title; returns the y below the title"""
+    c.setFont("Helvetica-Bold", 18)
+
+    c.setFillColorRGB(*BRAND_RGB)
+    c.drawImage(flat_logo(), w-120, h-55, width=FLAT_LOGO_WIDTH, height=45)
+    size = len(COMPANY_NAME)
+    c.drawString(w/2 - size*4.5, h-80, text=COMPANY_NAME)
+
+    y = h - 110
+
+    c.setFont("Helvetica", 14)
+
+    c.drawString(w/2 - size*3, y, COMPANY_CIN)
+    y -= 20
+    c.drawString(w/2 - size*3, y, COMPANY_UDYAM)
+
+    y -= 40
+    c.setFont("Helvetica-Bold", 14)
+    size = len(title)
+    c.drawString(w/2-size*5, y, title)
+
+    return y
+
+
+def draw_note_and_declaration(c, text_x, note, declaration):
+    """The small print above the footer bar, with the circular logo next to the declaration"""
+    c.setFont("Helvetica", 8)
+
+    y = 110
+    for line in note.split('\n'):
+        c.drawString(text_x, y, line)
+        y -= 10
+
+    y -= 10
+
+    c.drawImage(circular_logo(), 15, y-20 , CIRCULAR_LOGO_WIDTH, CIRCULAR_LOGO_WIDTH)
+
+    for line in declaration.split('\n'):
+        c.drawString(text_x, y, line)
+        y -= 10
+
+
+def draw_contact_bar(c, w, phone_x, website_x, support_email=SUPPORT_EMAIL):
+    """Filled bar at the bottom of the page with phone, website and support address"""
+    c.setFont("Helvetica", 10)
+    c.rect(0,0,w,30, fill=True)
+    c.setFillColorRGB(1,1,1)
+    c.drawString(phone_x, 12.5, COMPANY_PHONE)
+    c.drawString(website_x, 12.5, f"website : www.sampatticard.in          support : {support_email}")
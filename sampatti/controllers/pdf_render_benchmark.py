@@ -0,0 +1,56 @@
+import argparse, os, statistics, tempfile, time
+from contextlib import contextmanager
+from . import pdf_assets
+from .salary_slip_generation import render_salary_slip
+
+SAMPLE_WORKER = {"name": "Sample Worker", "accountNumber": "123456789012", "upi_id": "sample@upi", "ifsc": "SBIN0000001"}
+SAMPLE_ROWS = [
+    [1, "EMP-employer-1", "UPI", "412345678901", 12000, 500, 0],
+    [2, "EMP-employer-2", "UPI", "412345678902", 8000, 0, 250],
+]
+
+
+@contextmanager
+def logo_files():
+    """Draw the logo files themselves, as every document did before the shared assets"""
+    flat_logo, circular_logo = pdf_assets.flat_logo, pdf_assets.circular_logo
+    pdf_assets.flat_logo = lambda: os.path.join(os.getcwd(), 'logos/flat_logo.jpg')
+    pdf_assets.circular_logo = lambda: os.path.join(os.getcwd(), 'logos/circular_logo.png')
+    try:
+        yield
+    finally:
+        pdf_assets.flat_logo, pdf_assets.circular_logo = flat_logo, circular_logo
+
+
+def render_batch(slips: int, out_dir: str) -> list:
+    """Render a batch of slips and return the time each one took, in milliseconds"""
+    timings = []
+    for index in range(slips):
+        started = time.perf_counter()
+        render_salary_slip(SAMPLE_WORKER, SAMPLE_ROWS, 19750, "May", 2026, os.path.join(out_dir, f"slip_{index}.pdf"))
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(label: str, timings: list):
+    ordered = sorted(timings)
+    print(
+        f"{label}: {len(timings)} slips, mean {statistics.mean(timings):.2f}ms, "
+        f"median {statistics.median(timings):.2f}ms, p95 {ordered[int(len(ordered) * 0.95) - 1]:.2f}ms, "
+        f"total {sum(timings) / 1000:.2f}s"
+    )
+
+
+def main(slips: int):
+    with tempfile.TemporaryDirectory() as out_dir:
+        with logo_files():
+            summarize("logo files per document", render_batch(slips, out_dir))
+        summarize("shared pdf assets", render_batch(slips, out_dir))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-document salary slip render time.")
+    parser.add_argument("--slips", type=int, default=1000, help="Number of slips rendered per variant.")
+
+    args = parser.parse_args()
+    main(args.slips)
@@ -1,32 +1,42 @@
-import chromadb, os, argparse
+import chromadb, os, argparse, hashlib, time, uuid
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import textwrap, re
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings
+from .embedding_cache import cached_embeddings
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.chat_models import ChatOpenAI
+from .conversation_log import next_sequence
+from .lazy import build_once
 
 load_dotenv()
 openai_api_key = os.environ.get('OPENAI_API_KEY')
 
-chroma_client = chromadb.PersistentClient(path="../../chroma_db")
+@build_once
+def get_chroma_client():
+    return chromadb.PersistentClient(path="../../chroma_db")
 
 # llm = ChatOpenAI(name="gpt-4o-mini", api_key=openai_api_key)
 openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
-llm = ChatOpenAI(
+@build_once
+def get_llm():
+    return ChatOpenAI(
         model="openai/gpt-4o", 
         api_key=openrouter_api_key,
         base_url="https://openrouter.ai/api/v1"
-)
-embedding_model = OpenAIEmbeddings(model="text-embedding-3-large")
+    )
+@build_once
+def get_embedding_model():
+    return cached_embeddings(OpenAIEmbeddings(model="text-embedding-3-large"))
+EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', 100))
 
 def get_doc_collection():
-    doc_collection = chroma_client.get_or_create_collection(name="documents")
+    doc_collection = get_chroma_client().get_or_create_collection(name="documents")
     return doc_collection
 
 
 def get_convo_collection():
-    convo_collection = chroma_client.get_or_create_collection(name="conversations")
+    convo_collection = get_chroma_client().get_or_create_collection(name="conversations")
     return convo_collection
 
 
@@ -61,37 +71,99 @@ def split_text(documents):
     return text_splitter.split_documents(documents)
 
 
-def store_documents(chunks):
-    for i, chunk in enumerate(chunks):
-        embedding = embedding_model.embed_query(chunk.page_content)  # Convert text to vector
-        doc_collection = get_doc_collection()
+def chunk_id(chunk):
+    # content-hash ids make re-indexing idempotent: unchanged chunks keep the same id
+    source = chunk.metadata.get("source", "unknown")
+    digest = hashlib.sha256(f"{source}\x00{chunk.page_content}".encode("utf-8")).hexdigest()
+    return f"doc_{digest[:32]}"
+
+
+def store_documents(chunks, batch_size=EMBEDDING_BATCH_SIZE, prune_all=False):
+    start_time = time.monotonic()
+    doc_collection = get_doc_collection()
+
+    # the same text can repeat across overlapping chunks, keep the first occurrence of each id
+    unique_chunks = {}
+    for chunk in chunks:
+        unique_chunks.setdefault(chunk_id(chunk), chunk)
+    ids = list(unique_chunks.keys())
+
+    stored = 0
+    skipped = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        existing_ids = set(doc_collection.get(ids=batch_ids, include=[])["ids"])
+        new_ids = [id for id in batch_ids if id not in existing_ids]
+        skipped += len(batch_ids) - len(new_ids)
+
+        if not new_ids:
+            continue
+
+        texts = [unique_chunks[id].page_content for id in new_ids]
+        embeddings = get_embedding_model().embed_documents(texts)
         doc_collection.add(
-            ids=[f"doc_{i}"],  # Unique ID
-            embeddings=[embedding],
-            metadatas=[{"source": chunk.metadata.get("source", "unknown")}],
-            documents=[chunk.page_content]
+            ids=new_ids,
+            embeddings=embeddings,
+            metadatas=[{"source": unique_chunks[id].metadata.get("source", "unknown")} for id in new_ids],
+            documents=texts
         )
-
-    return {"response" : "The documents have been successfully stored."}
+        stored += len(new_ids)
+
+    # chunks of the documents loaded in this run that are not in this set (edited text, and the
+    # positional doc_0..doc_n ids of earlier indexing) are dropped. Documents that were not
+    # loaded (a PDF that failed, another directory) keep their chunks unless prune_all is set,
+    # which makes the collection mirror this run; an empty load never deletes anything
+    removed = 0
+    if ids:
+        current_ids = set(ids)
+        if prune_all:
+            indexed = doc_collection.get(include=[])
+        else:
+            sources = sorted({chunk.metadata.get("source", "unknown") for chunk in unique_chunks.values()})
+            indexed = doc_collection.get(where={"source": {"$in": sources}}, include=[])
+        stale_ids = [id for id in indexed["ids"] if id not in current_ids]
+        for start in range(0, len(stale_ids), batch_size):
+            doc_collection.delete(ids=stale_ids[start:start + batch_size])
+        removed = len(stale_ids)
+
+    elapsed = time.monotonic() - start_time
+    chunks_per_second = round(len(ids) / elapsed, 2) if elapsed > 0 else 0
+    print(f"Indexed {len(ids)} chunks ({stored} new, {skipped} unchanged, {removed} removed) in {elapsed:.2f}s, {chunks_per_second} chunks/second")
+
+    return {
+        "response" : "The documents have been successfully stored.",
+        "total_chunks": len(ids),
+        "stored": stored,
+        "skipped": skipped,
+        "removed": removed,
+        "chunks_per_second": chunks_per_second
+    }
 
 
 def store_conversation(employerNumber, message):
     convo_collection = get_convo_collection()
+    sequence = next_sequence("conversations", employerNumber)
     convo_collection.add(
-        ids=[f"conv_{employerNumber}_{len(convo_collection.get()['ids'])}"],
+        ids=[f"conv_{employerNumber}_{uuid.uuid4().hex}"],
         documents=[message],
-        metadatas=[{"employerNumber": employerNumber}]
+        metadatas=[{"employerNumber": employerNumber, "sequence": sequence}]
     )
 
 
 def get_conversation_history(employerNumber):
     convo_collection = get_convo_collection()
     results = convo_collection.get(where={"employerNumber": employerNumber})
-    return "\n".join(results["documents"]) if results["documents"] else ""
+    if not results["documents"]:
+        return ""
+
+    # entries written before sequences existed have none and keep their stored order
+    messages = list(zip(results["metadatas"], results["documents"]))
+    messages.sort(key=lambda x: (x[0] or {}).get("sequence", 0))
+    return "\n".join(document for _, document in messages)
 
 
 def get_relevant_documents(query):
-    query_embedding = embedding_model.embed_query(query)
+    query_embedding = get_embedding_model().embed_query(query)
     doc_collection = get_doc_collection()
     results = doc_collection.query(
         query_embeddings=[query_embedding],
@@ -132,7 +204,7 @@ Documents:
 User Query: {query}
 """
 
-    response = llm.predict(context)  # Call LLM for response
+    response = get_llm().predict(context)  # Call LLM for response
     store_conversation(employerNumber, f"User: {query}\nSystem: {response}")
 
     if response.startswith("System:"):
@@ -142,15 +214,17 @@ User Query: {query}
     return {"response": response}
 
 
-def main(data_path):
+def main(data_path, batch_size=EMBEDDING_BATCH_SIZE, prune_all=False):
 
     documents = load_documents(data_path)
     chunks = split_text(documents)
-    store_documents(chunks)
+    store_documents(chunks, batch_size, prune_all)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process documents for RAG pipeline.")
     parser.add_argument("data_path", type=str, help="Path to the document data.")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="Number of chunks embedded per request.")
+    parser.add_argument("--prune-all", action="store_true", help="Also delete chunks of documents that are not in data_path.")
     
     args = parser.parse_args()
-    main(args.data_path)
\ No newline at end of file
+    main(args.data_path, args.batch_size, args.prune_all)
\ No newline at end of file
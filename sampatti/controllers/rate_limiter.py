@@ -0,0 +1,64 @@
+import asyncio, threading, time
+
+
+# token bucket shared by the worker threads of a batch run.
+# rate is tokens per second, capacity is the allowed burst size.
+
+class TokenBucket:
+
+    def __init__(self, rate : float, capacity : int = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        # acquires that had to wait for a token: local pacing, not throttling by the provider
+        self.waits = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens : int = 1) -> bool:
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def _take(self, tokens : int, waited : bool) -> float:
+        # takes the tokens and returns 0, or returns how long to wait before trying again
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                if waited:
+                    self.waits += 1
+                return 0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens : int = 1):
+        waited = False
+        while True:
+            wait_for = self._take(tokens, waited)
+            if not wait_for:
+                return
+            waited = True
+            time.sleep(wait_for)
+
+    async def acquire_async(self, tokens : int = 1):
+        """acquire for coroutines: waits on the event loop instead of blocking it"""
+        waited = False
+        while True:
+            wait_for = self._take(tokens, waited)
+            if not wait_for:
+                return
+            waited = True
+            await asyncio.sleep(wait_for)
+
+
+def chunked(items, size : int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,137 @@
+import os, time, multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from .. import models
+from . import salary_slip_generation, uploading_files_to_spaces
+
+load_dotenv()
+SALARY_SLIP_PREFETCH_WORKERS = int(os.environ.get('SALARY_SLIP_PREFETCH_WORKERS', 8))
+SALARY_SLIP_RENDER_PROCESSES = int(os.environ.get('SALARY_SLIP_RENDER_PROCESSES', os.cpu_count() or 2))
+SALARY_SLIP_UPLOAD_WORKERS = int(os.environ.get('SALARY_SLIP_UPLOAD_WORKERS', 8))
+
+# a month's slips go through three stages:
+#   prefetch - one query for the workers and one for the month's SalaryDetails, then the
+#              Cashfree lookups for each worker's receipt rows on a thread pool
+#   render   - ReportLab drawing is CPU bound, so it runs in a process pool on plain values
+#   upload   - each slip is handed to the Spaces uploaders as soon as it is rendered
+# progress is kept per worker in SalarySlipProgress, so a rerun for the same month skips
+# uploaded slips and uploads rendered ones without drawing them again.
+
+
+def _save_progress(db: Session, worker_id: str, month: str, year: int, status: str, object_name: str = None, error: str = None):
+    db.merge(models.SalarySlipProgress(
+        id=f"{worker_id}_{month}_{year}",
+        worker_id=worker_id,
+        month=month,
+        year=year,
+        status=status,
+        objectName=object_name,
+        error=error,
+        updatedAt=time.time()
+    ))
+    db.commit()
+
+
+def _receipt(transactions):
+    try:
+        return salary_slip_generation.salary_slip_receipt(transactions)
+    except Exception as e:
+        return e
+
+
+def generate_salary_slips(
+    month: str,
+    year: int,
+    db: Session,
+    prefetch_workers: int = SALARY_SLIP_PREFETCH_WORKERS,
+    render_processes: int = SALARY_SLIP_RENDER_PROCESSES,
+    upload_workers: int = SALARY_SLIP_UPLOAD_WORKERS
+) -> dict:
+    """Render and upload the salary slips of every worker for a month, resuming an earlier run"""
+    started = time.perf_counter()
+    timings = {}
+
+    static_dir = os.path.join(os.getcwd(), 'static')
+    os.makedirs(static_dir, exist_ok=True)
+
+    progress = {row.worker_id: row.status for row in db.query(models.SalarySlipProgress.worker_id, models.SalarySlipProgress.status).filter(
+        models.SalarySlipProgress.month == month,
+        models.SalarySlipProgress.year == year
+    ).all()}
+
+    transactions = defaultdict(list)
+    for transaction in db.query(models.SalaryDetails).filter(models.SalaryDetails.month == month, models.SalaryDetails.year == year).all():
+        transactions[transaction.worker_id].append(transaction)
+
+    # plain values only from here on: the progress commits below expire the ORM objects
+    slips = {}
+    for worker in db.query(models.Domestic_Worker).all():
+        if progress.get(worker.id) == "uploaded":
+            continue
+        slips[worker.id] = {
+            "details": salary_slip_generation.slip_worker_details(worker),
+            "pdf_path": os.path.join(static_dir, f"{worker.id}_SS_{month}_{year}.pdf"),
+            "object_name": f"salarySlips/{worker.workerNumber}_SS_{month}_{year}.pdf",
+        }
+
+    rendered = [worker_id for worker_id, slip in slips.items() if progress.get(worker_id) == "rendered" and os.path.exists(slip["pdf_path"])]
+    to_render = [worker_id for worker_id in slips if worker_id not in rendered]
+
+    with ThreadPoolExecutor(max_workers=prefetch_workers) as executor:
+        receipts = dict(zip(to_render, executor.map(lambda worker_id: _receipt(transactions.get(worker_id, [])), to_render)))
+    timings["prefetch_seconds"] = round(time.perf_counter() - started, 2)
+
+    summary = {"month": month, "year": year, "already_uploaded": len([status for status in progress.values() if status == "uploaded"]), "uploaded": 0, "failed": 0}
+    render_started = time.perf_counter()
+
+    # spawned, not forked: a fork copies locks held by the app's other threads (dispatcher, queue
+    # heartbeats) and its open db connections into the renderers; render_salary_slip is a
+    # module-level function on plain values, so the spawned processes only need to import it
+    render_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=render_processes, mp_context=render_context) as renderer, ThreadPoolExecutor(max_workers=upload_workers) as uploader:
+        render_futures = {}
+        for worker_id in to_render:
+            receipt = receipts[worker_id]
+            if isinstance(receipt, Exception):
+                print(f"Salary slip prefetch failed for worker {worker_id}: {receipt}")
+                _save_progress(db, worker_id, month, year, "failed", error=f"prefetch: {receipt}")
+                summary["failed"] += 1
+                continue
+            receipt_rows, total_amount = receipt
+            slip = slips[worker_id]
+            render_futures[renderer.submit(salary_slip_generation.render_salary_slip, slip["details"], receipt_rows, total_amount, month, year, slip["pdf_path"])] = worker_id
+
+        upload_futures = {uploader.submit(uploading_files_to_spaces.upload_file_to_spaces, slips[worker_id]["pdf_path"], slips[worker_id]["object_name"]): worker_id for worker_id in rendered}
+
+        for future in as_completed(render_futures):
+            worker_id = render_futures[future]
+            try:
+                pdf_path = future.result()
+            except Exception as e:
+                print(f"Salary slip render failed for worker {worker_id}: {e}")
+                _save_progress(db, worker_id, month, year, "failed", error=f"render: {e}")
+                summary["failed"] += 1
+                continue
+            _save_progress(db, worker_id, month, year, "rendered")
+            upload_futures[uploader.submit(uploading_files_to_spaces.upload_file_to_spaces, pdf_path, slips[worker_id]["object_name"])] = worker_id
+        timings["render_seconds"] = round(time.perf_counter() - render_started, 2)
+
+        for future in as_completed(upload_futures):
+            worker_id = upload_futures[future]
+            # upload_file_to_spaces logs its own errors and returns None
+            object_name = future.result()
+            if object_name is None:
+                _save_progress(db, worker_id, month, year, "rendered", error="upload failed")
+                summary["failed"] += 1
+            else:
+                _save_progress(db, worker_id, month, year, "uploaded", object_name=object_name)
+                summary["uploaded"] += 1
+        # uploads overlap rendering, so this is the time from the first render to the last upload
+        timings["upload_seconds"] = round(time.perf_counter() - render_started, 2)
+
+    timings["total_seconds"] = round(time.perf_counter() - started, 2)
+    summary["timings"] = timings
+    print("Salary slip batch summary: ", summary)
+    return summary
@@ -1,14 +1,14 @@
 import os
 from fastapi import HTTPException
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
 from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
+from reportlab.platypus import Table
 from textwrap import wrap
 from sqlalchemy.orm import Session
 from .. import models
 from .cashfree_api import check_order_status, fetch_bank_ref
 from .utility_functions import current_date,amount_to_words
+from . import pdf_assets
 
 
 def generate_salary_slip(workerNumber, month, year, db:Session) :
@@ -21,86 +21,32 @@ def generate_salary_slip(workerNumber, month, year, db:Session) :
     static_dir = os.path.join(os.getcwd(), 'static')
     pdf_path = os.path.join(static_dir, f"{worker.id}_SS_{month}_{year}.pdf")
 
-    if not os.path.exists('static'):
-        os.makedirs('static')
-    w, h = A4
-    c = canvas.Canvas(pdf_path, pagesize=A4)
+    total_transactions = db.query(models.SalaryDetails).filter(models.SalaryDetails.worker_id == worker.id, models.SalaryDetails.month == month, models.SalaryDetails.year == year).all()
     
-    flat_logo = os.path.join(os.getcwd(), 'logos/flat_logo.jpg')
-    circular_logo = os.path.join(os.getcwd(), 'logos/circular_logo.png')
-
-    c.setFont("Helvetica-Bold", 18)
-
-    c.setFillColorRGB(0.078, 0.33, 0.45)
-    c.drawImage(flat_logo, w-120, h-55, width=100, height=45)
-    text = "Propublica Finance and Investment Services Pvt. Ltd."
-    size = len(text)
-    c.drawString(w/2 - size*4.5, h-80, text=text)
-
-    x = 30
-    y = h - 110
-
-    c.setFont("Helvetica", 14)
-
-    cin = "CIN : 20369785412547852"
-    udyam = "Udyam Registration Number : UDYAM-5689-120356"
-
-    c.drawString(w/2 - size*3, y, cin)
-    y -= 20
-    c.drawString(w/2 - size*3, y, udyam)
-
-    y -= 40
-    c.setFont("Helvetica-Bold", 14)
-    size = len("Salary Record")
-    c.drawString(w/2-size*5, y, "Salary Record") 
-
-    c.setFont("Times-Roman", 10)
-
-    if worker.accountNumber is None or worker.accountNumber == "":
-        worker.accountNumber = "NA"
-
-    if worker.upi_id is None or worker.upi_id == "":
-        worker.upi_id = "NA"
-
-    if worker.ifsc is None or worker.ifsc == "":
-        worker.ifsc = "NA"
-
-        
-    worker_data = [
-        [f"Name of the Employee : {worker.name}", "PF Number : NA"],
-        ["Nature of Work : Domestic Help", f"Account Number : {worker.accountNumber}"],
-        ["Bank Name : NA", f"IFSC Code : {worker.ifsc}"],
-        ["ESI Number : NA", f"UPI ID : {worker.upi_id}"]
-    ]
+    print("Month :", month)
+    print("worker number :", worker.workerNumber)
+    print("worker id :", worker.id)
 
-    worker_style = TableStyle([
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.Color(0.078, 0.33, 0.45)),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0,0), (-1,-1), 100),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica')
-    ])
+    receipt_rows, total_amount = salary_slip_receipt(total_transactions)
+    render_salary_slip(slip_worker_details(worker), receipt_rows, total_amount, month, year, pdf_path)
 
 
-    worker_table = Table(worker_data)
-    worker_table.setStyle(worker_style)
-    m,n = worker_table.wrapOn(c,0,0)
-    y -= 135
-    worker_table.drawOn(c,x, y)
+def slip_worker_details(worker) -> dict:
+    """Plain copy of the worker fields printed on the slip, so rendering needs no session"""
+    return {
+        "name": worker.name,
+        "accountNumber": worker.accountNumber or "NA",
+        "upi_id": worker.upi_id or "NA",
+        "ifsc": worker.ifsc or "NA",
+    }
 
-    receipt_data = []
-    receipt_data.append(["Sr. No.", "Employer Code", "Mode", "Reference", "Salary", "Variable Pay", "Deductions"])
-
-    rows = 0
 
-    total_transactions = db.query(models.SalaryDetails).filter(models.SalaryDetails.worker_id == worker.id, models.SalaryDetails.month == month, models.SalaryDetails.year == year).all()
+def salary_slip_receipt(total_transactions):
+    """Rows for the PAID transactions of the month and their total, looked up on Cashfree"""
+    receipt_rows = []
     total_amount = 0
-    
+
     print("Total Transactions :", total_transactions)
-    print("Month :", month)
-    print("worker number :", worker.workerNumber)
-    print("worker id :", worker.id)
     print("worker salary details count :", len(total_transactions))
     
     ct = 1
@@ -133,28 +79,58 @@ def generate_salary_slip(workerNumber, month, year, db:Session) :
                 deduction = salary - order_amount
 
             single_row = [ct, f"EMP-{employer_id}", "UPI", bank_ref_no, salary, variablePay, deduction]
-            receipt_data.append(single_row)
-            rows += 1
+            receipt_rows.append(single_row)
             ct += 1
             total_amount += order_amount
 
         else:
             continue
 
-    receipt_style = TableStyle([
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.Color(0.078, 0.33, 0.45)),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),  
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('RIGHTPADDING', (0,0), (-1,-1), 10),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ])
+    return receipt_rows, total_amount
+
+
+SLIP_NOTE = """NOTE : This is a digitally issued salary slip and does not require attestation.
+The money has been debited in the corresponding bank account."""
+
+SLIP_DECLARATION = """Declaration : The transaction trail is verified with an employment agreement between the employer and the 
+employee basis which the salary slip is issued. Propublica Finance and Investment Services Pvt. Ltd. is not the 
+employer for the worker for whom salary record is generated."""
+
+
+def render_salary_slip(worker : dict, receipt_rows, total_amount, month, year, pdf_path) :
+    """Draw the slip PDF; takes only plain values so it can run in a worker process"""
+
+    if not os.path.exists('static'):
+        os.makedirs('static')
+    w, h = A4
+    c = canvas.Canvas(pdf_path, pagesize=A4)
+
+    x = 30
+    y = pdf_assets.draw_company_header(c, w, h, "Salary Record")
+
+    c.setFont("Times-Roman", 10)
+
+    worker_data = [
+        [f"Name of the Employee : {worker['name']}", "PF Number : NA"],
+        ["Nature of Work : Domestic Help", f"Account Number : {worker['accountNumber']}"],
+        ["Bank Name : NA", f"IFSC Code : {worker['ifsc']}"],
+        ["ESI Number : NA", f"UPI ID : {worker['upi_id']}"]
+    ]
+
+    worker_table = Table(worker_data)
+    worker_table.setStyle(pdf_assets.WORKER_TABLE_STYLE)
+    m,n = worker_table.wrapOn(c,0,0)
+    y -= 135
+    worker_table.drawOn(c,x, y)
+
+    receipt_data = []
+    receipt_data.append(["Sr. No.", "Employer Code", "Mode", "Reference", "Salary", "Variable Pay", "Deductions"])
+    receipt_data.extend(receipt_rows)
+    rows = len(receipt_rows)
 
     y = y - rows*25 - 70
     receipt_table = Table(receipt_data)
-    receipt_table.setStyle(receipt_style)
+    receipt_table.setStyle(pdf_assets.RECEIPT_TABLE_STYLE)
     receipt_table.wrapOn(c, 0, 0)
     receipt_table.drawOn(c, x, y)
 
@@ -168,37 +144,11 @@ def generate_salary_slip(workerNumber, month, year, db:Session) :
     salary_in_words = amount_to_words(total_amount)
     c.drawString(x, y, f"Total amount Credited : INR {total_amount}/- Only")
     c.drawString(x, y-20, f"Amount in Words : {salary_in_words} Only")
-          
-
-    note = """NOTE : This is a digitally issued salary slip and does not require attestation.
-The money has been debited in the corresponding bank account."""
-    lines = note.split('\n')
-    c.setFont("Helvetica", 8)
 
-    y = 110
-    for line in lines:
-        c.drawString(x+20, y, line)
-        y -= 10
-
-    y -= 10
-
-    c.drawImage(circular_logo, 15, y-20 , 30, 30)
-
-    declaration = """Declaration : The transaction trail is verified with an employment agreement between the employer and the 
-employee basis which the salary slip is issued. Propublica Finance and Investment Services Pvt. Ltd. is not the 
-employer for the worker for whom salary record is generated."""
-
-    lines = declaration.split('\n')
-    for line in lines:
-        c.drawString(x+20, y, line)
-        y -= 10
-
-
-    c.setFont("Helvetica", 10)
-    c.rect(0,0,w,30, fill=True)
-    c.setFillColorRGB(1,1,1)
-    c.drawString(x+20, 12.5, "Phone : +91 86603 52558")
-    c.drawString(x+ 170, 12.5, "website : www.sampatticard.in          support : support@sampatticard.in")
+    pdf_assets.draw_note_and_declaration(c, x+20, SLIP_NOTE, SLIP_DECLARATION)
+    pdf_assets.draw_contact_bar(c, w, x+20, x+170)
 
     c.showPage()
-    c.save()
\ No newline at end of file
+    c.save()
+
+    return pdf_path
@@ -1,26 +1,25 @@
 import os
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
 from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
+from reportlab.platypus import Table
 from datetime import datetime
 from sqlalchemy.orm import Session
 from ..models import Employer, Domestic_Worker, SalaryDetails, worker_employer
 from sqlalchemy import Integer, String, func, desc
+from . import pdf_assets
 
 def draw_header(c, w, h, employer_id, employer_phone, total_workers):
     
-    flat_logo = os.path.join(os.getcwd(), 'logos/flat_logo.jpg')
     c.setFont("Helvetica-Bold", 16)
-    c.setFillColorRGB(0.078, 0.33, 0.45)
-    c.drawImage(flat_logo, w-110, h-45, width=100, height=45)
+    c.setFillColorRGB(*pdf_assets.BRAND_RGB)
+    c.drawImage(pdf_assets.flat_logo(), w-110, h-45, width=100, height=45)
     
     c.setFont("Helvetica-Bold", 16)
-    c.drawCentredString(w/2, h-60, "Propublica Finance and Investment Services Pvt. Ltd.")
+    c.drawCentredString(w/2, h-60, pdf_assets.COMPANY_NAME)
     
     c.setFont("Helvetica", 10)
-    c.drawCentredString(w/2, h-75, "CIN : 20369785412547852")
-    c.drawCentredString(w/2, h-90, "Udyam Registration Number : UDYAM-5689-120356")
+    c.drawCentredString(w/2, h-75, pdf_assets.COMPANY_CIN)
+    c.drawCentredString(w/2, h-90, pdf_assets.COMPANY_UDYAM)
     
     c.setFont("Helvetica-Bold", 14)
     c.drawCentredString(w/2, h-110, "Salary Payment Report")
@@ -65,19 +64,14 @@ def draw_footer(c, w, h):
 salary record is issued. Propublica Finance and Investment Services Pvt. Ltd. is not the employer for the worker for whom salary record is generated."""
     
     # Draw logos and text
-    circular_logo = os.path.join(os.getcwd(), 'logos/circular_logo.png')
-    c.drawImage(circular_logo, 15, footer_y-10, 30, 30)
+    c.drawImage(pdf_assets.circular_logo(), 15, footer_y-10, 30, 30)
     
     lines = declaration.split('\n')
     for line in lines:
         c.drawString(x+30, footer_y, line)
         footer_y -= 10
     
-    c.setFont("Helvetica", 10)
-    c.rect(0, 0, w, 30, fill=True)
-    c.setFillColorRGB(1, 1, 1)
-    c.drawString(x+20, 12.5, "Phone : +91 86603 52558")
-    c.drawString(x+170, 12.5, "website : www.sampatticard.in          support : vrashali@sampatticard.in")
+    pdf_assets.draw_contact_bar(c, w, x+20, x+170, support_email="vrashali@sampatticard.in")
 
 def generate_salary_records_all_worker(employerNumber: int, db: Session):
     # Create output directory
@@ -126,19 +120,6 @@ def generate_salary_records_all_worker(employerNumber: int, db: Session):
         
         current_y = draw_header(c, w, h, f"{employer.id}", employer.employerNumber, total_workers)
         
-        table_style = [
-            ('TEXTCOLOR', (0,0), (-1,-1), colors.Color(0.078, 0.33, 0.45)),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-            ('FONTSIZE', (0,0), (-1,-1), 8),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),    # HEADER bold
-            ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),  # TOTAL row bold
-            ('BACKGROUND', (0,0), (-1,0), colors.white),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.Color(0.078, 0.33, 0.45)),
-            ('GRID', (0,0), (-1,-1), 1, colors.Color(0.078, 0.33, 0.45))
-        ]
-        
         i = 1
         for worker_index, worker in enumerate(workers):
             # Query salary details by worker_id and employer_id
@@ -231,7 +212,7 @@ def generate_salary_records_all_worker(employerNumber: int, db: Session):
             
             col_widths = [40, 80, 60,60, 60, 60, 60, 60, 60]
             table = Table(table_data, colWidths=col_widths, repeatRows=1)
-            table.setStyle(TableStyle(table_style))
+            table.setStyle(pdf_assets.SUMMARY_TABLE_STYLE)
             
             table.wrapOn(c, w-60, h)
             table_height = table._height
@@ -330,19 +311,6 @@ def generate_salary_record(employerNumber: int, workerName: str, db: Session):
         c = canvas.Canvas(pdf_path, pagesize=A4)
         current_y = draw_header(c, w, h, employer.id, employer.employerNumber, 1)
 
-        table_style = [
-            ('TEXTCOLOR', (0,0), (-1,-1), colors.Color(0.078, 0.33, 0.45)),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-            ('FONTSIZE', (0,0), (-1,-1), 8),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),    # HEADER bold
-            ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),  # TOTAL row bold
-            ('BACKGROUND', (0,0), (-1,0), colors.white),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.Color(0.078, 0.33, 0.45)),
-            ('GRID', (0,0), (-1,-1), 1, colors.Color(0.078, 0.33, 0.45))
-        ]
-
         table_data = [
                 ["Sr. No.", "Month", "Salary", "Bonus", "Deduction",
                  "Advance", "Repayment", "Attendance", "Salary Paid"]
@@ -380,7 +348,7 @@ def generate_salary_record(employerNumber: int, workerName: str, db: Session):
 
         col_widths = [40, 80, 60, 60, 60, 60, 60, 60, 60]
         table = Table(table_data, colWidths=col_widths, repeatRows=1)
-        table.setStyle(table_style)
+        table.setStyle(pdf_assets.SUMMARY_TABLE_STYLE)
 
         table.wrapOn(c, w - 60, h)
         table_height = table._height
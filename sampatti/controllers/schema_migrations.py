@@ -0,0 +1,133 @@
+import argparse, sys, time
+from typing import Callable, List, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from .. import models
+from ..database import engine as default_engine
+
+# create_all only creates missing tables, so changes to existing tables (indexes,
+# columns) ship as numbered migrations. Append new ones; never renumber.
+
+
+def _create_indexes(*names: str) -> Callable[[Connection], None]:
+    def migrate(conn: Connection):
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in names:
+                    index.create(conn, checkfirst=True)
+    return migrate
+
+
+def _add_columns(table_name: str, *columns: str) -> Callable[[Connection], None]:
+    def migrate(conn: Connection):
+        if not inspect(conn).has_table(table_name):
+            return  # create_all builds it with every column
+        existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+        for column in models.Base.metadata.tables[table_name].columns:
+            if column.name in columns and column.name not in existing:
+                conn.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN "{column.name}" {column.type.compile(conn.dialect)}'))
+    return migrate
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "hot lookup indexes", _create_indexes(
+        "ix_worker_employer_employer_worker_name",
+        "ix_worker_employer_worker_employer_id",
+        "ix_worker_employer_order_id",
+        "ix_domestic_worker_worker_number",
+        "ix_employer_employer_number",
+        "ix_employer_referral_code",
+        "ix_salary_details_worker_month_year",
+        "ix_attendance_records_worker_employer_year_month",
+        "ix_cash_advance_record_worker_employer",
+        "ix_cash_advance_management_worker_employer",
+        "ix_cash_advance_management_order_id",
+        "ix_salary_management_records_order_id",
+    )),
+    (2, "payment event retry time", _add_columns("PaymentEvent", "retryAt")),
+]
+
+# the lookups every webhook, agent tool and cron job runs; none of them may scan its table
+HOT_QUERIES = {
+    "employer by number": ("SELECT * FROM Employer WHERE employerNumber = :n", {"n": 0}),
+    "employer by referral code": ("SELECT * FROM Employer WHERE referralCode = :c", {"c": ""}),
+    "worker by number": ("SELECT * FROM Domestic_Worker WHERE workerNumber = :n", {"n": 0}),
+    "workers of employer": ("SELECT * FROM worker_employer WHERE employer_number = :n", {"n": 0}),
+    "worker of employer by name": ("SELECT * FROM worker_employer WHERE employer_number = :n AND worker_name = :name", {"n": 0, "name": ""}),
+    "relation by worker and employer id": ("SELECT * FROM worker_employer WHERE worker_id = :w AND employer_id = :e", {"w": "", "e": ""}),
+    "relation by order id": ("SELECT * FROM worker_employer WHERE order_id = :o", {"o": ""}),
+    "salary details of month": ("SELECT * FROM SalaryDetails WHERE worker_id = :w AND month = :m AND year = :y", {"w": "", "m": "", "y": 0}),
+    "attendance of month": ("SELECT * FROM Attendance_Records WHERE worker_id = :w AND employer_id = :e AND year = :y AND month = :m", {"w": "", "e": "", "y": 0, "m": 0}),
+    "cash advances of relation": ("SELECT * FROM CashAdvanceRecord WHERE worker_id = :w AND employer_id = :e", {"w": "", "e": ""}),
+    "cash advance management of relation": ("SELECT * FROM CashAdvanceManagement WHERE worker_id = :w AND employer_id = :e", {"w": "", "e": ""}),
+    "cash advance by order id": ("SELECT * FROM CashAdvanceManagement WHERE order_id = :o", {"o": ""}),
+    "salary record by order id": ("SELECT * FROM SalaryManagementRecords WHERE order_id = :o", {"o": ""}),
+}
+
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at FLOAT NOT NULL)"
+    ))
+
+
+def current_version(engine: Engine = default_engine) -> int:
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def run_migrations(engine: Engine = default_engine) -> List[int]:
+    """Apply pending migrations in order, each in its own transaction, and return the applied versions"""
+    applied = []
+    done = current_version(engine)
+    for version, name, migrate in sorted(MIGRATIONS, key=lambda migration: migration[0]):
+        if version <= done:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": time.time()}
+            )
+        print(f"Applied migration {version}: {name}")
+        applied.append(version)
+    return applied
+
+
+def migrate(engine: Engine = default_engine) -> int:
+    """Full schema step for deploys: create missing tables, then apply pending migrations"""
+    models.Base.metadata.create_all(engine)
+    run_migrations(engine)
+    return current_version(engine)
+
+
+def check_query_plans(engine: Engine = default_engine) -> List[str]:
+    """Return the hot queries whose SQLite plan scans a table instead of searching an index"""
+    if engine.dialect.name != "sqlite":
+        print(f"Query plan check only supports SQLite, skipping for {engine.dialect.name}")
+        return []
+
+    failures = []
+    with engine.connect() as conn:
+        for name, (sql, params) in HOT_QUERIES.items():
+            plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)]
+            # "SCAN <table>" without an index is a full table scan; "SEARCH ... USING INDEX" is fine
+            scans = [detail for detail in plan if detail.startswith("SCAN") and "INDEX" not in detail]
+            if scans:
+                failures.append(f"{name}: {'; '.join(scans)}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations and check hot query plans.")
+    parser.add_argument("--check-plans", action="store_true", help="Fail if a hot query does a full table scan.")
+
+    args = parser.parse_args()
+    print(f"Schema version: {migrate()}")
+
+    if args.check_plans:
+        failures = check_query_plans()
+        for failure in failures:
+            print(f"Full table scan: {failure}")
+        sys.exit(1 if failures else 0)
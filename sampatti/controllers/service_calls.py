@@ -0,0 +1,201 @@
+import json, os, time
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Tuple
+import requests
+from requests.structures import CaseInsensitiveDict
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from . import http_client
+from .tool_session import get_tool_db, release_tool_db
+
+load_dotenv()
+SERVICE_BASE_URL = os.environ.get("SERVICE_BASE_URL", "https://conv.sampatticards.com")
+
+# "auto" runs calls in-process once this process has marked itself as part of the
+# service (the API app and the webhook queue consumers do); "http" and "in_process" force a mode.
+SERVICE_CALL_MODE = os.environ.get("SERVICE_CALL_MODE", "auto").lower()
+SERVICE_CALL_RETRIES = int(os.environ.get("SERVICE_CALL_RETRIES", 3))
+SERVICE_CALL_BACKOFF = float(os.environ.get("SERVICE_CALL_BACKOFF", 0.5))
+
+# the shared client retries 429 and 5xx with backoff for idempotent methods only. POSTs are
+# retried here on 429 and 503, which turn the request away before the endpoint runs; not on
+# 502 or 504, which can come after it ran (an audio message sent, a sheet row added).
+POST_RETRY_STATUS_CODES = (429, 503)
+
+_in_service = False
+
+
+def mark_in_service():
+    """Called at startup by processes that run the API code and can reach its database"""
+    global _in_service
+    _in_service = True
+
+
+def in_process() -> bool:
+    if SERVICE_CALL_MODE == "in_process":
+        return True
+    if SERVICE_CALL_MODE == "http":
+        return False
+    return _in_service
+
+
+class ServiceResponse:
+    """Stands in for the requests.Response of an HTTP call when the call is answered in-process"""
+
+    def __init__(self, status_code: int, data: Any, url: str):
+        self.status_code = status_code
+        self.data = data
+        self.url = url
+        self.headers = CaseInsensitiveDict({"content-type": "application/json"})
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def reason(self) -> str:
+        return HTTPStatus(self.status_code).phrase
+
+    def json(self):
+        return self.data
+
+    @property
+    def text(self) -> str:
+        return json.dumps(self.data)
+
+    @property
+    def content(self) -> bytes:
+        # an endpoint returning None answers with an empty body over HTTP
+        return b"" if self.data is None else self.text.encode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for in-process call: {self.url}", response=self)
+
+
+def _with_db(handler: Callable) -> Callable:
+    def run(params: Dict[str, Any], body: Dict[str, Any]):
+        db = get_tool_db()
+        try:
+            return handler(params, body, db)
+        finally:
+            release_tool_db(db)
+    return run
+
+
+def _check_worker(params, body, db):
+    from .userControllers import check_worker
+    return check_worker(int(params["workerNumber"]), db)
+
+
+def _send_audio_message(params, body):
+    from .userControllers import send_audio_message
+    return send_audio_message(params["text"], params["user_language"], int(params["employerNumber"]))
+
+
+def _update_salary(params, body, db):
+    from .userControllers import update_worker_salary
+    return update_worker_salary(int(params["employerNumber"]), params["workerName"], int(params["salary"]), db)
+
+
+def _rag_process_query(params, body):
+    from .rag_funcs import get_response
+    return get_response(str(params["employerNumber"]), params["query"])
+
+
+def _onboarding_worker_sheet(params, body):
+    from .talk_to_agent_excel_file import create_worker_details_onboarding
+    return create_worker_details_onboarding(
+        int(body["worker_number"]),
+        int(body["employer_number"]),
+        body.get("UPI") or "",
+        body.get("bank_account_number") or "",
+        body.get("ifsc_code") or "",
+        body["pan_number"],
+        body.get("bank_passbook_image") or "",
+        body.get("pan_card_image") or "",
+        int(body["salary"]),
+        body.get("referral_code") or ""
+    )
+
+
+def _pan_verification(params, body):
+    from .cashfree_api import pan_verification
+    return pan_verification(params["pan"], params["name"])
+
+
+def _cash_advance_link(params, body, db):
+    from .cashfree_api import cash_advance_link
+    return cash_advance_link(
+        int(params["employerNumber"]),
+        params["workerName"],
+        int(params["cash_advance"]),
+        int(params["repayment_amount"]),
+        int(params["monthly_salary"]),
+        int(params["bonus"]),
+        int(params["deduction"]),
+        params.get("repayment_start_month"),
+        params.get("repayment_start_year"),
+        int(params.get("frequency", 1)),
+        int(params.get("attendance", 30)),
+        db,
+    )
+
+
+# (method, path) -> handler(params, body), mirroring the router endpoint of the same path
+LOCAL_ROUTES: Dict[Tuple[str, str], Callable] = {
+    ("GET", "/user/check_worker"): _with_db(_check_worker),
+    ("POST", "/user/send_audio_message"): _send_audio_message,
+    ("PUT", "/user/update_salary"): _with_db(_update_salary),
+    ("POST", "/user/rag_process_query"): _rag_process_query,
+    ("POST", "/user/ai_agent/onboarding_worker_sheet/create"): _onboarding_worker_sheet,
+    ("GET", "/cashfree/pan_verification"): _pan_verification,
+    ("GET", "/cashfree/cash_advance_link"): _with_db(_cash_advance_link),
+}
+
+
+def _retry_delay(response, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return SERVICE_CALL_BACKOFF * 2 ** attempt
+
+
+def _http_call(method: str, path: str, params, json_body) -> requests.Response:
+    from ..routers.auth import get_auth_headers
+    for attempt in range(SERVICE_CALL_RETRIES + 1):
+        response = http_client.request(method, f"{SERVICE_BASE_URL}{path}", params=params, json=json_body, headers=get_auth_headers())
+        if method != "POST" or response.status_code not in POST_RETRY_STATUS_CODES or attempt == SERVICE_CALL_RETRIES:
+            return response
+        print(f"{method} {path} answered {response.status_code}, retrying")
+        time.sleep(_retry_delay(response, attempt))
+
+
+def call(method: str, path: str, params: Optional[Dict[str, Any]] = None, json_body: Optional[Dict[str, Any]] = None):
+    """Call an endpoint of this service, in-process when possible and over HTTPS otherwise"""
+    method = method.upper()
+    handler = LOCAL_ROUTES.get((method, path))
+
+    if handler is None or not in_process():
+        return _http_call(method, path, params, json_body)
+
+    try:
+        return ServiceResponse(200, jsonable_encoder(handler(params or {}, json_body or {})), path)
+    except HTTPException as e:
+        return ServiceResponse(e.status_code, {"detail": e.detail}, path)
+    except Exception as e:
+        print(f"In-process call to {method} {path} failed: {e}")
+        return ServiceResponse(500, {"detail": str(e)}, path)
+
+
+def get(path: str, params: Optional[Dict[str, Any]] = None):
+    return call("GET", path, params=params)
+
+
+def post(path: str, params: Optional[Dict[str, Any]] = None, json_body: Optional[Dict[str, Any]] = None):
+    return call("POST", path, params=params, json_body=json_body)
+
+
+def put(path: str, params: Optional[Dict[str, Any]] = None):
+    return call("PUT", path, params=params)
@@ -0,0 +1,169 @@
+import hashlib, time
+from typing import Any, Dict, List, Optional, Tuple
+from gspread.utils import rowcol_to_a1
+from .. import models
+from ..database import get_db_session
+
+
+class SheetWatermark:
+    """Rows a task has finished with, by row id and content hash (SheetRowWatermark).
+
+    An incremental session only hands the task rows that are new or changed since then,
+    and rows the task kept open. With incremental off every row is processed and the
+    watermarks are written afresh.
+    """
+
+    def __init__(self, sheet_name: str, task: str, incremental: bool = True):
+        self.sheet_name = sheet_name
+        self.task = task
+        self.incremental = incremental
+        self.hashes: Dict[str, str] = {}
+        if incremental:
+            with get_db_session() as db:
+                self.hashes = {row.rowId: row.rowHash for row in db.query(models.SheetRowWatermark.rowId, models.SheetRowWatermark.rowHash).filter(
+                    models.SheetRowWatermark.sheet == sheet_name,
+                    models.SheetRowWatermark.task == task
+                ).all()}
+
+    def is_current(self, row_id: str, row_hash: str) -> bool:
+        return self.hashes.get(row_id) == row_hash
+
+    def save(self, hashes: Dict[str, str]):
+        changed = {row_id: row_hash for row_id, row_hash in hashes.items() if self.hashes.get(row_id) != row_hash}
+        if not changed:
+            return
+        now = time.time()
+        with get_db_session() as db:
+            existing = {row.rowId: row for row in db.query(models.SheetRowWatermark).filter(
+                models.SheetRowWatermark.sheet == self.sheet_name,
+                models.SheetRowWatermark.task == self.task
+            ).all()}
+            for row_id, row_hash in changed.items():
+                row = existing.get(row_id)
+                if row is None:
+                    db.add(models.SheetRowWatermark(sheet=self.sheet_name, task=self.task, rowId=row_id, rowHash=row_hash, processedAt=now))
+                else:
+                    row.rowHash = row_hash
+                    row.processedAt = now
+            db.commit()
+        self.hashes.update(changed)
+
+
+class SheetSyncSession:
+    """One sync pass over a worksheet.
+
+    The header, the records and the raw row values are read once when the session
+    starts. Cell changes are kept in memory and written with a single batch_update
+    when the session is flushed, or only reported when dry_run is set.
+    """
+
+    def __init__(self, sheet, dry_run: bool = False, watermark: Optional[SheetWatermark] = None):
+        self.sheet = sheet
+        self.dry_run = dry_run
+        self.watermark = watermark
+        # records keep gspread's numeric conversion the sync code relies on;
+        # raw values keep the cells as shown (e.g. leading zeros) for copying rows
+        self.records: List[Dict[str, Any]] = sheet.get_all_records()
+        values = sheet.get_all_values()
+        self.header: List[str] = values[0] if values else []
+        self.values: List[List[str]] = values[1:]
+        self.pending: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        # every change flushed by this session, written or (in a dry run) only reported
+        self.changes: List[Dict[str, Any]] = []
+        # rows handed to the task, and those it is still waiting on (not watermarked)
+        self.visited: List[int] = []
+        self.open_rows = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # what was changed before an error is still written, as the per-cell updates were
+        self.flush()
+        # after an error the rows are left as they were, to be processed again next run
+        if self.watermark and exc_type is None and not self.dry_run:
+            self.watermark.save({self.row_id(idx): self.row_hash(idx) for idx in self.visited if idx not in self.open_rows})
+        if self.watermark:
+            print(f"'{self.watermark.task}' processed {len(self.visited)} of {len(self.records)} rows, {len(self.open_rows)} kept open")
+        return False
+
+    def rows(self):
+        """(sheet row index, record) pairs; the header is row 1.
+
+        With a watermark, rows unchanged since the task last finished with them are skipped.
+        """
+        for idx, record in enumerate(self.records, start=2):
+            if self.watermark and self.watermark.is_current(self.row_id(idx), self.row_hash(idx)):
+                continue
+            self.visited.append(idx)
+            yield idx, record
+
+    def keep_open(self, row_index: int):
+        """The task is not done with the row (e.g. waiting on Cashfree), so it is processed again next run"""
+        self.open_rows.add(row_index)
+
+    def row_id(self, row_index: int) -> str:
+        row_id = str(self.records[row_index - 2].get("id", "")).strip()
+        return row_id or f"row-{row_index}"
+
+    def row_hash(self, row_index: int) -> str:
+        cells = [str(value) for value in self.values[row_index - 2]]
+        while cells and cells[-1] == "":
+            cells.pop()
+        return hashlib.sha1("\x1f".join(cells).encode()).hexdigest()
+
+    def column_index(self, column_name: str) -> Optional[int]:
+        try:
+            return self.header.index(column_name) + 1
+        except ValueError:
+            return None
+
+    def update(self, row_index: int, column_name: str, new_value):
+        col_index = self.column_index(column_name)
+        if col_index is None:
+            print(f"Column '{column_name}' not found in sheet.")
+            return
+
+        record = self.records[row_index - 2]
+        key = (row_index, col_index)
+        old_value = self.pending[key]["old"] if key in self.pending else record.get(column_name, "")
+        if str(old_value) == str(new_value):
+            self.pending.pop(key, None)
+        else:
+            self.pending[key] = {"row": row_index, "column": column_name, "old": old_value, "new": new_value}
+
+        record[column_name] = new_value
+        row = self.values[row_index - 2]
+        row.extend([""] * (col_index - len(row)))
+        row[col_index - 1] = new_value
+
+    def plan(self, row_index: int, action: str):
+        """Report an external call or database write the task skips because this is a dry run"""
+        print(f"[dry run] row {row_index}: would {action}")
+        self.changes.append({"row": row_index, "action": action})
+
+    def row_values(self, row_index: int) -> List[Any]:
+        """The row as it will read once the pending changes are written"""
+        return list(self.values[row_index - 2])
+
+    def diff(self) -> List[Dict[str, Any]]:
+        return [self.pending[key] for key in sorted(self.pending)]
+
+    def flush(self) -> List[Dict[str, Any]]:
+        changes = self.diff()
+        if not changes:
+            return changes
+
+        if self.dry_run:
+            for change in changes:
+                print(f"[dry run] row {change['row']} {change['column']}: {change['old']!r} -> {change['new']!r}")
+        else:
+            self.sheet.batch_update(
+                [{"range": rowcol_to_a1(row, col), "values": [[self.pending[(row, col)]["new"]]]} for row, col in sorted(self.pending)],
+                value_input_option="USER_ENTERED"
+            )
+            print(f"Wrote {len(changes)} cells to '{self.sheet.title}' in one batch update")
+
+        self.pending = {}
+        self.changes.extend(changes)
+        return changes
@@ -15,11 +15,15 @@ from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain.tools import StructuredTool
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import OpenAIEmbeddings
+from .embedding_cache import cached_embeddings
 from .userControllers import send_audio_message, extract_document_details
 from .whatsapp_message import send_v2v_message, send_message_user, display_user_message_on_xbotic, send_template_message, twilio_send_text_message
 from .onboarding_agent import queryExecutor as onboarding_agent
 from .cash_advance_agent import queryE as cash_advance_agent
 from .onboarding_tools import transcribe_audio
+from . import conversation_log, tool_session, webhook_queue
+from .lazy import build_once
+from .intent_matcher import IntentPreClassifier
 # Import the employer and worker tools
 from .main_tool import add_employer_tool, get_employer_workers_info_tool, check_employer_exists_tool, add_employer, get_employer_workers_info, check_employer_exists, check_worker_employer_exists, financial_query_tool, financial_query_response
 # Import attendance agent and tools
@@ -38,13 +42,19 @@ print("✅ Successfully imported attendance_agent and attendance_tools")
 # Configuration
 openai_api_key = os.environ.get("OPENAI_API_KEY")
 openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
-llm = ChatOpenAI(
+@build_once
+def get_llm():
+    return ChatOpenAI(
         model="openai/gpt-4o", 
         api_key=openrouter_api_key,
         base_url="https://openrouter.ai/api/v1"
-)
+    )
 
-embedding = OpenAIEmbeddings(api_key=openai_api_key)
+@build_once
+def get_embedding():
+    return cached_embeddings(OpenAIEmbeddings(api_key=openai_api_key))
+
+CONVERSATION_AGENT = "SuperAgentConversations"
 
 class IntentClassification(BaseModel):
     """Pydantic model for intent classification"""
@@ -63,73 +73,81 @@ class SuperAgentResponse(BaseModel):
     next_expected_action: str
     conversation_stage: str  # "greeting", "information_gathering", "processing", "completion"
 
+# Intent keywords for classification - Added worker_info keywords
+INTENT_KEYWORDS = {
+    "onboarding": [
+        "onboard", "add worker", "new worker", "employee details",
+        "upi", "bank account", "pan number", "salary", "ifsc", "worker number",
+        "add worker", "register worker", "setup worker", "worker information",
+        "new employee", "employee setup", "worker registration", "referral code", 
+        "cashback amount", "number of referrals", "referral code status", "onboard new worker"
+    ],
+    "cash_advance": [
+        "cash advance", "advance", "bonus", "deduction", "salary deduction",
+        "advance money", "payment link", "repayment", "advance payment",
+        "give money", "advance salary", "loan", "pay advance", "advance amount",
+        "bonus payment", "deduct salary", "salary payment", "generate link",
+        "give bonus", "add bonus", "bonus to worker", "bonus to employee",
+        "deduct from salary", "salary cut", "cut salary", "deduct money",
+        "payment to worker", "pay worker", "worker payment", "employee payment"
+    ],
+    "worker_info": [
+        "show workers", "list workers", "worker list", "employee list", "my workers",
+        "worker status", "worker details", "employee status", "worker info",
+        "how many workers", "total workers", "worker count", "employee count",
+        "worker salary", "worker leaves", "worker onboarding date", "worker vendor",
+        "active workers", "inactive workers", "all workers", "my employees",
+        "tell me about workers", "worker information", "employee information",
+        "salary of", "what is salary", "worker a", "worker b"
+    ],
+    "general_conversation": [
+        "hello", "hi", "how are you", "what can you do", "help", "thanks",
+        "good morning", "good evening", "bye", "goodbye", "thank you",
+        "hey", "capabilities", "what do you do"
+    ],
+    "finance_related_inquiry": [
+        "money", "finance", "financial", "funds", "savings", "income", "expenses", "wealth",
+        "asset", "liability", "portfolio", "capital", "budget", "cash", "balance", "net worth",
+        "debt", "loan", "interest", "interest rate", "return", "roi", "inflation", "deflation",
+        "risk", "diversification", "invest", "investment", "investing", "mutual fund", "sip",
+        "stock", "equity", "share", "trading", "demat", "nse", "bse", "index", "market", "etf",
+        "bond", "fixed deposit", "fd", "recurring deposit", "rd", "gold", "real estate",
+        "property investment", "portfolio management", "capital gains", "yield", "bank", "account",
+        "savings account", "current account", "transfer", "credit card", "debit card", "upi",
+        "neft", "rtgs", "imps", "mortgage", "overdraft", "withdrawal", "deposit", "cheque",
+        "statement", "balance enquiry", "scheme", "government scheme", "yojana", "pm", "pmay",
+        "pmjjby", "pmsby", "ppf", "nps", "sukanya samriddhi", "atal pension", "lic", "insurance",
+        "subsidy", "pension", "epf", "pf", "esi", "gst", "tax", "income tax", "tds", "rebate",
+        "exemption", "80c", "filing", "return", "policy", "premium", "coverage", "claim",
+        "life insurance", "health insurance", "term plan", "ulip", "vehicle insurance", "accidental",
+        "beneficiary", "renewal", "surrender", "maturity", "financial plan", "goal planning",
+        "retirement plan", "children education plan", "wealth management", "risk profile", "advisor",
+        "consultant", "recommendation", "saving strategy", "credit score", "cibil", "loan eligibility",
+        "emi", "emi calculator", "debt repayment", "savings goal", "budgeting", "expense tracker",
+        "financial discipline", "income source", "stock market", "market trend", "nifty", "sensex",
+        "inflation rate", "repo rate", "rbi", "gdp", "economy", "fiscal", "monetary policy",
+        "economic growth", "investment query", "finance related", "tax doubt", "govt scheme",
+        "saving advice", "retirement planning", "stock question", "loan help", "financial issue",
+        "wealth growth", "insurance question", "money management"
+    ]
+}
+
+@build_once
+def get_intent_preclassifier() -> IntentPreClassifier:
+    """Shared pre-classifier; its report can be read without building the agent"""
+    return IntentPreClassifier(INTENT_KEYWORDS)
+
 class SuperAgent:
     def __init__(self):
         self.PERSIST_DIR = "../../chroma_db"
         self.vectordb = Chroma(
             persist_directory=self.PERSIST_DIR,
-            collection_name="SuperAgentConversations",
-            embedding_function=embedding
+            collection_name=CONVERSATION_AGENT,
+            embedding_function=get_embedding()
         )
         
-        # Intent keywords for classification - Added worker_info keywords
-        self.intent_keywords = {
-            "onboarding": [
-                "onboard", "add worker", "new worker", "employee details",
-                "upi", "bank account", "pan number", "salary", "ifsc", "worker number",
-                "add worker", "register worker", "setup worker", "worker information",
-                "new employee", "employee setup", "worker registration", "referral code", 
-                "cashback amount", "number of referrals", "referral code status", "onboard new worker"
-            ],
-            "cash_advance": [
-                "cash advance", "advance", "bonus", "deduction", "salary deduction",
-                "advance money", "payment link", "repayment", "advance payment",
-                "give money", "advance salary", "loan", "pay advance", "advance amount",
-                "bonus payment", "deduct salary", "salary payment", "generate link",
-                "give bonus", "add bonus", "bonus to worker", "bonus to employee",
-                "deduct from salary", "salary cut", "cut salary", "deduct money",
-                "payment to worker", "pay worker", "worker payment", "employee payment"
-            ],
-            "worker_info": [
-                "show workers", "list workers", "worker list", "employee list", "my workers",
-                "worker status", "worker details", "employee status", "worker info",
-                "how many workers", "total workers", "worker count", "employee count",
-                "worker salary", "worker leaves", "worker onboarding date", "worker vendor",
-                "active workers", "inactive workers", "all workers", "my employees",
-                "tell me about workers", "worker information", "employee information",
-                "salary of", "what is salary", "worker a", "worker b"
-            ],
-            "general_conversation": [
-                "hello", "hi", "how are you", "what can you do", "help", "thanks",
-                "good morning", "good evening", "bye", "goodbye", "thank you",
-                "hey", "capabilities", "what do you do"
-            ],
-            "finance_related_inquiry": [
-                "money", "finance", "financial", "funds", "savings", "income", "expenses", "wealth",
-                "asset", "liability", "portfolio", "capital", "budget", "cash", "balance", "net worth",
-                "debt", "loan", "interest", "interest rate", "return", "roi", "inflation", "deflation",
-                "risk", "diversification", "invest", "investment", "investing", "mutual fund", "sip",
-                "stock", "equity", "share", "trading", "demat", "nse", "bse", "index", "market", "etf",
-                "bond", "fixed deposit", "fd", "recurring deposit", "rd", "gold", "real estate",
-                "property investment", "portfolio management", "capital gains", "yield", "bank", "account",
-                "savings account", "current account", "transfer", "credit card", "debit card", "upi",
-                "neft", "rtgs", "imps", "mortgage", "overdraft", "withdrawal", "deposit", "cheque",
-                "statement", "balance enquiry", "scheme", "government scheme", "yojana", "pm", "pmay",
-                "pmjjby", "pmsby", "ppf", "nps", "sukanya samriddhi", "atal pension", "lic", "insurance",
-                "subsidy", "pension", "epf", "pf", "esi", "gst", "tax", "income tax", "tds", "rebate",
-                "exemption", "80c", "filing", "return", "policy", "premium", "coverage", "claim",
-                "life insurance", "health insurance", "term plan", "ulip", "vehicle insurance", "accidental",
-                "beneficiary", "renewal", "surrender", "maturity", "financial plan", "goal planning",
-                "retirement plan", "children education plan", "wealth management", "risk profile", "advisor",
-                "consultant", "recommendation", "saving strategy", "credit score", "cibil", "loan eligibility",
-                "emi", "emi calculator", "debt repayment", "savings goal", "budgeting", "expense tracker",
-                "financial discipline", "income source", "stock market", "market trend", "nifty", "sensex",
-                "inflation rate", "repo rate", "rbi", "gdp", "economy", "fiscal", "monetary policy",
-                "economic growth", "investment query", "finance related", "tax doubt", "govt scheme",
-                "saving advice", "retirement planning", "stock question", "loan help", "financial issue",
-                "wealth growth", "insurance question", "money management"
-]
-        }
+        self.intent_keywords = INTENT_KEYWORDS
+        self.intent_preclassifier = get_intent_preclassifier()
         
         # Initialize tools
         self.tools = [
@@ -190,7 +208,7 @@ class SuperAgent:
             finance_related_keywords=", ".join(self.intent_keywords["finance_related_inquiry"])
         )
         
-        self.intent_classifier = self.intent_prompt | llm | intent_parser
+        self.intent_classifier = self.intent_prompt | get_llm() | intent_parser
 
     def setup_tool_agent(self):
         """Setup placeholder for tool agent - currently using direct function calls"""
@@ -282,7 +300,7 @@ class SuperAgent:
             ("human", "User Message: {user_message}"),
         ]).partial(format_instructions=response_parser.get_format_instructions())
         
-        self.conversation_manager = self.conversation_prompt | llm | response_parser
+        self.conversation_manager = self.conversation_prompt | get_llm() | response_parser
 
     def ensure_employer_exists(self, employer_number: int):
         """Ensure employer exists in database, add if not present"""
@@ -402,7 +420,7 @@ class SuperAgent:
             ("human", "User Query: {user_message}"),
         ])
         
-        chain = worker_info_prompt | llm
+        chain = worker_info_prompt | get_llm()
         
         try:
             response = chain.invoke({
@@ -435,7 +453,7 @@ class SuperAgent:
                 )
 
     def store_conversation(self, employer_number: int, message: str, metadata: dict = None):
-        """Store conversation in vector database with enhanced metadata"""
+        """Store conversation in the conversation log, and in the vector database when indexing is on"""
         default_metadata = {
             "employerNumber": str(employer_number),
             "timestamp": time.time(),
@@ -444,33 +462,31 @@ class SuperAgent:
         if metadata:
             default_metadata.update(metadata)
             
-        self.vectordb.add_texts(
-            texts=[message],
-            metadatas=[default_metadata]
-        )
+        conversation_log.append_message(CONVERSATION_AGENT, employer_number, message, default_metadata["timestamp"])
+
+        if conversation_log.CONVERSATION_VECTOR_INDEX:
+            self.vectordb.add_texts(
+                texts=[message],
+                metadatas=[default_metadata]
+            )
         # Removed self.vectordb.persist() as it's deprecated in Chroma 0.4.x
 
     def get_sorted_chat_history(self, employer_number: int, limit: int = 20) -> str:
         """Retrieve recent sorted chat history for an employer"""
         try:
-            raw_results = self.vectordb.get(where={"employerNumber": str(employer_number)})
-
-            if not raw_results or not raw_results.get("documents"):
-                return ""
-
-            messages = list(zip(raw_results["metadatas"], raw_results["documents"]))
-            sorted_messages = sorted(messages, key=lambda x: x[0].get("timestamp", 0))
-            
-            # Get recent messages only
-            recent_messages = sorted_messages[-limit:] if len(sorted_messages) > limit else sorted_messages
-            sorted_text = "\n".join(msg for _, msg in recent_messages)
-
-            return sorted_text
+            return conversation_log.get_chat_history(CONVERSATION_AGENT, employer_number, limit=limit, vectordb=self.vectordb)
         except Exception as e:
             print(f"Error retrieving chat history: {e}")
             return ""
 
     def classify_intent(self, user_message: str, chat_history: str) -> IntentClassification:
+        """Classify user intent locally when the keywords are unambiguous, otherwise with the LLM"""
+        result = self.intent_preclassifier.classify(user_message, lambda: self.classify_intent_with_llm(user_message, chat_history))
+        if isinstance(result, dict):
+            return IntentClassification(**result)
+        return result
+
+    def classify_intent_with_llm(self, user_message: str, chat_history: str) -> IntentClassification:
         """Classify user intent using the LLM-based classifier"""
         try:
             result = self.intent_classifier.invoke({
@@ -748,8 +764,8 @@ Just tell me what you need help with, and I'll take care of it!"""
             print(f"❌ Full traceback: {traceback.format_exc()}")
             return error_msg
 
-    def process_query(self, employer_number: int, type_of_message: str, query: str, media_id: str, formatted_json: Dict[str, Any]) -> str:
-        """Main method to process user queries"""
+    def process_query(self, employer_number: int, type_of_message: str, query: str, media_id: str, formatted_json: Dict[str, Any], raise_errors: bool = False) -> str:
+        """Main method to process user queries; with raise_errors a transient failure before the reply went out is raised after it is stored"""
         print(f"\n🤖 Super Agent Processing Query for Employer {employer_number}")
         print(f"📝 Query: {query}")
         print(f"📋 Type: {type_of_message}")
@@ -770,7 +786,9 @@ Just tell me what you need help with, and I'll take care of it!"""
             formatted_json = {}  # Use empty dict to prevent crash
     
         print(f"✅ formatted_json type: {type(formatted_json)}")
-        
+
+        message_id = None
+        replied = False
         try:
             entry = formatted_json.get("entry", [])[0] if formatted_json.get("entry") else {}
             changes = entry.get("changes", [])[0] if entry.get("changes") else {}
@@ -781,6 +799,10 @@ Just tell me what you need help with, and I'll take care of it!"""
                 user_name = contacts[0].get("profile", {}).get("name")
                 print(f"👤 User Name: {user_name}")
 
+            messages = value.get("messages", [])
+            if messages:
+                message_id = messages[0].get("id")
+
             # Extract button text only if message type is button
             if type_of_message == "button":
                 messages = value.get("messages", [])
@@ -984,6 +1006,10 @@ Just tell me what you need help with, and I'll take care of it!"""
             if response != "":
                 print("Display response is : ", response)
                 display_user_message_on_xbotic(employer_number, response)
+                replied = True
+                if raise_errors:
+                    # a retry of this message (the queue consumer's) must not send the reply again
+                    webhook_queue.mark_replied(message_id)
             elif response == "":
                 print("Response is Null")
                 return
@@ -1018,7 +1044,9 @@ Just tell me what you need help with, and I'll take care of it!"""
                 f"Error: {error_message} - {str(e)}",
                 {"error": True, "message_type": type_of_message}
             )
-            
+
+            if raise_errors and not replied and webhook_queue.is_retryable(e):
+                raise
             return error_message
 
     # --- Helper for agent confirmation ---
@@ -1032,13 +1060,18 @@ Just tell me what you need help with, and I'll take care of it!"""
         return True
 
 # Global instance
-super_agent_instance = SuperAgent()
+@build_once
+def get_super_agent() -> SuperAgent:
+    """The shared SuperAgent, built on first use (or by the app's startup warm-up)"""
+    return SuperAgent()
 
-def super_agent_query(employer_number: int, type_of_message: str, query: str, media_id: str = "", formatted_json: Dict[str, Any] = None) -> str:
+def super_agent_query(employer_number: int, type_of_message: str, query: str, media_id: str = "", formatted_json: Dict[str, Any] = None, raise_errors: bool = False) -> str:
     """Main entry point for the Super Agent"""
     if formatted_json is None:
         formatted_json = {}
-    return super_agent_instance.process_query(employer_number, type_of_message, query, media_id, formatted_json)
+    # one DB session for the whole turn, shared with the specialised agents it routes to
+    with tool_session.agent_turn():
+        return get_super_agent().process_query(employer_number, type_of_message, query, media_id, formatted_json, raise_errors)
 
 
 def delete_all_history(employer_number: int) -> dict:
@@ -1055,6 +1088,8 @@ def delete_all_history(employer_number: int) -> dict:
     employer_str = str(employer_number)
 
     try:
+        conversation_log.clear_history(COLLECTION_NAME, employer_number)
+
         # Connect to persistent Chroma client
         client = chromadb.PersistentClient(path=PERSIST_DIR)
 
@@ -8,12 +8,15 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent, AgentExecutor
+from . import conversation_log, tool_session
+from .lazy import build_once
 from .survey_tools import create_user_id_tool, check_user_exists_tool, add_single_response_tool, batch_add_responses_tool, get_user_responses_tool, update_response_tool, get_survey_statistics_tool, get_question_bank_tool, systematic_survey_message_tool
 from .userControllers import send_audio_message
 from .whatsapp_message import send_v2v_message
 from langchain.memory import VectorStoreRetrieverMemory
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import OpenAIEmbeddings
+from .embedding_cache import cached_embeddings
 from langchain_core.documents import Document
 from langchain_groq import ChatGroq
 from .whatsapp_message import send_message_user, display_user_message_on_xbotic
@@ -39,12 +42,14 @@ _openrouter_headers = {
 }
 _openrouter_headers = {k: v for k, v in _openrouter_headers.items() if v}
 
-llm = ChatOpenAI(
+@build_once
+def get_llm():
+    return ChatOpenAI(
         model="openai/gpt-4.1", 
         api_key=openrouter_api_key,
         base_url="https://openrouter.ai/api/v1",
         default_headers=_openrouter_headers or None
-)
+    )
 #llm = ChatGroq(model="llama-3.3-70b-versatile", api_key=groq_api_key)
 
 
@@ -267,46 +272,55 @@ tools = [
     get_question_bank_tool,
     systematic_survey_message_tool
 ]
-agent = create_tool_calling_agent(
-    llm=llm,
-    prompt=prompt,
-    tools=tools  
-)
+@build_once
+def get_agent_executor():
+    """Built on first use and shared by every message; per-request state goes through the invoke inputs"""
+    agent = create_tool_calling_agent(
+        llm=get_llm(),
+        prompt=prompt,
+        tools=tools
+    )
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        memory=None,  # not using built-in memory
+        verbose=True,
+        handle_parsing_errors=True
+    )
 
-embedding = OpenAIEmbeddings(api_key=openai_api_key)
+@build_once
+def get_embedding():
+    return cached_embeddings(OpenAIEmbeddings(api_key=openai_api_key))
 
 PERSIST_DIR = "../../chroma_db"
 
-# Global vectorstore (reused)
-vectordb = Chroma(
-    persist_directory=PERSIST_DIR,
-    collection_name="SurveyConversations",
-    embedding_function=embedding
-)
+CONVERSATION_AGENT = "SurveyConversations"
 
-def store_conversation(employer_number: int, message: str):
-    vectordb.add_texts(
-        texts=[message],
-        metadatas=[{
-            "employerNumber": str(employer_number),
-            "timestamp": time.time()
-        }]
+@build_once
+def get_vectordb():
+    """Conversation vector store, opened on first use rather than at import"""
+    return Chroma(
+        persist_directory=PERSIST_DIR,
+        collection_name=CONVERSATION_AGENT,
+        embedding_function=get_embedding()
     )
-    vectordb.persist()
-
 
+def store_conversation(employer_number: int, message: str):
+    timestamp = time.time()
+    conversation_log.append_message(CONVERSATION_AGENT, employer_number, message, timestamp)
+
+    if conversation_log.CONVERSATION_VECTOR_INDEX:
+        get_vectordb().add_texts(
+            texts=[message],
+            metadatas=[{
+                "employerNumber": str(employer_number),
+                "timestamp": timestamp
+            }]
+        )
+        get_vectordb().persist()
 
 def get_sorted_chat_history(employer_number: int) -> str:
-    raw_results = vectordb.get(where={"employerNumber": str(employer_number)})
-
-    if not raw_results or not raw_results.get("documents"):
-        return ""
-
-    messages = list(zip(raw_results["metadatas"], raw_results["documents"]))
-    sorted_messages = sorted(messages, key=lambda x: x[0].get("timestamp", 0))
-    sorted_text = "\n".join(msg for _, msg in sorted_messages)
-
-    return sorted_text
+    return conversation_log.get_chat_history(CONVERSATION_AGENT, employer_number, vectordb=get_vectordb())
 
 
 def queryExecutor(employer_number: int, typeofMessage : str, query : str, mediaId : str):
@@ -316,15 +330,6 @@ def queryExecutor(employer_number: int, typeofMessage : str, query : str, mediaI
         transcript_result = translate_audio(mediaId)
         query, language_code = transcript_result
 
-    # Register all tools with the agent
-    agent_executor = AgentExecutor(
-        agent=agent,
-        tools=tools,
-        memory=None,  # not using built-in memory
-        verbose=True,
-        handle_parsing_errors=True
-    )
-
     # Pass all relevant info so the agent can reason and use tools
     full_query = f"The employer number is {employer_number}. Query: {query}. Language code: {language_code}."
 
@@ -333,7 +338,8 @@ def queryExecutor(employer_number: int, typeofMessage : str, query : str, mediaI
         "chat_history": sorted_history
     }
 
-    response = agent_executor.invoke(inputs)
+    with tool_session.agent_turn():
+        response = get_agent_executor().invoke(inputs)
 
     try:
         assistant_response = response.get('output') or str(response)
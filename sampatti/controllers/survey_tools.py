@@ -17,7 +17,8 @@ from langchain.tools import StructuredTool, Tool
 import chromadb
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import OpenAIEmbeddings
-from ..database import get_db_session, get_db
+from ..database import get_db_session
+from .tool_session import get_tool_db, release_tool_db
 from .. import models
 from .utility_functions import generate_unique_id, current_date, call_sarvam_api
 from .whatsapp_message import send_message_user
@@ -29,6 +30,7 @@ from pydub import AudioSegment
 from pathlib import Path
 from sarvamai import SarvamAI
 from dotenv import load_dotenv
+from . import http_client
 
 load_dotenv()
 API_KEY = os.getenv("SARVAM_API_KEY")
@@ -144,7 +146,7 @@ def check_user_exists(user_name: str) -> dict:
     Check if a user has filled surveys before.
     Returns user details and survey statistics.
     """
-    db = next(get_db())
+    db = get_tool_db()
     try:
         user_id = generate_user_id_from_name(user_name)
         
@@ -192,7 +194,7 @@ def check_user_exists(user_name: str) -> dict:
             "message": f"Error checking user: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def add_single_survey_response(
     user_id: str,
@@ -204,7 +206,7 @@ def add_single_survey_response(
     """
     Add or update a single survey response in the database.
     """
-    db = next(get_db())
+    db = get_tool_db()
     try:
         # Check if response already exists
         existing = db.query(models.SurveyResponse).filter(
@@ -255,7 +257,7 @@ def add_single_survey_response(
             "message": f"Error adding response: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def batch_add_survey_responses(
     user_id: str,
@@ -267,7 +269,7 @@ def batch_add_survey_responses(
     Add multiple survey responses at once.
     More efficient for bulk operations.
     """
-    db = next(get_db())
+    db = get_tool_db()
     success_count = 0
     update_count = 0
     errors = []
@@ -328,13 +330,13 @@ def batch_add_survey_responses(
             "message": f"Batch processing error: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def get_user_survey_responses(user_name: str) -> dict:
     """
     Get all survey responses for a user by their name.
     """
-    db = next(get_db())
+    db = get_tool_db()
     try:
         user_id = generate_user_id_from_name(user_name)
         
@@ -392,7 +394,7 @@ def get_user_survey_responses(user_name: str) -> dict:
             "message": f"Error retrieving responses: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def update_survey_response(
     user_id: str,
@@ -403,7 +405,7 @@ def update_survey_response(
     """
     Update a specific survey response.
     """
-    db = next(get_db())
+    db = get_tool_db()
     try:
         # Find the response
         existing = db.query(models.SurveyResponse).filter(
@@ -440,7 +442,7 @@ def update_survey_response(
             "message": f"Error updating response: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 def get_audio_duration(file_path):
     """Get audio duration in seconds"""
@@ -483,7 +485,7 @@ def translate_audio(mediaId: str):
         "D360-API-KEY": orai_api_key
     }
 
-    response_1 = requests.get(f"https://waba-v2.360dialog.io/{mediaId}", headers=headers)
+    response_1 = http_client.get(f"https://waba-v2.360dialog.io/{mediaId}", headers=headers)
 
     if response_1.status_code != 200:
         return f"Failed to get audio info: {response_1.status_code} {response_1.text}"
@@ -496,7 +498,7 @@ def translate_audio(mediaId: str):
     whatsapp_index = audio_url.find("whatsapp")
     whatsapp_path = audio_url[whatsapp_index:]
 
-    response_2 = requests.get(f"https://waba-v2.360dialog.io/{whatsapp_path}", headers=headers, stream=True)
+    response_2 = http_client.get(f"https://waba-v2.360dialog.io/{whatsapp_path}", headers=headers, stream=True)
     if response_2.status_code != 200:
         return f"Failed to download audio: {response_2.status_code} {response_2.text}"
 
@@ -564,7 +566,7 @@ def get_survey_statistics(user_name: str) -> dict:
     """
     Get detailed statistics about a user's survey responses.
     """
-    db = next(get_db())
+    db = get_tool_db()
     try:
         user_id = generate_user_id_from_name(user_name)
         
@@ -622,7 +624,7 @@ def get_survey_statistics(user_name: str) -> dict:
             "message": f"Error calculating statistics: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 # Pydantic model for systematic survey message
 class SystematicSurveyMessageInput(BaseModel):
@@ -635,7 +637,7 @@ def systemattic_survey_message(worker_number: str, user_name: str, survey_id: st
     Generate a systematic survey message showing all responses for a user.
     This function formats the survey responses in a clear, numbered format.
     """
-    db = next(get_db())
+    db = get_tool_db()
     try:
         total_survey_messages = db.query(models.SurveyResponse).filter(
             models.SurveyResponse.worker_number == worker_number,
@@ -672,7 +674,7 @@ def systemattic_survey_message(worker_number: str, user_name: str, survey_id: st
             "confirmation_message": f"Error generating survey message: {str(e)}"
         }
     finally:
-        db.close()
+        release_tool_db(db)
 
 # Create LangChain tools
 create_user_id_tool = StructuredTool.from_function(
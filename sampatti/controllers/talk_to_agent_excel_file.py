@@ -1,5 +1,6 @@
 import os
 import sqlite3
+from contextlib import ExitStack
 import pandas as pd
 from dotenv import load_dotenv
 import gspread
@@ -10,6 +11,8 @@ from .. import schemas
 from .utility_functions import current_date
 from .. import models
 from .utility_functions import generate_unique_id
+from .sheet_sync import SheetSyncSession, SheetWatermark
+from . import vendor_reconciliation
 #from .onboarding_tasks import run_tasks_till_add_vendor, run_tasks_after_vendor_addition
 
 # Load environment variables from .env file
@@ -77,6 +80,8 @@ def get_client():
 
 sheet_title = "OpsTeamWorkerDetailsSheet"
 main_sheet = "OnboardingWorkerDetails"
+# confirmed rows are copied to the main sheet and marked SENT this many at a time
+CONFIRMED_ROWS_PER_WRITE = int(os.environ.get('CONFIRMED_ROWS_PER_WRITE', 10))
 
 all_columns = [
     "id", "bank_account_name_cashfree", "pan_card_name_cashfree", "worker_number", "employer_number", "UPI", "bank_account_number", "ifsc_code", "PAN_number", "bank_passbook_image", "pan_card_image", "bank_account_validation", "pan_card_validation", "cashfree_vendor_add_status", "vendorId", "confirmation_message", "salary", "date_of_onboarding", "referral_code"
@@ -164,380 +169,340 @@ def create_worker_details_onboarding(worker_number: int, employer_number : int,
 
     return spreadsheet.url
 
-def add_vendor_to_cashfree():
+def add_vendor_to_cashfree(dry_run : bool = False, incremental : bool = True):
     # Define the scope and credentials
 
     client = get_client()
     sheet = client.open(sheet_title).sheet1
-    records = sheet.get_all_records()
 
     # Iterate over each record starting from row 2 (1-indexed)
-    for idx, row in enumerate(records, start=2):
-        vendor_id = row.get("vendorId", "").strip()
-
-        # Skip if vendorId already exists
-        if vendor_id:
-            continue
-
-        # Extract data
-        vpa = row.get("UPI", "").strip()
-        worker_number = row.get("worker_number", "")
-        employer_number = row.get("employer_number", "")
-        bank_worker_name = row.get("bank_account_name_cashfree", "").strip()
-        pan_worker_name = row.get("pan_card_name_cashfree", "").strip()
-        pan_number = row.get("PAN_number", "").strip()
-        account_number = row.get("bank_account_number", "")
-        ifsc_code = row.get("ifsc_code", "").strip()
-        bank_account_validation = row.get("bank_account_validation", "").strip()
-        pan_card_validation = row.get("pan_card_validation", "").strip()
-
-        # Validate essential fields
-        if not pan_number:
-            print(f"Skipping row {idx}: Missing PAN")
-            continue
-
-        if not (account_number or vpa):
-            print(f"Skipping row {idx}: Missing both account number and VPA")
-            continue
-        
-        if pan_card_validation != "VALID":
-            continue
+    with SheetSyncSession(sheet, dry_run, SheetWatermark(sheet_title, "add_vendor_to_cashfree", incremental)) as session:
+        for idx, row in session.rows():
+            vendor_id = row.get("vendorId", "").strip()
 
-        if not vpa and bank_account_validation != "VALID":
-            continue
-        
-        if not bank_worker_name:
-            bank_worker_name = pan_worker_name
-
-        vendor = schemas.Vendor(
-            vpa = vpa if vpa else "None",
-            workerNumber=int(worker_number),
-            name=pan_worker_name,
-            pan=pan_number,
-            accountNumber=f"{account_number}" if account_number else "None",
-            ifsc=ifsc_code if account_number else "None",
-            employerNumber=int(employer_number)
-        )
-
-        print(vendor)
-        response = cashfree_api.add_a_vendor(vendor)
-        new_vendor_id = response.get("VENDOR_ID")
-        if new_vendor_id:
-            sheet.update_cell(idx, get_column_index(sheet, "vendorId"), new_vendor_id)
-            print(f"Updated row {idx} with vendorId: {new_vendor_id}")
-        else:
-            print(f"Failed to get vendorId for row {idx}")
-
-def process_vendor_status(db : Session):
-    # Setup
+            # Skip if vendorId already exists
+            if vendor_id:
+                continue
 
-    client = get_client()
-    onboarding_sheet = client.open(sheet_title).sheet1
+            # Extract data
+            vpa = row.get("UPI", "").strip()
+            worker_number = row.get("worker_number", "")
+            employer_number = row.get("employer_number", "")
+            bank_worker_name = row.get("bank_account_name_cashfree", "").strip()
+            pan_worker_name = row.get("pan_card_name_cashfree", "").strip()
+            pan_number = row.get("PAN_number", "").strip()
+            account_number = row.get("bank_account_number", "")
+            ifsc_code = row.get("ifsc_code", "").strip()
+            bank_account_validation = row.get("bank_account_validation", "").strip()
+            pan_card_validation = row.get("pan_card_validation", "").strip()
+
+            # Validate essential fields
+            if not pan_number:
+                print(f"Skipping row {idx}: Missing PAN")
+                continue
 
-    records = onboarding_sheet.get_all_records()
-    header = onboarding_sheet.row_values(1)
-    
-    for idx, row in enumerate(records, start=2):  # start=2 for actual sheet row (header is at 1)
-        vendorId = row.get("vendorId", "").strip()
-        employer_number = row.get("employer_number", "")
-        worker_bank_name = row.get("bank_account_name_cashfree", "").strip()
-        worker_pan_name = row.get("pan_card_name_cashfree", "").strip()
-        worker_number = row.get("worker_number", "")
-        PAN_number = row.get("PAN_number", "").strip()
-        upi_id = row.get("UPI", "").strip()
-        bank_account_number = row.get("bank_account_number", "")
-        ifsc_code = row.get("ifsc_code", "").strip()
-        salary = row.get("salary", "")
-        confirmation_message = row.get("confirmation_message", "").strip()
-        referral_code = row.get("referral_code", "").strip()
-
-        if not vendorId:
-            print(f"[{idx}] No vendorId found")
-            continue
-
-        try:
+            if not (account_number or vpa):
+                print(f"Skipping row {idx}: Missing both account number and VPA")
+                continue
+        
+            if pan_card_validation != "VALID":
+                continue
 
-            if confirmation_message == "SENT":
+            if not vpa and bank_account_validation != "VALID":
+                continue
+        
+            if not bank_worker_name:
+                bank_worker_name = pan_worker_name
+
+            vendor = schemas.Vendor(
+                vpa = vpa if vpa else "None",
+                workerNumber=int(worker_number),
+                name=pan_worker_name,
+                pan=pan_number,
+                accountNumber=f"{account_number}" if account_number else "None",
+                ifsc=ifsc_code if account_number else "None",
+                employerNumber=int(employer_number)
+            )
+
+            print(vendor)
+            if dry_run:
+                session.plan(idx, f"add a Cashfree vendor for worker {worker_number}")
                 continue
 
-            status_response = cashfree_api.check_vendor_status(vendorId)
-            pan_remarks = status_response["related_docs"][1]["remarks"]
-            remarks = status_response["remarks"]
-            final_remarks = f"{remarks} || {pan_remarks}"
-            print(final_remarks)
+            response = cashfree_api.add_a_vendor(vendor)
+            new_vendor_id = response.get("VENDOR_ID")
+            if new_vendor_id:
+                session.update(idx, "vendorId", new_vendor_id)
+                print(f"Updated row {idx} with vendorId: {new_vendor_id}")
+            else:
+                print(f"Failed to get vendorId for row {idx}")
+                session.keep_open(idx)
 
-            vendor_status = status_response["status"].upper()
+    return session.changes
 
-            if vendor_status == "ACTIVE":
-                
-                update_sheet_cell(onboarding_sheet, idx, "cashfree_vendor_add_status", "ACTIVE")
-                
-                # Check if worker already exists in Domestic_Worker table
-                existing_worker = db.query(models.Domestic_Worker).filter(
-                    models.Domestic_Worker.workerNumber == worker_number
-                ).first()
-                
-                if existing_worker:
-                    print(f"[{idx}] Worker {worker_number} already exists in database. Using existing worker data.")
-                    # Worker already exists, use existing vendorId and worker_id
-                    existing_vendor_id = existing_worker.vendorId
-                    existing_worker_id = existing_worker.id
-                    
-                    # Update the sheet with existing vendorId if different
-                    if existing_vendor_id and existing_vendor_id != vendorId:
-                        update_sheet_cell(onboarding_sheet, idx, "vendorId", existing_vendor_id)
-                        print(f"[{idx}] Updated sheet with existing vendorId: {existing_vendor_id}")
-                        
-                else:
-                    # Worker doesn't exist, create new entry in the db
-                    if not worker_bank_name:
-                        worker_bank_name = worker_pan_name
-
-                    worker = schemas.Domestic_Worker(
-                        name = worker_bank_name,
-                        email = "sample@sample.com",
-                        workerNumber=worker_number,
-                        employerNumber = employer_number,
-                        panNumber = PAN_number,
-                        upi_id = upi_id if upi_id else "None",
-                        accountNumber = bank_account_number if bank_account_number else "None",
-                        ifsc = ifsc_code if bank_account_number else "None",
-                        vendorId = vendorId,
-                        referralCode = referral_code
-                    )
-                
-                    userControllers.create_domestic_worker(worker, db)
-                    print(f"[{idx}] Created new worker {worker_number} in database.")
+def process_vendor_status(db : Session, dry_run : bool = False, incremental : bool = True):
+    # Setup
 
-            else:
-                print(f"[{idx}] Vendor {vendorId} status = {vendor_status}. Updating status in sheet and logging failure.")
-                update_sheet_cell(onboarding_sheet, idx, "cashfree_vendor_add_status", f"NOT ACTIVE - {final_remarks}")
+    client = get_client()
+    onboarding_sheet = client.open(sheet_title).sheet1
+
+    with SheetSyncSession(onboarding_sheet, dry_run, SheetWatermark(sheet_title, "process_vendor_status", incremental)) as session:
+        vendor_reconciliation.reconcile_vendor_statuses(session, db)
 
-        except Exception as e:
-            print(f"[{idx}] Error checking status for vendorId {vendorId}: {e}")
+    return session.changes
 
-def create_relations_in_db(db : Session):
+def create_relations_in_db(db : Session, dry_run : bool = False, incremental : bool = True):
 
     client = get_client()
     onboarding_sheet = client.open(sheet_title).sheet1
     worker_details_main_sheet = client.open(main_sheet).sheet1
 
-    records = onboarding_sheet.get_all_records()
-    header = onboarding_sheet.row_values(1)
-    
-    for idx, row in enumerate(records, start=2):  # start=2 for actual sheet row (header is at 1)
-        vendorId = row.get("vendorId", "").strip()
-        employer_number = row.get("employer_number", "")
-        worker_name = row.get("bank_account_name_cashfree", "").strip()
-        pan_name = row.get("pan_card_name_cashfree", "").strip()
-        PAN_number=row.get("PAN_number", "").strip()
-        worker_number = row.get("worker_number", "")
-        salary = row.get("salary", "")
-        vendor_status = row.get("cashfree_vendor_add_status", "")
-        upi_id = row.get("UPI", "").strip()
-        bank_account_number = row.get("bank_account_number", "")
-        ifsc_code = row.get("ifsc_code", "").strip()
-        confirmation_message = row.get("confirmation_message", "").strip()
-        date_of_onboarding = row.get("date_of_onboarding", "").strip()
-        referral_code = row.get("referral_code", "").strip()
-
+    with SheetSyncSession(onboarding_sheet, dry_run, SheetWatermark(sheet_title, "create_relations_in_db", incremental)) as session, ExitStack() as on_exit:
+        confirmed_rows = []
+
+        def write_confirmed_rows():
+            # relations and contracts cannot be undone, so their rows are marked SENT in small
+            # chunks rather than at the end of the pass; the main sheet gets the rows first and
+            # SENT is only written once they are there
+            chunk = list(confirmed_rows)
+            confirmed_rows.clear()
+            if not chunk:
+                return
+            try:
+                worker_details_main_sheet.append_rows([values for _, values in chunk], value_input_option="USER_ENTERED")
+            except Exception as e:
+                print(f"Error copying confirmed rows to the main sheet: {e}")
+                for row_index, _ in chunk:
+                    session.keep_open(row_index)
+                return
+            print(worker_details_main_sheet.url)
+            for row_index, _ in chunk:
+                session.update(row_index, "confirmation_message", "SENT")
+            session.flush()
+
+        # the last chunk is written when the pass ends, also when it ends with an error
+        on_exit.callback(write_confirmed_rows)
+
+        for idx, row in session.rows():  # start=2 for actual sheet row (header is at 1)
+            vendorId = row.get("vendorId", "").strip()
+            employer_number = row.get("employer_number", "")
+            worker_name = row.get("bank_account_name_cashfree", "").strip()
+            pan_name = row.get("pan_card_name_cashfree", "").strip()
+            PAN_number=row.get("PAN_number", "").strip()
+            worker_number = row.get("worker_number", "")
+            salary = row.get("salary", "")
+            vendor_status = row.get("cashfree_vendor_add_status", "")
+            upi_id = row.get("UPI", "").strip()
+            bank_account_number = row.get("bank_account_number", "")
+            ifsc_code = row.get("ifsc_code", "").strip()
+            confirmation_message = row.get("confirmation_message", "").strip()
+            date_of_onboarding = row.get("date_of_onboarding", "").strip()
+            referral_code = row.get("referral_code", "").strip()
+
+
+            if not worker_name:
+                worker_name = pan_name
 
-        if not worker_name:
-            worker_name = pan_name
 
+            if confirmation_message == "SENT":
+                continue
 
-        if confirmation_message == "SENT":
-            continue
+            if vendor_status == "ACTIVE":
 
-        if vendor_status == "ACTIVE":
+                if dry_run:
+                    session.plan(idx, f"create the relation of worker {worker_number} with employer {employer_number} and send the employment contract")
+                    continue
 
-            try:
-                # Get actual worker_id and vendor_id from Domestic_Worker table
-                existing_worker = db.query(models.Domestic_Worker).filter(
-                    models.Domestic_Worker.workerNumber == worker_number
-                ).first()
+                try:
+                    # Get actual worker_id and vendor_id from Domestic_Worker table
+                    existing_worker = db.query(models.Domestic_Worker).filter(
+                        models.Domestic_Worker.workerNumber == worker_number
+                    ).first()
                 
-                if existing_worker:
-                    actual_worker_id = existing_worker.id
-                    actual_vendor_id = existing_worker.vendorId
-                    print(f"[{idx}] Using existing worker data - worker_id: {actual_worker_id}, vendor_id: {actual_vendor_id}")
-                else:
-                    # Fallback to sheet values if worker not found in database
-                    actual_worker_id = "worker_id"
-                    actual_vendor_id = vendorId
-                    print(f"[{idx}] Worker not found in database, using sheet values")
+                    if existing_worker:
+                        actual_worker_id = existing_worker.id
+                        actual_vendor_id = existing_worker.vendorId
+                        print(f"[{idx}] Using existing worker data - worker_id: {actual_worker_id}, vendor_id: {actual_vendor_id}")
+                    else:
+                        # Fallback to sheet values if worker not found in database
+                        actual_worker_id = "worker_id"
+                        actual_vendor_id = vendorId
+                        print(f"[{idx}] Worker not found in database, using sheet values")
                     
-                employer_obj = db.query(models.Employer).filter(
-                    models.Employer.employerNumber == employer_number
-                ).first()
-
-                if employer_obj:
-                    actual_employer_id = employer_obj.id
-                    print(f"[{idx}] Using existing employer - employer_id: {actual_employer_id}")
-                else:
-                    # Create new Employer
-                    actual_employer_id = generate_unique_id()
-                    new_employer = models.Employer(
-                        id=actual_employer_id,
-                        employerNumber=employer_number,
-                        referralCode=referral_code,
-                        cashbackAmountCredited=0,
-                        FirstPaymentDone=False,
-                        accountNumber='',
-                        ifsc='',
-                        upiId='',
-                        numberofReferral=0,
-                        totalPaymentAmount=0,
-                        beneficiaryId=''
-                    )
-                    db.add(new_employer)
-                    db.commit()
-                    db.refresh(new_employer)
-                    print(f"[{idx}] Created new employer - employer_id: {actual_employer_id}")
+                    employer_obj = db.query(models.Employer).filter(
+                        models.Employer.employerNumber == employer_number
+                    ).first()
+
+                    if employer_obj:
+                        actual_employer_id = employer_obj.id
+                        print(f"[{idx}] Using existing employer - employer_id: {actual_employer_id}")
+                    else:
+                        # Create new Employer
+                        actual_employer_id = generate_unique_id()
+                        new_employer = models.Employer(
+                            id=actual_employer_id,
+                            employerNumber=employer_number,
+                            referralCode=referral_code,
+                            cashbackAmountCredited=0,
+                            FirstPaymentDone=False,
+                            accountNumber='',
+                            ifsc='',
+                            upiId='',
+                            numberofReferral=0,
+                            totalPaymentAmount=0,
+                            beneficiaryId=''
+                        )
+                        db.add(new_employer)
+                        db.commit()
+                        db.refresh(new_employer)
+                        print(f"[{idx}] Created new employer - employer_id: {actual_employer_id}")
                 
-                relation = schemas.Worker_Employer(
-                    workerNumber = worker_number,
-                    employerNumber = employer_number,
-                    salary = salary,
-                    vendorId = actual_vendor_id,
-                    worker_name = worker_name,
-                    employer_id = actual_employer_id,
-                    worker_id = actual_worker_id,
-                    referralCode = referral_code
-                )
-
-                userControllers.create_relation(relation, db, date_of_onboarding)
-
-                if not bank_account_number:
-                    bank_account_number="N/A"
-                    ifsc_code="N/A"
-
-                if not upi_id:
-                    upi_id="N/A"
-
-                userControllers.generate_employment_contract(employer_number, worker_number,upi_id, bank_account_number, ifsc_code, PAN_number, worker_name, salary, db)
-                update_sheet_cell(onboarding_sheet, idx, "confirmation_message", "SENT")
-                row_values = onboarding_sheet.row_values(idx)
-                worker_details_main_sheet.append_row(row_values, value_input_option="USER_ENTERED")
-                main_sheet_url = worker_details_main_sheet.url
-                print(main_sheet_url)
-            except Exception as e:
-                print(f"Error creating worker employer relation in db : {e}")
+                    relation = schemas.Worker_Employer(
+                        workerNumber = worker_number,
+                        employerNumber = employer_number,
+                        salary = salary,
+                        vendorId = actual_vendor_id,
+                        worker_name = worker_name,
+                        employer_id = actual_employer_id,
+                        worker_id = actual_worker_id,
+                        referralCode = referral_code
+                    )
+
+                    userControllers.create_relation(relation, db, date_of_onboarding)
+
+                    if not bank_account_number:
+                        bank_account_number="N/A"
+                        ifsc_code="N/A"
+
+                    if not upi_id:
+                        upi_id="N/A"
+
+                    userControllers.generate_employment_contract(employer_number, worker_number,upi_id, bank_account_number, ifsc_code, PAN_number, worker_name, salary, db)
+
+                    # the main sheet copy reads SENT, as the onboarding row will once it is written
+                    values = session.row_values(idx)
+                    confirmation_column = session.column_index("confirmation_message")
+                    if confirmation_column:
+                        values.extend([""] * (confirmation_column - len(values)))
+                        values[confirmation_column - 1] = "SENT"
+                    confirmed_rows.append((idx, values))
+                    if len(confirmed_rows) >= CONFIRMED_ROWS_PER_WRITE:
+                        write_confirmed_rows()
+                except Exception as e:
+                    print(f"Error creating worker employer relation in db : {e}")
+                    session.keep_open(idx)
         
-        else:
-            continue
+            else:
+                continue
 
-def bank_account_validation_status():
+    return session.changes
+
+def bank_account_validation_status(dry_run : bool = False, incremental : bool = True):
 
     # Access the sheet
     client = get_client()
     sheet = client.open(sheet_title).sheet1
-    header = sheet.row_values(1)
-    records = sheet.get_all_records()
-
-    for idx, row in enumerate(records, start=2):
-        account_number = row.get("bank_account_number", "")
-        ifsc_code = row.get("ifsc_code", "").strip()
-        pan_number = row.get("PAN_number", "").strip()
-        pan_validation = row.get("pan_card_validation", "").strip()
-        bank_account_validation = row.get("bank_account_validation", "").strip()
 
-        # Skip if missing critical info
-        if pan_validation != "VALID" and pan_number:
-
-            print(pan_number)
-            pan_response = cashfree_api.pan_verification(pan_number, "sample")
+    with SheetSyncSession(sheet, dry_run, SheetWatermark(sheet_title, "bank_account_validation_status", incremental)) as session:
+        for idx, row in session.rows():
+            account_number = row.get("bank_account_number", "")
+            ifsc_code = row.get("ifsc_code", "").strip()
+            pan_number = row.get("PAN_number", "").strip()
+            pan_validation = row.get("pan_card_validation", "").strip()
+            bank_account_validation = row.get("bank_account_validation", "").strip()
+
+            # Skip if missing critical info
+            if pan_validation != "VALID" and pan_number:
+
+                print(pan_number)
+                pan_response = None if dry_run else cashfree_api.pan_verification(pan_number, "sample")
+
+                if dry_run:
+                    session.plan(idx, f"verify PAN {pan_number}")
+                elif not pan_response:
+                    session.update(idx, "pan_card_validation", "NOT FETCHED")
+                    session.update(idx, "pan_card_name_cashfree", "NOT FETCHED")
+                    session.keep_open(idx)
+                else:
+                    pan_status = pan_response.get("status")
+                    name_pan_card = pan_response.get("name_pan_card")
+                    session.update(idx, "pan_card_validation", pan_status)
+                    session.update(idx, "pan_card_name_cashfree", name_pan_card)
 
-            if not pan_response:
-                update_sheet_cell(sheet, idx, "pan_card_validation", "NOT FETCHED")
-                update_sheet_cell(sheet, idx, "pan_card_name_cashfree", "NOT FETCHED")
-            else:
-                pan_status = pan_response.get("status")
-                name_pan_card = pan_response.get("name_pan_card")
-                update_sheet_cell(sheet, idx, "pan_card_validation", pan_status)
-                update_sheet_cell(sheet, idx, "pan_card_name_cashfree", name_pan_card)
+            if bank_account_validation != "VALID" and account_number:
 
-        if bank_account_validation != "VALID" and account_number:
+                print(account_number)
+                if dry_run:
+                    session.plan(idx, f"verify bank account {account_number}")
+                    continue
 
-            print(account_number)
-            bank_response = cashfree_api.bank_account_verification(account_number, ifsc_code)
+                bank_response = cashfree_api.bank_account_verification(account_number, ifsc_code)
             
-            if not bank_response:
-                update_sheet_cell(sheet, idx, "bank_account_validation", "NOT FETCHED")
-                update_sheet_cell(sheet, idx, "bank_account_name_cashfree", "NOT FETCHED")
-                continue
-            else:
-                bank_status = bank_response.get("account_status")
-                name_at_bank = bank_response.get("name_at_bank")
-                update_sheet_cell(sheet, idx, "bank_account_validation", bank_status)
-                update_sheet_cell(sheet, idx, "bank_account_name_cashfree", name_at_bank)
+                if not bank_response:
+                    session.update(idx, "bank_account_validation", "NOT FETCHED")
+                    session.update(idx, "bank_account_name_cashfree", "NOT FETCHED")
+                    session.keep_open(idx)
+                    continue
+                else:
+                    bank_status = bank_response.get("account_status")
+                    name_at_bank = bank_response.get("name_at_bank")
+                    session.update(idx, "bank_account_validation", bank_status)
+                    session.update(idx, "bank_account_name_cashfree", name_at_bank)
+
+    return session.changes
 
-def fetch_pan_bank_details_from_image():
+def fetch_pan_bank_details_from_image(dry_run : bool = False, incremental : bool = True):
 
     # Access the sheet
     client = get_client()
     sheet = client.open(sheet_title).sheet1
-    header = sheet.row_values(1)
-    records = sheet.get_all_records()
 
-    for idx, row in enumerate(records, start=2):
+    with SheetSyncSession(sheet, dry_run, SheetWatermark(sheet_title, "fetch_pan_bank_details_from_image", incremental)) as session:
+        for idx, row in session.rows():
 
-        bank_passbook_image = row.get("bank_passbook_image", "").strip()
-        account_number = row.get("bank_account_number", "")
-        pan_card_image = row.get("pan_card_image", "").strip()
-        pan_number = row.get("PAN_number", "").strip()
-        ifsc_code = row.get("ifsc_code", "").strip()
+            bank_passbook_image = row.get("bank_passbook_image", "").strip()
+            account_number = row.get("bank_account_number", "")
+            pan_card_image = row.get("pan_card_image", "").strip()
+            pan_number = row.get("PAN_number", "").strip()
+            ifsc_code = row.get("ifsc_code", "").strip()
 
-        if bank_passbook_image is not None or bank_passbook_image != "":
+            if bank_passbook_image is not None or bank_passbook_image != "":
 
-            if account_number and ifsc_code:
-                continue
+                if account_number and ifsc_code:
+                    continue
 
-            bank_response = userControllers.extract_passbook_details(bank_passbook_image)
-            response_error = bank_response.get("error")
-            if response_error:
-                update_sheet_cell(sheet, idx, "bank_account_number", "NA")
-                update_sheet_cell(sheet, idx, "ifsc_code", "NA")
-            else:
-                account_number = bank_response.get("account_number")
-                ifsc_code = bank_response.get("ifsc_code")
-                update_sheet_cell(sheet, idx, "bank_account_number", account_number)
-                update_sheet_cell(sheet, idx, "ifsc_code", ifsc_code)
+                bank_response = {} if dry_run else userControllers.extract_passbook_details(bank_passbook_image)
+                response_error = bank_response.get("error")
+                if dry_run:
+                    session.plan(idx, "extract bank details from the passbook image")
+                elif response_error:
+                    session.update(idx, "bank_account_number", "NA")
+                    session.update(idx, "ifsc_code", "NA")
+                else:
+                    account_number = bank_response.get("account_number")
+                    ifsc_code = bank_response.get("ifsc_code")
+                    session.update(idx, "bank_account_number", account_number)
+                    session.update(idx, "ifsc_code", ifsc_code)
 
-        if pan_card_image is not None or pan_card_image != "":
+            if pan_card_image is not None or pan_card_image != "":
 
-            if pan_number: 
-                continue
+                if pan_number: 
+                    continue
             
-            pan_response = userControllers.extract_pan_card_details(pan_card_image)
-            response_error = pan_response.get("error")
-            if response_error:
-                update_sheet_cell(sheet, idx, "PAN_number", "NA")
-            else:
-                PAN_number = pan_response.get("pan_number")
-                update_sheet_cell(sheet, idx, "PAN_number", PAN_number)
- 
-
+                if dry_run:
+                    session.plan(idx, "extract the PAN number from the PAN card image")
+                    continue
+
+                pan_response = userControllers.extract_pan_card_details(pan_card_image)
+                response_error = pan_response.get("error")
+                if response_error:
+                    session.update(idx, "PAN_number", "NA")
+                else:
+                    PAN_number = pan_response.get("pan_number")
+                    session.update(idx, "PAN_number", PAN_number)
 
-def update_sheet_cell(sheet, row_index, column_name, new_value):
+    return session.changes
 
-    """Helper to update a cell by column name."""
-    header = sheet.row_values(1)
-    try:
-        col_index = header.index(column_name) + 1
-        sheet.update_cell(row_index, col_index, new_value)
-    except ValueError:
-        print(f"Column '{column_name}' not found in sheet.")
-
-def get_column_index(sheet, column_name):
-    """Helper to get column index (1-indexed) for a given column name."""
-    header = sheet.row_values(1)
-    try:
-        return header.index(column_name) + 1
-    except ValueError:
-        raise ValueError(f"Column '{column_name}' not found in sheet header.")
-    
-    
 def create_record_for_existing_worker_sheet(worker_number: int, employer_number : int, worker_name : str, UPI: str, bank_account_number: str, ifsc_code: str, pan_number: str, vendor_id : str, salary : int, referral_code : str = ""):
     date = current_date()
     
@@ -0,0 +1,74 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+
+# Session of the agent turn running in the current context; tool calls made
+# during that turn share it and the turn closes it when the agent returns.
+_turn_session: ContextVar = ContextVar("agent_turn_session", default=None)
+
+_lock = threading.Lock()
+_stats = {"open_sessions": 0, "peak_open_sessions": 0, "opened_total": 0, "turns": 0}
+
+
+def _open_session() -> Session:
+    db = SessionLocal()
+    with _lock:
+        _stats["open_sessions"] += 1
+        _stats["opened_total"] += 1
+        _stats["peak_open_sessions"] = max(_stats["peak_open_sessions"], _stats["open_sessions"])
+    return db
+
+
+def _close_session(db: Session):
+    try:
+        db.close()
+    finally:
+        with _lock:
+            _stats["open_sessions"] -= 1
+
+
+@contextmanager
+def agent_turn():
+    """Scope one agent turn: every tool call inside it uses the same session, closed on exit"""
+    current = _turn_session.get()
+    if current is not None:
+        # nested agents (super agent -> onboarding agent) stay on the outer turn's session
+        yield current
+        return
+
+    db = _open_session()
+    token = _turn_session.set(db)
+    with _lock:
+        _stats["turns"] += 1
+    try:
+        yield db
+    finally:
+        _turn_session.reset(token)
+        _close_session(db)
+
+
+def get_tool_db() -> Session:
+    """Session for a tool call: the current turn's, or a new one when the tool runs outside a turn"""
+    db = _turn_session.get()
+    return db if db is not None else _open_session()
+
+
+def release_tool_db(db: Session):
+    """Counterpart of get_tool_db; only sessions opened outside a turn are closed here"""
+    if db is _turn_session.get():
+        # tools commit their own work, so whatever is left is a read transaction or changes a
+        # tool abandoned (e.g. after catching an error); rolling back ends the transaction so the
+        # turn holds no connection while the LLM runs, and keeps those changes out of the next
+        # tool's commit
+        if db.in_transaction():
+            db.rollback()
+        return
+    _close_session(db)
+
+
+def tool_session_stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
@@ -2,6 +2,7 @@ from io import BytesIO
 import boto3, os
 from dotenv import load_dotenv
 import requests
+from . import http_client
 
 
 load_dotenv()
@@ -50,7 +51,7 @@ def upload_file_to_spaces(filePath, object_name, bucket_name=SPACE_NAME):
 def upload_image_from_url(image_url: str, object_name: str, bucket_name=SPACE_NAME):
     try:
         # Step 1: Download image from URL
-        response = requests.get(image_url)
+        response = http_client.get(image_url)
         response.raise_for_status()  # Raise error if download fails
 
         # Step 2: Upload to DigitalOcean Spaces
@@ -20,6 +20,7 @@ from io import BytesIO
 import json
 import logging, random
 import mimetypes
+from . import http_client, broadcast, salary_slip_batch
 
 load_dotenv()
 openai_api_key = os.environ.get('OPENAI_API_KEY')
@@ -47,7 +48,8 @@ def create_employer(request : schemas.Employer, db: Session):
 
 
 # creating a domestic worker
-def create_domestic_worker(request : schemas.Domestic_Worker, db: Session):
+def build_domestic_worker(request : schemas.Domestic_Worker):
+    """New Domestic_Worker row for the request, with "None" placeholders cleared"""
 
     if request.upi_id == "None":
         request.upi_id = None
@@ -55,15 +57,19 @@ def create_domestic_worker(request : schemas.Domestic_Worker, db: Session):
     elif request.accountNumber == "None":
         request.accountNumber = None
         request.ifsc = None
- 
+
+    unique_id = generate_unique_id()
+    return models.Domestic_Worker(id=unique_id, name = request.name, email = request.email, workerNumber = request.workerNumber, panNumber = request.panNumber, upi_id = request.upi_id, accountNumber = request.accountNumber, ifsc = request.ifsc, vendorId = request.vendorId)
+
+def create_domestic_worker(request : schemas.Domestic_Worker, db: Session):
+
     existing_worker = db.query(models.Domestic_Worker).filter(models.Domestic_Worker.workerNumber == request.workerNumber).first()
 
     if existing_worker :
         print("worker already exists")
         return existing_worker
 
-    unique_id = generate_unique_id()
-    new_worker = models.Domestic_Worker(id=unique_id, name = request.name, email = request.email, workerNumber = request.workerNumber, panNumber = request.panNumber, upi_id = request.upi_id, accountNumber = request.accountNumber, ifsc = request.ifsc, vendorId = request.vendorId)
+    new_worker = build_domestic_worker(request)
     db.add(new_worker)
     db.commit()
     db.refresh(new_worker)
@@ -210,10 +216,8 @@ def extract_salary(salary_amount : str):
     return {"extracted_salary" : "INVALID"}
 
 
-def send_employer_invoice(employerNumber : int, orderId : str, db : Session):
-
-    transaction = db.query(models.worker_employer).where(models.worker_employer.c.employer_number == employerNumber, models.worker_employer.c.order_id==orderId).first()
-
+def payment_period():
+    """Salary month and year that a payment made today settles"""
     ps_month = previous_month()
     month  = ""
     year = ""
@@ -231,12 +235,34 @@ def send_employer_invoice(employerNumber : int, orderId : str, db : Session):
         month = current_month()
         year = current_year()
 
+    return month, year
+
+
+def load_order_context(employerNumber : int, orderId : str, db : Session) -> dict:
+    """Everything the payment stages need about one order, read once: the relation, salary period and parsed order note"""
+
+    transaction = db.query(models.worker_employer).where(models.worker_employer.c.employer_number == employerNumber, models.worker_employer.c.order_id==orderId).first()
+    month, year = payment_period()
 
     order_info = cashfree_api.check_order_status(orderId)
-    order_note_string = order_info["order_note"]
+    order_note = json.loads(html.unescape(order_info["order_note"]))
+
+    return {
+        "transaction": transaction,
+        "month": month,
+        "year": year,
+        "order_info": order_info,
+        "order_note": order_note
+    }
+
+
+def send_employer_invoice(employerNumber : int, orderId : str, db : Session, context : dict = None):
 
-    decoded_string = html.unescape(order_note_string)
-    order_note = json.loads(decoded_string)
+    context = context or load_order_context(employerNumber, orderId, db)
+    transaction = context["transaction"]
+    month, year = context["month"], context["year"]
+    order_info = context["order_info"]
+    order_note = context["order_note"]
 
     print("Order Note:", order_note)
     print("Order Info Bonus:", order_note["bonus"])
@@ -271,35 +297,23 @@ def send_employer_invoice(employerNumber : int, orderId : str, db : Session):
 
 # making the entry in the salary details table from which employer what amount has been paid and what was the bonus amount in it and what was the main salary amount.
 
-def update_salary_details(employerNumber : int, orderId : str, db : Session):
-
-    item = db.query(models.worker_employer).where(models.worker_employer.c.employer_number == employerNumber, models.worker_employer.c.order_id==orderId).first()
-
-    ps_month = previous_month()
-    month  = ""
-    year = ""
-
-    day_only = current_date().day
-    if(abs(31-day_only) >= abs(1-day_only)):
-        month = ps_month
-        if month == "December":
-            year = current_year() - 1
-
-        else:
-            year = current_year()
-
-    else:
-        month = current_month()
-        year = current_year()
-
-    order_info = cashfree_api.check_order_status(orderId)
-    order_note_string = order_info["order_note"]
+def update_salary_details(employerNumber : int, orderId : str, db : Session, context : dict = None):
 
-    decoded_string = html.unescape(order_note_string)
-    order_note = json.loads(decoded_string)
+    context = context or load_order_context(employerNumber, orderId, db)
+    item = context["transaction"]
+    month, year = context["month"], context["year"]
+    order_info = context["order_info"]
+    order_note = context["order_note"]
 
     print("Order Note:", order_note)
 
+    # the ledger row and the cash advance updates are committed together below, so a row for
+    # this order means the stage already ran; a retry or a second call must not deduct twice
+    if db.query(models.SalaryDetails.id).filter(models.SalaryDetails.order_id == orderId).first():
+        return {
+            "Message": "Salary details already updated for this order."
+        }
+
     update_salary_mgmt = update(models.SalaryManagementRecords).where(
         models.SalaryManagementRecords.order_id == orderId
     ).values(
@@ -310,8 +324,6 @@ def update_salary_details(employerNumber : int, orderId : str, db : Session):
     new_entry = models.SalaryDetails(id = generate_unique_id(), employerNumber = employerNumber, worker_id = item.worker_id, employer_id = item.employer_id, totalAmount = order_info["order_amount"], salary = order_note["salary"], bonus = order_note["bonus"], cashAdvance = order_note["cashAdvance"], repayment = order_note["repayment"], attendance = order_note["attendance"], month = month, year = year, order_id = orderId, deduction= order_note["deduction"])
 
     db.add(new_entry)
-    db.commit()
-    db.refresh(new_entry)
     
     repayment_paid = order_note["repayment"]
     cash_advance_paid = order_note["cashAdvance"]
@@ -320,8 +332,8 @@ def update_salary_details(employerNumber : int, orderId : str, db : Session):
         cash_advance_record = db.query(models.CashAdvanceManagement).filter(models.CashAdvanceManagement.order_id == orderId).first()
 
         cash_advance_record.payment_status = "SUCCESS"
-        db.commit()
-        db.refresh(cash_advance_record)
+        # flushed so the repayment lookup below sees the advance as paid, as it did when this was committed
+        db.flush()
 
     if repayment_paid > 0:
 
@@ -329,8 +341,8 @@ def update_salary_details(employerNumber : int, orderId : str, db : Session):
 
         if cash_advance_record:
             cash_advance_record.cashAdvance -= repayment_paid
-            db.commit()
-            db.refresh(cash_advance_record)
+
+    db.commit()
 
     return {
         "Message": "Salary details updated successfully."
@@ -362,8 +374,6 @@ def download_worker_salary_slip(workerNumber: int, month : str, year : int, db :
 
 def send_worker_salary_slips(db : Session) :
 
-    total_workers = db.query(models.Domestic_Worker).all()
-
     year = current_year()
     month = current_month()
     ps_month = previous_month()
@@ -375,51 +385,44 @@ def send_worker_salary_slips(db : Session) :
     else:
         month = ps_month
 
-    for worker in total_workers:
-
-        salary_slip_generation.generate_salary_slip(worker.workerNumber, month, year, db)
-        worker_salary_slip_name = f"{worker.workerNumber}_SS_{month}_{year}.pdf"
-        object_name = f"salarySlips/{worker_salary_slip_name}"
-        
-        static_dir = os.path.join(os.getcwd(), 'static')
-        filePath = os.path.join(static_dir, f"{worker.id}_SS_{month}_{year}.pdf")
-
-        print(f"the pdf path is : {filePath}")
-        uploading_files_to_spaces.upload_file_to_spaces(filePath, object_name)
-        # whatsapp_message.worker_salary_slip_message()
+    return salary_slip_batch.generate_salary_slips(month, year, db)
         
 
 # send greetings message to the employers
-def send_greetings(db : Session):
+def send_greetings(db : Session, run_id : str = None):
 
-    total_employers = db.query(models.Employer).all()
     template_name = "dusshera_greetings"
     file_type = "video"
     file_url = "https://bb.branding-element.com/prod/118331/118331-01102025_184914-dusshera_video.mp4"
 
-    for employer in total_employers:
-        whatsapp_message.send_greetings_with_file_type(employer.employerNumber, template_name, file_type, file_url)
+    summary = broadcast.run_broadcast(
+        run_id or broadcast.new_run_id(f"{template_name}-{current_date()}"),
+        "media_template",
+        {"template_name": template_name, "file_type": file_type, "file_url": file_url},
+        broadcast.all_employers(db)
+    )
 
     return {
-        "MESSAGE" : "Greetings sent successfully."
+        "MESSAGE" : "Greetings sent successfully.",
+        "summary" : summary
     }
     
-def send_apology_message(db: Session):
-    # Get distinct employer numbers
-    distinct_employers = db.query(models.worker_employer.c.employer_number).distinct().all()
+def send_apology_message(db: Session, run_id : str = None):
     template_name = "apology_message"
 
-    # whatsapp_message.send_greetings(917665292549, template_name)
-    for employer in distinct_employers:
-        whatsapp_message.send_greetings(employer.employer_number, template_name)
+    summary = broadcast.run_broadcast(
+        run_id or broadcast.new_run_id(f"{template_name}-{current_date()}"),
+        "template",
+        {"template_name": template_name},
+        broadcast.employers_with_workers(db)
+    )
 
     return {
-        "MESSAGE": "Apology messages sent successfully."
+        "MESSAGE": "Apology messages sent successfully.",
+        "summary": summary
     }
 
-def salary_payment_reminder(db : Session):
-
-    transactions = db.query(models.worker_employer).all()
+def salary_payment_reminder(db : Session, run_id : str = None):
 
     month = current_month()
     year = current_year()
@@ -432,19 +435,13 @@ def salary_payment_reminder(db : Session):
     else:
         month = ps_month
 
-    for item in transactions:
-        
-        if item.employer_number == 917015645195 or item.employer_number == 919731011117 or item.employer_number == 917022878346 or item.employer_number == 919920802613 or item.employer_number == 919380496287 or item.employer_number == 919845445408:
-            continue
-
-        response_data = cashfree_api.check_order_status(order_id=item.order_id)
-        order_status = response_data.get("order_status")
-
-        if order_status == "PAID":
-            continue
-        
-        payment_session_id = response_data.get("payment_session_id")
-        whatsapp_message.send_whatsapp_message(item.employer_number, item.worker_name, f"{month} {year}", payment_session_id, "salary_reminder")
+    # orders that are already PAID are skipped by the sender, after a cached status lookup
+    return broadcast.run_broadcast(
+        run_id or broadcast.new_run_id(f"salary_reminder-{current_date()}"),
+        "salary_reminder",
+        {"template_name": "salary_reminder", "period": f"{month} {year}"},
+        broadcast.salary_reminder_audience(db)
+    )
 
 
 def find_all_workers(employerNumber : int, db : Session):
@@ -1007,7 +1004,7 @@ def mark_leave(employerNumber : int, workerName : str, db: Session):
 def extract_pan_card_details(image_url):
     try:
         # Download image from URL
-        response = requests.get(image_url)
+        response = http_client.get(image_url)
         image = Image.open(BytesIO(response.content))
 
         genai.configure(api_key=google_api_key)
@@ -1050,7 +1047,7 @@ def extract_pan_card_details(image_url):
 def extract_passbook_details(image_url):
     try:
         # Download image from URL
-        response = requests.get(image_url)
+        response = http_client.get(image_url)
         image = Image.open(BytesIO(response.content))
 
         genai.configure(api_key=google_api_key)
@@ -1102,7 +1099,7 @@ def extract_document_details(media_id: str) -> dict:
             "D360-API-KEY": orai_api_key
         }
 
-        response_1 = requests.get(f"https://waba-v2.360dialog.io/{media_id}", headers=headers)
+        response_1 = http_client.get(f"https://waba-v2.360dialog.io/{media_id}", headers=headers)
         print("Response 1 Status Code:", response_1.status_code)
         print("Response 1 Content:", response_1.text)
         print("Just Response 1:", response_1)
@@ -1121,7 +1118,7 @@ def extract_document_details(media_id: str) -> dict:
         whatsapp_path = image_url[whatsapp_index:]
 
         # Download the actual image file
-        response_2 = requests.get(f"https://waba-v2.360dialog.io/{whatsapp_path}", headers=headers, stream=True)
+        response_2 = http_client.get(f"https://waba-v2.360dialog.io/{whatsapp_path}", headers=headers, stream=True)
         if response_2.status_code != 200:
             return f"Failed to download image: {response_2.status_code} {response_2.text}"
         
@@ -1470,7 +1467,7 @@ def upload_media_to_360dialog(file_path: str, orai_api_key: str = None) -> str:
         files = {
             "file": (os.path.basename(file_path), f, mime_type)
         }
-        resp = requests.post(url, headers=headers, data=data, files=files, timeout=60)
+        resp = http_client.post(url, headers=headers, data=data, files=files, timeout=60)
 
     if resp.status_code not in (200, 201):
         raise RuntimeError(
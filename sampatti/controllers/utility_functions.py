@@ -24,6 +24,7 @@ from azure.storage.filedatalake import ContentSettings
 import mimetypes
 import logging
 from pprint import pprint
+from . import http_client
 
 
 logging.basicConfig(
@@ -445,7 +446,7 @@ def call_sarvam_api(file_path):
 
     with open(file_path, 'rb') as file:
         files = { "file": (os.path.basename(file_path), file, "audio/wav")}
-        response = requests.post(url, headers=headers, files=files)
+        response = http_client.post(url, headers=headers, files=files)
 
     print(response.json())
 
@@ -475,7 +476,7 @@ def translate_text_sarvam(text: str, source_language: str, target_language: str)
             "model": "mayura:v1"
         }
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_client.post(url, json=payload, headers=headers)
 
         if response.status_code == 200:
             translated_text = response.json().get("translated_text", "")
@@ -520,7 +521,7 @@ def send_audio_sarvam(sample_output: str, employerNumber: int, user_language: st
         }
 
         # Make API request
-        response = requests.post(url, headers=headers, json=data)
+        response = http_client.post(url, headers=headers, json=data)
 
         if response.status_code == 200:
             result = response.json()
@@ -603,7 +604,7 @@ def send_audio(sample_output: str, employerNumber: int, user_language: str):
         }
         
         # Make API request
-        response = requests.post(url, headers=headers, json=data)
+        response = http_client.post(url, headers=headers, json=data)
         
         if response.status_code == 200:
             # Save the audio content directly
@@ -659,7 +660,7 @@ def question_language_audio(output_directory: str, sample_output: str, surveyId
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_client.post(url, json=payload, headers=headers)
         response_data = response.json()
         base64_string = response_data["audios"][0] 
 
@@ -1028,7 +1029,7 @@ async def initialize_job():
         }
     }
     
-    response = requests.post(url, headers=headers, json=data)
+    response = http_client.post(url, headers=headers, json=data)
     print("\nInitialize Job Response:")
     print(f"Status Code: {response.status_code}")
     print("Response Body:")
@@ -1043,7 +1044,7 @@ async def check_job_status(job_id):
     print(f"\n🔍 Checking status for job: {job_id}")
     url = f"https://api.sarvam.ai/speech-to-text-translate/job/{job_id}/status"
     headers = {"API-Subscription-Key": sarvam_api_key}
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
     print("\nJob Status Response:")
     print(f"Status Code: {response.status_code}")
     print("Response Body:")
@@ -1065,7 +1066,7 @@ async def start_job(job_id):
     print("\\nRequest Body:")
     pprint(data)
 
-    response = requests.post(url, headers=headers, json=data)
+    response = http_client.post(url, headers=headers, json=data)
     print("\nStart Job Response:")
     print(f"Status Code: {response.status_code}")
     print("Response Body:")
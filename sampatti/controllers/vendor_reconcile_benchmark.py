@@ -0,0 +1,97 @@
+import argparse, time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from .. import models
+from .sheet_sync import SheetSyncSession
+from .vendor_reconciliation import VENDOR_STATUS_CHECKS_PER_SECOND, VENDOR_STATUS_WORKERS, reconcile_vendor_statuses
+
+# reconcile time with one worker and with VENDOR_STATUS_WORKERS, under the production rate limit
+# (VENDOR_STATUS_CHECKS_PER_SECOND, 10/s by default). The limit bounds a run at checks / rate
+# whatever the concurrency: 5,000 rows need 3,500 checks, about 350s with one worker or eight.
+# Workers only help when one worker cannot keep up with the limit (latency above 1 / rate);
+# with the limit lifted (--checks-per-second 1000) and 20ms responses the same sheet takes
+# 71.5s with one worker and 9.2s with eight.
+
+HEADER = ["worker_number", "employer_number", "UPI", "bank_account_number", "ifsc_code", "PAN_number", "vendorId",
+          "cashfree_vendor_add_status", "bank_account_name_cashfree", "pan_card_name_cashfree", "confirmation_message"]
+
+
+class FakeSheet:
+    """Onboarding sheet held in memory; only the calls the sync session makes"""
+
+    title = "benchmark onboarding sheet"
+
+    def __init__(self, rows):
+        self.values = [HEADER] + rows
+
+    def get_all_records(self):
+        return [dict(zip(HEADER, row)) for row in self.values[1:]]
+
+    def get_all_values(self):
+        return [list(row) for row in self.values]
+
+    def batch_update(self, data, value_input_option=None):
+        pass
+
+
+def synthetic_rows(count: int):
+    """A mix of onboarding rows: confirmed, active, pending and without a vendorId"""
+    rows = []
+    for index in range(count):
+        worker_number = 910000000000 + index
+        status, confirmation, vendor_id = "", "", f"VENDOR{index}"
+        if index % 10 == 0:
+            confirmation = "SENT"
+        elif index % 10 == 1:
+            status = "ACTIVE"
+        elif index % 10 == 2:
+            vendor_id = ""
+        rows.append([worker_number, 918000000000 + index, f"worker{index}@upi", "", "", f"ABCDE{index:04d}F", vendor_id,
+                     status, f"Worker {index}", f"Worker {index}", confirmation])
+    return rows
+
+
+def fake_check_status(latency: float):
+    def check_status(vendor_id):
+        time.sleep(latency)
+        number = int(vendor_id[len("VENDOR"):])
+        return {
+            "status": "ACTIVE" if number % 3 else "IN_REVIEW",
+            "remarks": "",
+            "related_docs": [{"remarks": ""}, {"remarks": "PAN verified"}],
+        }
+    return check_status
+
+
+def run(rows: int, latency: float, max_workers: int, checks_per_second: float) -> dict:
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        # a tenth of the workers is already in the database
+        db.add_all([models.Domestic_Worker(id=f"existing-{index}", name=f"Worker {index}", workerNumber=910000000000 + index, vendorId=f"VENDOR{index}")
+                    for index in range(1, rows, 10)])
+        db.commit()
+        with SheetSyncSession(FakeSheet(synthetic_rows(rows))) as session:
+            return reconcile_vendor_statuses(session, db, fake_check_status(latency), max_workers, checks_per_second)
+    finally:
+        db.close()
+
+
+def main(rows: int, latency: float, checks_per_second: float):
+    for label, max_workers in (("serial", 1), ("concurrent", VENDOR_STATUS_WORKERS)):
+        summary = run(rows, latency, max_workers, checks_per_second)
+        print(f"{label} ({max_workers} workers): {rows} rows, {summary['checked']} checked, "
+              f"{summary['workers_created']} workers created, reconcile {summary['timings']['total_seconds']}s "
+              f"(rate limit floor {summary['checked'] / checks_per_second:.1f}s at {checks_per_second:g}/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure vendor status reconciliation time on a synthetic onboarding sheet.")
+    parser.add_argument("--rows", type=int, default=5000, help="Number of onboarding sheet rows.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated Cashfree response time in seconds.")
+    parser.add_argument("--checks-per-second", type=float, default=VENDOR_STATUS_CHECKS_PER_SECOND,
+                        help="Rate limit for the vendor status checks; defaults to the production VENDOR_STATUS_CHECKS_PER_SECOND.")
+
+    args = parser.parse_args()
+    main(args.rows, args.latency, args.checks_per_second)
@@ -0,0 +1,168 @@
+import os, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from . import cashfree_api
+from .rate_limiter import TokenBucket
+from .sheet_sync import SheetSyncSession
+
+load_dotenv()
+VENDOR_STATUS_WORKERS = int(os.environ.get('VENDOR_STATUS_WORKERS', 8))
+VENDOR_STATUS_CHECKS_PER_SECOND = float(os.environ.get('VENDOR_STATUS_CHECKS_PER_SECOND', 10))
+
+# a pass over the onboarding sheet:
+#   plan   - rows without a vendorId, rows already confirmed (SENT) and ACTIVE rows whose
+#            worker is in the database are settled and skipped; existing workers for the
+#            rest are loaded with one IN query
+#   fetch  - Cashfree vendor statuses for the remaining rows, concurrently under a rate limit
+#   apply  - sheet updates go to the sync session, new workers are inserted in one transaction
+
+
+def _worker_number(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fetch_status(check_status: Callable, bucket: TokenBucket, vendor_id: str):
+    bucket.acquire()
+    try:
+        return check_status(vendor_id)
+    except Exception as e:
+        print(f"Error checking status for vendorId {vendor_id}: {e}")
+        return None
+
+
+def reconcile_vendor_statuses(
+    session: SheetSyncSession,
+    db: Session,
+    check_status: Callable = None,
+    max_workers: int = VENDOR_STATUS_WORKERS,
+    checks_per_second: float = VENDOR_STATUS_CHECKS_PER_SECOND
+) -> Dict:
+    """Update vendor statuses of the onboarding sheet and create the workers whose vendor became ACTIVE"""
+    from .userControllers import build_domestic_worker
+
+    check_status = check_status or cashfree_api.check_vendor_status
+    started = time.perf_counter()
+    summary = {"rows": len(session.records), "skipped": 0, "checked": 0, "active": 0, "not_active": 0, "errors": 0, "workers_created": 0}
+
+    candidates = []
+    for idx, row in session.rows():
+        vendor_id = str(row.get("vendorId", "")).strip()
+        if not vendor_id:
+            print(f"[{idx}] No vendorId found")
+            summary["skipped"] += 1
+            continue
+        if str(row.get("confirmation_message", "")).strip() == "SENT":
+            summary["skipped"] += 1
+            continue
+        candidates.append((idx, row, vendor_id))
+
+    worker_numbers = {_worker_number(row.get("worker_number")) for _, row, _ in candidates} - {None}
+    existing_workers = {}
+    if worker_numbers:
+        for worker in db.query(models.Domestic_Worker).filter(models.Domestic_Worker.workerNumber.in_(worker_numbers)).all():
+            existing_workers[worker.workerNumber] = worker
+
+    pending = []
+    for idx, row, vendor_id in candidates:
+        if str(row.get("cashfree_vendor_add_status", "")).strip() == "ACTIVE" and _worker_number(row.get("worker_number")) in existing_workers:
+            summary["skipped"] += 1
+            continue
+        pending.append((idx, row, vendor_id))
+
+    planned = time.perf_counter()
+
+    bucket = TokenBucket(checks_per_second)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        responses = list(executor.map(lambda item: _fetch_status(check_status, bucket, item[2]), pending))
+    summary["checked"] = len(pending)
+    fetched = time.perf_counter()
+
+    new_workers = []
+    for (idx, row, vendor_id), status_response in zip(pending, responses):
+        try:
+            pan_remarks = status_response["related_docs"][1]["remarks"]
+            remarks = status_response["remarks"]
+            final_remarks = f"{remarks} || {pan_remarks}"
+            vendor_status = status_response["status"].upper()
+        except Exception as e:
+            print(f"[{idx}] Error checking status for vendorId {vendor_id}: {e}")
+            summary["errors"] += 1
+            session.keep_open(idx)
+            continue
+
+        if vendor_status != "ACTIVE":
+            print(f"[{idx}] Vendor {vendor_id} status = {vendor_status}. Updating status in sheet and logging failure.")
+            session.update(idx, "cashfree_vendor_add_status", f"NOT ACTIVE - {final_remarks}")
+            summary["not_active"] += 1
+            # polled again next run until Cashfree activates the vendor
+            session.keep_open(idx)
+            continue
+
+        session.update(idx, "cashfree_vendor_add_status", "ACTIVE")
+        summary["active"] += 1
+
+        worker_number = _worker_number(row.get("worker_number"))
+        existing_worker = existing_workers.get(worker_number)
+        if existing_worker:
+            # Update the sheet with existing vendorId if different
+            if existing_worker.vendorId and existing_worker.vendorId != vendor_id:
+                session.update(idx, "vendorId", existing_worker.vendorId)
+                print(f"[{idx}] Updated sheet with existing vendorId: {existing_worker.vendorId}")
+            continue
+
+        try:
+            bank_account_number = str(row.get("bank_account_number", "")).strip()
+            upi_id = str(row.get("UPI", "")).strip()
+            ifsc_code = str(row.get("ifsc_code", "")).strip()
+            worker = build_domestic_worker(schemas.Domestic_Worker(
+                name = str(row.get("bank_account_name_cashfree", "")).strip() or str(row.get("pan_card_name_cashfree", "")).strip(),
+                email = "sample@sample.com",
+                workerNumber = worker_number,
+                employerNumber = _worker_number(row.get("employer_number")),
+                panNumber = str(row.get("PAN_number", "")).strip(),
+                upi_id = upi_id if upi_id else "None",
+                accountNumber = bank_account_number if bank_account_number else "None",
+                ifsc = ifsc_code if bank_account_number else "None",
+                vendorId = vendor_id
+            ))
+        except Exception as e:
+            print(f"[{idx}] Error preparing worker {worker_number}: {e}")
+            summary["errors"] += 1
+            session.keep_open(idx)
+            continue
+
+        # a worker onboarded by two employers appears on two rows but is created once
+        existing_workers[worker_number] = worker
+        new_workers.append((idx, worker))
+
+    if new_workers and not session.dry_run:
+        try:
+            db.add_all([worker for _, worker in new_workers])
+            db.commit()
+            summary["workers_created"] = len(new_workers)
+        except Exception as e:
+            db.rollback()
+            print(f"Error creating workers from vendor statuses: {e}")
+            summary["errors"] += len(new_workers)
+            for idx, _ in new_workers:
+                session.keep_open(idx)
+    elif session.dry_run:
+        # a dry run still looks the statuses up (read only) but writes nothing
+        for idx, worker in new_workers:
+            session.plan(idx, f"create worker {worker.workerNumber} with vendorId {worker.vendorId}")
+
+    finished = time.perf_counter()
+    summary["timings"] = {
+        "plan_seconds": round(planned - started, 3),
+        "fetch_seconds": round(fetched - planned, 3),
+        "apply_seconds": round(finished - fetched, 3),
+        "total_seconds": round(finished - started, 3),
+    }
+    print("Vendor reconciliation summary: ", summary)
+    return summary
@@ -0,0 +1,184 @@
+import json, os, sqlite3, time, threading
+import httpx, requests
+from dotenv import load_dotenv
+from sqlalchemy.exc import OperationalError
+
+load_dotenv()
+WEBHOOK_QUEUE_PATH = os.environ.get('WEBHOOK_QUEUE_PATH', os.path.join(os.getcwd(), 'webhook_queue.db'))
+VISIBILITY_TIMEOUT = int(os.environ.get('WEBHOOK_QUEUE_VISIBILITY_TIMEOUT', 300))
+MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_QUEUE_MAX_ATTEMPTS', 3))
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+# jobs move pending -> processing -> done, or back to pending on failure until
+# MAX_ATTEMPTS is reached and they are parked as dead.
+# a processing job whose visible_at has passed is treated as abandoned by a
+# crashed consumer and can be claimed again; a live consumer keeps pushing
+# visible_at forward (extend) for as long as its jobs are in flight.
+# only transient failures (is_retryable) go back to the queue, and a message whose
+# reply was already sent (mark_replied) is not processed again.
+
+_local = threading.local()
+
+
+def get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(WEBHOOK_QUEUE_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                shard_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                visible_at REAL NOT NULL,
+                claimed_by TEXT,
+                finished_at REAL,
+                error TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_visible ON jobs (status, visible_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_shard_status ON jobs (shard_key, status, id)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS replies (
+                message_id TEXT PRIMARY KEY,
+                replied_at REAL NOT NULL
+            )
+        """)
+        _local.conn = conn
+    return conn
+
+
+def enqueue(payload : dict, shard_key : str):
+    conn = get_connection()
+    now = time.time()
+    cursor = conn.execute(
+        "INSERT INTO jobs (shard_key, payload, enqueued_at, visible_at) VALUES (?, ?, ?, ?)",
+        (str(shard_key or ""), json.dumps(payload, separators=(',', ':')), now, now)
+    )
+    return cursor.lastrowid
+
+
+def claim(consumer_id : str, visibility_timeout : int = VISIBILITY_TIMEOUT):
+
+    # only the oldest unfinished job of each shard is claimable, which keeps
+    # messages from the same employer in order across consumer processes.
+    conn = get_connection()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("""
+            SELECT j.* FROM jobs j
+            WHERE j.status IN ('pending', 'processing') AND j.visible_at <= ?
+            AND NOT EXISTS (
+                SELECT 1 FROM jobs e
+                WHERE e.shard_key = j.shard_key AND e.id < j.id AND e.status IN ('pending', 'processing')
+            )
+            ORDER BY j.id LIMIT 1
+        """, (now,)).fetchone()
+
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+
+        conn.execute(
+            "UPDATE jobs SET status = 'processing', attempts = attempts + 1, claimed_by = ?, visible_at = ? WHERE id = ?",
+            (consumer_id, now + visibility_timeout, row["id"])
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return {
+        "id": row["id"],
+        "shard_key": row["shard_key"],
+        "payload": json.loads(row["payload"]),
+        "attempts": row["attempts"] + 1,
+        "enqueued_at": row["enqueued_at"]
+    }
+
+
+def extend(job_ids, consumer_id : str, visibility_timeout : int = VISIBILITY_TIMEOUT):
+    """Heartbeat: keep this consumer's in-flight jobs from being reclaimed"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return 0
+    conn = get_connection()
+    placeholders = ",".join("?" * len(job_ids))
+    cursor = conn.execute(
+        f"UPDATE jobs SET visible_at = ? WHERE status = 'processing' AND claimed_by = ? AND id IN ({placeholders})",
+        (time.time() + visibility_timeout, consumer_id, *job_ids)
+    )
+    return cursor.rowcount
+
+
+def ack(job_id : int):
+    conn = get_connection()
+    conn.execute("UPDATE jobs SET status = 'done', finished_at = ?, error = NULL WHERE id = ?", (time.time(), job_id))
+
+
+def fail(job_id : int, error : str, max_attempts : int = MAX_ATTEMPTS):
+    conn = get_connection()
+    now = time.time()
+    row = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return
+
+    if row["attempts"] >= max_attempts:
+        conn.execute("UPDATE jobs SET status = 'dead', finished_at = ?, error = ? WHERE id = ?", (now, error, job_id))
+    else:
+        backoff = 2 ** row["attempts"]
+        conn.execute("UPDATE jobs SET status = 'pending', visible_at = ?, error = ? WHERE id = ?", (now + backoff, error, job_id))
+
+
+def is_retryable(e : Exception) -> bool:
+    """Transient failures (timeouts, dropped connections, 429/5xx, a locked database) are worth another attempt"""
+    status = getattr(e, "status_code", None) or getattr(e, "status", None) or getattr(getattr(e, "response", None), "status_code", None)
+    if status in RETRYABLE_STATUS_CODES:
+        return True
+    if isinstance(e, (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout, httpx.TransportError, OperationalError)):
+        return True
+    # the LLM clients' transport errors carry no status code
+    return type(e).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def mark_replied(message_id : str):
+    if message_id:
+        get_connection().execute("INSERT OR IGNORE INTO replies (message_id, replied_at) VALUES (?, ?)", (message_id, time.time()))
+
+
+def was_replied(message_id : str) -> bool:
+    if not message_id:
+        return False
+    return get_connection().execute("SELECT 1 FROM replies WHERE message_id = ?", (message_id,)).fetchone() is not None
+
+
+def purge_finished(older_than_seconds : int = 7 * 24 * 3600):
+    conn = get_connection()
+    cutoff = time.time() - older_than_seconds
+    cursor = conn.execute("DELETE FROM jobs WHERE status = 'done' AND finished_at < ?", (cutoff,))
+    conn.execute("DELETE FROM replies WHERE replied_at < ?", (cutoff,))
+    return cursor.rowcount
+
+
+def queue_stats():
+    conn = get_connection()
+    now = time.time()
+
+    counts = {row["status"]: row["total"] for row in conn.execute("SELECT status, COUNT(*) AS total FROM jobs GROUP BY status")}
+    oldest_pending = conn.execute("SELECT MIN(enqueued_at) AS oldest FROM jobs WHERE status IN ('pending', 'processing')").fetchone()["oldest"]
+    stale_processing = conn.execute("SELECT COUNT(*) AS total FROM jobs WHERE status = 'processing' AND visible_at <= ?", (now,)).fetchone()["total"]
+
+    return {
+        "depth": counts.get("pending", 0),
+        "in_flight": counts.get("processing", 0),
+        "done": counts.get("done", 0),
+        "dead": counts.get("dead", 0),
+        "expired_visibility": stale_processing,
+        "consumer_lag_seconds": round(now - oldest_pending, 2) if oldest_pending else 0
+    }
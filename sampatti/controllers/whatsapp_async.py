@@ -0,0 +1,183 @@
+import asyncio, os
+import httpx
+from fastapi import HTTPException
+from dotenv import load_dotenv
+from . import http_client, whatsapp_message
+from . import whatsapp_payloads as payloads
+
+load_dotenv()
+WHATSAPP_SEND_CONCURRENCY = int(os.environ.get('WHATSAPP_SEND_CONCURRENCY', 10))
+
+# async variants of the whatsapp_message senders, for webhook handlers and agents that
+# send several messages at once. They build the same requests (whatsapp_payloads) and
+# share one httpx connection pool per event loop (http_client.get_async_http_client).
+
+
+async def _post(request: dict) -> httpx.Response:
+    if "data" in request:
+        # httpx takes an encoded body as content
+        request = dict(request, content=request["data"])
+        del request["data"]
+    return await http_client.get_async_http_client().post(**request)
+
+
+async def send_whatsapp_message(employerNumber, worker_name, param3, link_param, template_name):
+    response = await _post(payloads.payment_link_request(employerNumber, worker_name, param3, link_param, template_name))
+    payloads.report_send(response, f"Worker name : {worker_name}, Employer name : {employerNumber}")
+    return response
+
+
+async def send_greetings(employerNumber, template_name):
+    response = await _post(payloads.greetings_request(employerNumber, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
+
+
+async def send_v2v_message(employerNumber, text, template_name):
+    response = await _post(payloads.v2v_request(employerNumber, text, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
+
+
+async def send_intro_video(employerNumber, template_name):
+    response = await _post(payloads.intro_video_request(employerNumber, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
+
+
+async def send_greetings_with_file_type(employerNumber, template_name, file_type, file_url):
+    response = await _post(payloads.media_template_request(employerNumber, template_name, file_type, file_url))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
+
+
+async def send_template_message(employerNumber, template_name):
+    response = await _post(payloads.plain_template_request(employerNumber, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
+
+
+async def send_referral_message_to_employer(employerNumber, template_name, referral_code):
+    response = await _post(payloads.referral_request(employerNumber, template_name, referral_code))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
+
+
+async def rashmita_sample_payment_link(employerNumber, workerName, salary, advance, total_amount, link_param, template_name):
+    response = await _post(payloads.sample_payment_link_request(employerNumber, workerName, salary, advance, total_amount, link_param, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
+
+
+async def employer_contract_template(employerNumber, worker_name, media_id, template_name):
+    response = await _post(payloads.employer_contract_request(employerNumber, worker_name, media_id, template_name))
+
+    if response.status_code == 200:
+        print(f"✅ Message sent successfully. Employer: {employerNumber}")
+        return response.json()
+    else:
+        print(f"❌ Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+        return None
+
+
+async def send_message_user(employer_number, body: str):
+    response = await _post(payloads.text_message_request(employer_number, body))
+    print(response.text)
+    return response
+
+
+async def send_whatsapp_audio(audio_media_id : str, employerNumber : int):
+    response = await _post(payloads.audio_message_request(audio_media_id, employerNumber))
+    print(response.text)
+    return response
+
+
+async def display_user_message_on_xbotic(employee_number, text: str):
+    response = None
+    try:
+        response = await _post(payloads.xbotic_request(employee_number, text))
+        print("Response:", response.text)
+        print("Status Code:", response.status_code)
+        response.raise_for_status()
+        return {
+            'success': True,
+            'status_code': response.status_code,
+            'data': response.json() if response.content else None
+        }
+    except httpx.HTTPError as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'status_code': response.status_code if response is not None else None
+        }
+
+
+async def generate_mediaId(path : str, folder : str):
+    static_pdf_path = os.path.join(os.getcwd(), folder, path)
+    if not os.path.exists(static_pdf_path):
+        raise HTTPException(status_code=404, detail="PDF file not found")
+
+    try:
+        with open(static_pdf_path, "rb") as file:
+            content = file.read()
+        response = await http_client.get_async_http_client().post(
+            payloads.D360_MEDIA_URL,
+            headers=payloads.d360_headers(content_type=None),
+            data={"messaging_product": "whatsapp"},
+            files={"file": (path, content, "application/pdf")}
+        )
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"Exception occurred: {e}")
+        raise HTTPException(status_code=500, detail="Generating the media Id.")
+
+
+async def generate_audio_media_id(path : str, folder : str):
+    file_path = os.path.join(os.getcwd(), folder, path)
+    headers = payloads.d360_headers(content_type=None)
+    headers['Accept'] = 'application/json'
+
+    try:
+        with open(file_path, 'rb') as file:
+            content = file.read()
+        response = await http_client.get_async_http_client().post(
+            payloads.D360_MEDIA_URL,
+            headers=headers,
+            data={'messaging_product': 'whatsapp'},
+            files=[('file', ('output.ogg', content, 'audio/opus'))]
+        )
+        return response.json()
+    except Exception as e:
+        print(f"Exception occurred: {e}")
+        raise HTTPException(status_code=500, detail="Generating the audio media Id.")
+
+
+async def twilio_send_text_message(mobileNumber, body):
+    # the Twilio SDK only blocks, so it runs on the default executor
+    return await asyncio.to_thread(whatsapp_message.twilio_send_text_message, mobileNumber, body)
+
+
+async def send_concurrently(sends, concurrency: int = WHATSAPP_SEND_CONCURRENCY) -> list:
+    """Await the given sends with at most `concurrency` in flight.
+
+    Results come back in the order of `sends`; a send that raised has its exception in its place.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(send):
+        async with semaphore:
+            return await send
+
+    return await asyncio.gather(*(bounded(send) for send in sends), return_exceptions=True)
+
+
+def run_concurrently(sends, concurrency: int = WHATSAPP_SEND_CONCURRENCY) -> list:
+    """send_concurrently for blocking code (cron jobs, thread pool workers); not for use inside an event loop"""
+    async def run():
+        try:
+            return await send_concurrently(sends, concurrency)
+        finally:
+            await http_client.close_async_http_client()
+
+    return asyncio.run(run())
@@ -5,160 +5,38 @@ from dotenv import load_dotenv
 import os
 from twilio.rest import Client
 from sampatti.models import Employer
+from . import http_client
+from . import whatsapp_payloads as payloads
 
 load_dotenv()
-orai_api_key = os.environ.get('ORAI_API_KEY')
-orai_namespace = os.environ.get('ORAI_NAMESPACE')
 twilio_account_sid = os.environ.get("TWILIO_ACCOUNT_SID")
 twilio_auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
 twilio_whatsapp_number = os.environ.get("TWILIO_WHATSAPP_NUMBER")
-#authourization_message = os.environ.get('ORAI_AUTHERIZATION_MESSEGE')
-authorization_message = os.environ.get('ORAI_AUTHORIZATION_MESSAGE')
+
+# blocking senders over the shared requests pool; whatsapp_async has the same sends for
+# async callers, built from the same whatsapp_payloads requests. Senders that never returned
+# their response still return None: routes hand the result to FastAPI, and serializing a
+# requests.Response would expose the request headers (API keys).
 
 # send template messages - payment link, invoice message and worker salary slip message
 
 def send_whatsapp_message(employerNumber, worker_name, param3, link_param,template_name):
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "template": {
-            "namespace": orai_namespace,
-            "name": template_name,
-            "components": [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": employerNumber
-                        },
-                        {
-                            "type": "text",
-                            "text": worker_name
-                        },
-                        {
-                            "type": "text",
-                            "text": param3
-                        }
-                    ]
-                },
-                {
-                    "index": 0,
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": link_param
-                        }
-                    ],
-                    "sub_type": "url",
-                    "type": "button"
-                }
-            ],
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            }
-        },
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template"
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Worker name : {worker_name}, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.payment_link_request(employerNumber, worker_name, param3, link_param, template_name))
+    payloads.report_send(response, f"Worker name : {worker_name}, Employer name : {employerNumber}")
+    return response
 
 
 # send greetings message
 
 def send_greetings(employerNumber,template_name):
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "template": {
-            "namespace": orai_namespace,
-            "name": template_name,
-            "components": [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": employerNumber
-                        }
-                    ]
-                }
-            ],
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            }
-        },
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template"
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.greetings_request(employerNumber, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
 
 
 def send_v2v_message(employerNumber, text, template_name):
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "template": {
-            "namespace": orai_namespace,
-            "name": template_name,
-            "components": [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": text
-                        }
-                    ]
-                }
-            ],
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            }
-        },
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template"
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.v2v_request(employerNumber, text, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
 
 
 # generate media id for the file uploading
@@ -168,25 +46,20 @@ def generate_mediaId(path : str, folder : str):
 
     print("the code entered media id")
 
-    url = "https://waba-v2.360dialog.io/media"
-
     static_pdf_path = os.path.join(os.getcwd(), folder, path)
     print(static_pdf_path)
 
     if os.path.exists(static_pdf_path):
-        headers = {
-            "D360-API-KEY": orai_api_key
-        }
-
         data = {
             "messaging_product": "whatsapp"
         }
-        files = {
-            "file": (path, open(static_pdf_path, "rb"), "application/pdf")
-        }
         
         try:
-            response = requests.post(url, headers=headers, data=data, files=files)
+            with open(static_pdf_path, "rb") as file:
+                files = {
+                    "file": (path, file, "application/pdf")
+                }
+                response = http_client.post(payloads.D360_MEDIA_URL, headers=payloads.d360_headers(content_type=None), data=data, files=files)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -199,22 +72,19 @@ def generate_mediaId(path : str, folder : str):
 
 def generate_audio_media_id(path : str, folder : str):
 
-    url = "https://waba-v2.360dialog.io/media"
-
     file_path = os.path.join(os.getcwd(), folder, path)
     print("entering into media id for the ogg file.")
     print(file_path)
 
     payload = {'messaging_product': 'whatsapp'}
-    files=[
-        ('file',('output.ogg',open(file_path,'rb'),'audio/opus'))
-    ]
-    headers = {
-        'D360-API-KEY': orai_api_key,
-        'Accept': 'application/json'
-    }
+    headers = payloads.d360_headers(content_type=None)
+    headers['Accept'] = 'application/json'
     try:
-        response = requests.post(url, headers=headers, data=payload, files=files)
+        with open(file_path, 'rb') as file:
+            files=[
+                ('file',('output.ogg',file,'audio/opus'))
+            ]
+            response = http_client.post(payloads.D360_MEDIA_URL, headers=headers, data=payload, files=files)
         return response.json()
     except Exception as e:
         print(f"Exception occurred: {e}")
@@ -223,117 +93,29 @@ def generate_audio_media_id(path : str, folder : str):
 
 def send_whatsapp_audio(audio_media_id : str, employerNumber : int):
 
-    url = "https://waba-v2.360dialog.io/messages"
-
-    payload = json.dumps({
-        "messaging_product": "whatsapp",
-        "recipient_type": "individual",
-        "to": f"{employerNumber}",
-        "type": "audio",
-        "audio": {
-            "id" : f"{audio_media_id}"
-        }
-    })
-
-    headers = {
-    'D360-API-KEY': orai_api_key,
-    'Content-Type': 'application/json'
-    }
-
-    response = requests.post(url, headers=headers, data=payload)
+    response = http_client.post(**payloads.audio_message_request(audio_media_id, employerNumber))
 
     print(response.text)
 
 
 def send_intro_video(employerNumber,template_name):
 
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template",
-        "template" : {
-            "namespace": orai_namespace,
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            },
-            "name": template_name,
-            "components" : [
-
-                {
-                    "type" : "header",
-                    "parameters" : [
-                        {
-                            "type": "video",
-                            "video": {
-                                "link": "https://sampattifilstorage.sgp1.digitaloceanspaces.com/sampatti_card_video_reduced%20(1).mp4"
-                            }
-                        }
-                    ]
-                }
-            ]
-        }
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.intro_video_request(employerNumber, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
 
 
 def send_message_user(employer_number, body: str):
 
-    url = "https://waba-v2.360dialog.io/messages"
-
-    payload = json.dumps({
-        "messaging_product": "whatsapp",
-        "recipient_type": "individual",
-        "to": employer_number,
-        "type": "text",
-        "text": {
-            "body": body
-        }
-    })
-
-    headers = {
-        'D360-API-KEY': orai_api_key,
-        'Content-Type': 'application/json'
-    }
-
-    response = requests.request("POST", url, headers=headers, data=payload)
+    response = http_client.post(**payloads.text_message_request(employer_number, body))
 
     print(response.text)
     
     
 def display_user_message_on_xbotic(employee_number, text: str):
 
-    # API endpoint
-    url = "https://api-xbotic.cbots.live/bot-api/v2.0/customer/71029/bot/732e12160d6e4598/flow/B9DA9D396B2343AFBF5E33420107E9B6"
-    
-    # Headers
-    headers = {
-        'Authorization': authorization_message,  # Use the authorization message from .env
-        'Content-Type': 'application/json'
-    }
-    
-    # Payload
-    data = json.dumps({
-        "user.channel": "whatsapp",
-        "user.phone_no": employee_number,
-        "random_text": text
-    })
-    
     try:
         # Make the POST request
-        response = requests.post(url, headers=headers, data=data)
+        response = http_client.post(**payloads.xbotic_request(employee_number, text))
         print("Response:", response.text)
         print("Status Code:", response.status_code)
 
@@ -358,44 +140,8 @@ def display_user_message_on_xbotic(employee_number, text: str):
 
 def send_referral_message_to_employer(employerNumber, template_name, referral_code):
 
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "template": {
-            "namespace": orai_namespace,
-            "name": template_name,
-            "components": [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": referral_code
-                        }
-                    ]
-                }
-            ],
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            }
-        },
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template"
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.referral_request(employerNumber, template_name, referral_code))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
 
 
 def twilio_send_text_message(mobileNumber, body):
@@ -411,194 +157,24 @@ def twilio_send_text_message(mobileNumber, body):
 
 def send_greetings_with_file_type(employerNumber,template_name, file_type, file_url):
 
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template",
-        "template" : {
-            "namespace": orai_namespace,
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            },
-            "name": template_name,
-            "components" : [
-
-                {
-                    "type" : "header",
-                    "parameters" : [
-                        {
-                            "type": file_type,
-                            file_type: {
-                                "link": file_url
-                            }
-                        }
-                    ]
-                }
-            ]
-        }
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.media_template_request(employerNumber, template_name, file_type, file_url))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
+    return response
 
 
 def send_template_message(employerNumber,template_name):
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "template": {
-            "namespace": orai_namespace,
-            "name": template_name,
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            }
-        },
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template"
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.plain_template_request(employerNumber, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
 
 
 def rashmita_sample_payment_link(employerNumber, workerName, salary, advance, total_amount, link_param, template_name):
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "template": {
-            "namespace": orai_namespace,
-            "name": template_name,
-            "components": [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": employerNumber
-                        },
-                        {
-                            "type": "text",
-                            "text": workerName
-                        },
-                        {
-                            "type": "text",
-                            "text": salary
-                        },
-                        {
-                            "type": "text",
-                            "text": advance
-                        },
-                        {
-                            "type": "text",
-                            "text": total_amount
-                        }
-                    ]
-                },
-                {
-                    "index": 0,
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": link_param
-                        }
-                    ],
-                    "sub_type": "url",
-                    "type": "button"
-                }
-            ],
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            }
-        },
-        "messaging_product": "whatsapp",
-        "to": employerNumber,
-        "type": "template"
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print(f"Message sent successfully, Employer name : {employerNumber}")
-    else:
-        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
+    response = http_client.post(**payloads.sample_payment_link_request(employerNumber, workerName, salary, advance, total_amount, link_param, template_name))
+    payloads.report_send(response, f"Employer name : {employerNumber}")
 
 
 
 def employer_contract_template(employerNumber, worker_name, media_id, template_name):
-    import requests
-
-    url = "https://orailap.azurewebsites.net/api/cloud/Dialog"
-    headers = {
-        "API-KEY": orai_api_key,
-        "Content-Type": "application/json"
-    }
-
-    data = {
-        "messaging_product": "whatsapp",
-        "to": employerNumber,  # Ensure it's a string
-        "type": "template",
-        "template": {
-            "namespace": orai_namespace,
-            "language": {
-                "code": "en_US",
-                "policy": "deterministic"
-            },
-            "name": template_name,
-            "components": [
-                {
-                    "type": "header",
-                    "parameters": [
-                        {
-                            "type": "document",
-                            "document": {
-                                "id": media_id,
-                                "filename": "Employer_Contract.pdf"
-                            }
-                        }
-                    ]
-                },
-                {
-                    "type": "body",
-                    "parameters": [
-                        {
-                            "type": "text",
-                            "text": worker_name
-                        }
-                    ]
-                }
-            ]
-        }
-    }
-
-    response = requests.post(url, headers=headers, json=data)
+    response = http_client.post(**payloads.employer_contract_request(employerNumber, worker_name, media_id, template_name))
 
     if response.status_code == 200:
         print(f"✅ Message sent successfully. Employer: {employerNumber}")
@@ -0,0 +1,86 @@
+import argparse, json, time, tracemalloc
+from . import whatsapp_payloads as payloads
+
+
+def hand_built_payment_link(employerNumber, worker_name, param3, link_param, template_name):
+    """The body send_whatsapp_message built by hand before the registry, serialized as requests does for json="""
+    data = {
+        "template": {
+            "namespace": payloads.orai_namespace,
+            "name": template_name,
+            "components": [
+                {
+                    "type": "body",
+                    "parameters": [
+                        {"type": "text", "text": employerNumber},
+                        {"type": "text", "text": worker_name},
+                        {"type": "text", "text": param3}
+                    ]
+                },
+                {
+                    "index": 0,
+                    "parameters": [{"type": "text", "text": link_param}],
+                    "sub_type": "url",
+                    "type": "button"
+                }
+            ],
+            "language": {"code": "en_US", "policy": "deterministic"}
+        },
+        "messaging_product": "whatsapp",
+        "to": employerNumber,
+        "type": "template"
+    }
+    return json.dumps(data).encode()
+
+
+def recipients(count: int):
+    return [
+        {"to": 919000000000 + index, "worker_name": f"Worker {index}", "period": "May 2026", "link_param": f"session_{index:08d}"}
+        for index in range(count)
+    ]
+
+
+def hand_built(rows):
+    return [hand_built_payment_link(row["to"], row["worker_name"], row["period"], row["link_param"], "salary_reminder") for row in rows]
+
+
+def per_call(rows):
+    return [payloads.payment_link_request(row["to"], row["worker_name"], row["period"], row["link_param"], "salary_reminder")["data"] for row in rows]
+
+
+def bulk(rows):
+    return payloads.bulk_template_payloads("payment_link", "salary_reminder", rows)
+
+
+def measure(label: str, build, rows, repeat: int):
+    build(rows)  # warm up, compiles the template once
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    bodies = build(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label}: {len(bodies)} payloads in {best * 1000:.1f}ms ({best / len(bodies) * 1e6:.2f}us each), peak allocation {peak / 1024 / 1024:.1f}MB")
+    return bodies
+
+
+def main(count: int, repeat: int):
+    rows = recipients(count)
+    expected = [json.loads(body) for body in measure("hand-built dict + json.dumps", hand_built, rows, repeat)]
+    assert [json.loads(body) for body in measure("compiled template, one call per recipient", per_call, rows, repeat)] == expected
+    assert [json.loads(body) for body in measure("compiled template, bulk", bulk, rows, repeat)] == expected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare WhatsApp payload building for a broadcast.")
+    parser.add_argument("--recipients", type=int, default=10000, help="Number of recipients in the broadcast.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per variant; the best is reported.")
+
+    args = parser.parse_args()
+    main(args.recipients, args.repeat)
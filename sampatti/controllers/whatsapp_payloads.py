@@ -0,0 +1,250 @@
+import json, os, re
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from operator import itemgetter
+from typing import List
+from dotenv import load_dotenv
+
+load_dotenv()
+orai_api_key = os.environ.get('ORAI_API_KEY')
+orai_namespace = os.environ.get('ORAI_NAMESPACE')
+authorization_message = os.environ.get('ORAI_AUTHORIZATION_MESSAGE')
+
+# the requests behind every WhatsApp send, shared by the blocking senders in whatsapp_message
+# and the async ones in whatsapp_async. Each builder returns the keyword arguments of the POST:
+# url, headers and the body, as json or, for templates, as already encoded bytes in data.
+
+ORAI_DIALOG_URL = "https://orailap.azurewebsites.net/api/cloud/Dialog"
+D360_MESSAGES_URL = "https://waba-v2.360dialog.io/messages"
+D360_MEDIA_URL = "https://waba-v2.360dialog.io/media"
+XBOTIC_FLOW_URL = "https://api-xbotic.cbots.live/bot-api/v2.0/customer/71029/bot/732e12160d6e4598/flow/B9DA9D396B2343AFBF5E33420107E9B6"
+INTRO_VIDEO_URL = "https://sampattifilstorage.sgp1.digitaloceanspaces.com/sampatti_card_video_reduced%20(1).mp4"
+
+
+def orai_headers():
+    return {
+        "API-KEY": orai_api_key,
+        "Content-Type": "application/json"
+    }
+
+
+def d360_headers(content_type: str = "application/json"):
+    headers = {"D360-API-KEY": orai_api_key}
+    if content_type:
+        headers["Content-Type"] = content_type
+    return headers
+
+
+def text_parameters(*values):
+    return [{"type": "text", "text": value} for value in values]
+
+
+def body(*values):
+    return {"type": "body", "parameters": text_parameters(*values)}
+
+
+def url_button(link_param):
+    return {
+        "index": 0,
+        "parameters": text_parameters(link_param),
+        "sub_type": "url",
+        "type": "button"
+    }
+
+
+def media_header(file_type, media):
+    return {
+        "type": "header",
+        "parameters": [
+            {
+                "type": file_type,
+                file_type: media
+            }
+        ]
+    }
+
+
+# template registry: each layout is declared once, with param("name") where a recipient's
+# value goes. compile_template turns a layout and template name into a CompiledPayload, the
+# serialized request body with slots for the values, so a send only encodes its values.
+
+def param(name):
+    return f"\x00{name}\x00"
+
+
+_SLOT = re.compile(r'"\\u0000(\w+)\\u0000"')
+
+TEMPLATES = {
+    # payment link, invoice message and worker salary slip message
+    "payment_link": lambda: [body(param("to"), param("worker_name"), param("period")), url_button(param("link_param"))],
+    "greeting": lambda: [body(param("to"))],
+    "text": lambda: [body(param("text"))],
+    "referral": lambda: [body(param("referral_code"))],
+    "intro_video": lambda: [media_header("video", {"link": INTRO_VIDEO_URL})],
+    "media": lambda file_type: [media_header(file_type, {"link": param("file_url")})],
+    "plain": lambda: None,
+    "sample_payment_link": lambda: [
+        body(param("to"), param("worker_name"), param("salary"), param("advance"), param("total_amount")),
+        url_button(param("link_param"))
+    ],
+    "employer_contract": lambda: [
+        media_header("document", {"id": param("media_id"), "filename": "Employer_Contract.pdf"}),
+        body(param("worker_name"))
+    ],
+}
+
+
+def _encode(value) -> str:
+    return encode_basestring_ascii(value) if isinstance(value, str) else json.dumps(value)
+
+
+class CompiledPayload:
+    """A request body serialized once, with %s slots for the per-recipient values"""
+
+    def __init__(self, skeleton: dict):
+        text = json.dumps(skeleton)
+        self.slots = tuple(_SLOT.findall(text))
+        self.format = _SLOT.sub("%s", text.replace("%", "%%"))
+
+    def render(self, **values) -> bytes:
+        return (self.format % tuple(_encode(values[name]) for name in self.slots)).encode()
+
+    def render_many(self, recipients) -> List[bytes]:
+        """Bodies for a list of parameter sets (dicts with every slot, "to" included)"""
+        fmt, encode = self.format, _encode
+        if len(self.slots) > 1:
+            getter = itemgetter(*self.slots)
+        else:
+            # itemgetter of one key returns the value itself rather than a tuple
+            getter = lambda values: tuple(values[name] for name in self.slots)
+        return [(fmt % tuple(map(encode, getter(values)))).encode() for values in recipients]
+
+
+@lru_cache(maxsize=256)
+def compile_template(kind: str, template_name: str, *layout_args) -> CompiledPayload:
+    template = {
+        "namespace": orai_namespace,
+        "name": template_name,
+        "language": {
+            "code": "en_US",
+            "policy": "deterministic"
+        }
+    }
+    components = TEMPLATES[kind](*layout_args)
+    if components is not None:
+        template["components"] = components
+
+    return CompiledPayload({
+        "template": template,
+        "messaging_product": "whatsapp",
+        "to": param("to"),
+        "type": "template"
+    })
+
+
+def template_request(kind: str, template_name: str, layout_args: tuple = (), **values):
+    """Orai Dialog request for a namespaced template"""
+    return {
+        "url": ORAI_DIALOG_URL,
+        "headers": orai_headers(),
+        "data": compile_template(kind, template_name, *layout_args).render(**values)
+    }
+
+
+def bulk_template_payloads(kind: str, template_name: str, recipients, layout_args: tuple = ()) -> List[bytes]:
+    """Request bodies for a broadcast; every body goes to ORAI_DIALOG_URL with orai_headers()"""
+    return compile_template(kind, template_name, *layout_args).render_many(recipients)
+
+
+# templates - payment link, invoice message and worker salary slip message
+
+def payment_link_request(employerNumber, worker_name, param3, link_param, template_name):
+    return template_request("payment_link", template_name, to=employerNumber, worker_name=worker_name, period=param3, link_param=link_param)
+
+
+def greetings_request(employerNumber, template_name):
+    return template_request("greeting", template_name, to=employerNumber)
+
+
+def v2v_request(employerNumber, text, template_name):
+    return template_request("text", template_name, to=employerNumber, text=text)
+
+
+def referral_request(employerNumber, template_name, referral_code):
+    return template_request("referral", template_name, to=employerNumber, referral_code=referral_code)
+
+
+def intro_video_request(employerNumber, template_name):
+    return template_request("intro_video", template_name, to=employerNumber)
+
+
+def media_template_request(employerNumber, template_name, file_type, file_url):
+    return template_request("media", template_name, (file_type,), to=employerNumber, file_url=file_url)
+
+
+def plain_template_request(employerNumber, template_name):
+    return template_request("plain", template_name, to=employerNumber)
+
+
+def sample_payment_link_request(employerNumber, workerName, salary, advance, total_amount, link_param, template_name):
+    return template_request("sample_payment_link", template_name, to=employerNumber, worker_name=workerName, salary=salary, advance=advance, total_amount=total_amount, link_param=link_param)
+
+
+def employer_contract_request(employerNumber, worker_name, media_id, template_name):
+    return template_request("employer_contract", template_name, to=employerNumber, worker_name=worker_name, media_id=media_id)
+
+
+# session messages through 360dialog and the xbotic flow
+
+def text_message_request(employer_number, body: str):
+    return {
+        "url": D360_MESSAGES_URL,
+        "headers": d360_headers(),
+        "json": {
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": employer_number,
+            "type": "text",
+            "text": {
+                "body": body
+            }
+        }
+    }
+
+
+def audio_message_request(audio_media_id : str, employerNumber : int):
+    return {
+        "url": D360_MESSAGES_URL,
+        "headers": d360_headers(),
+        "json": {
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": f"{employerNumber}",
+            "type": "audio",
+            "audio": {
+                "id" : f"{audio_media_id}"
+            }
+        }
+    }
+
+
+def xbotic_request(employee_number, text: str):
+    return {
+        "url": XBOTIC_FLOW_URL,
+        "headers": {
+            'Authorization': authorization_message,
+            'Content-Type': 'application/json'
+        },
+        "json": {
+            "user.channel": "whatsapp",
+            "user.phone_no": employee_number,
+            "random_text": text
+        }
+    }
+
+
+def report_send(response, recipient: str):
+    if response.status_code == 200:
+        print(f"Message sent successfully, {recipient}")
+    else:
+        print(f"Failed to send message. Status code: {response.status_code}, Response: {response.text}")
@@ -1,11 +1,62 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from .env import config
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sampatti.db"
+# Defaults match local development: the SQLite file next to the app, with every statement echoed.
+# Production sets DATABASE_URL / DATABASE_ECHO=false / SQLITE_WAL=true (or a server URL) in .env.
+SQLALCHEMY_DATABASE_URL = config("DATABASE_URL", default="sqlite:///./sampatti.db")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, echo=True, connect_args={"check_same_thread": False})
+
+def create_db_engine(url: str = None, **overrides):
+    """Build the engine from env config; keyword overrides take precedence (used by scripts and cron jobs)"""
+    url = url or SQLALCHEMY_DATABASE_URL
+    settings = {
+        "echo": config("DATABASE_ECHO", default=True, cast=bool),
+        "sqlite_wal": config("SQLITE_WAL", default=False, cast=bool),
+        "sqlite_busy_timeout_ms": config("SQLITE_BUSY_TIMEOUT_MS", default=0, cast=int),
+        "pool_size": config("DATABASE_POOL_SIZE", default=10, cast=int),
+        "max_overflow": config("DATABASE_MAX_OVERFLOW", default=20, cast=int),
+        "pool_timeout": config("DATABASE_POOL_TIMEOUT", default=30, cast=int),
+        "pool_recycle": config("DATABASE_POOL_RECYCLE", default=1800, cast=int),
+    }
+    settings.update(overrides)
+
+    if make_url(url).get_backend_name() != "sqlite":
+        # server databases get a real pool; pre_ping drops connections the server closed while idle
+        return create_engine(
+            url,
+            echo=settings["echo"],
+            pool_size=settings["pool_size"],
+            max_overflow=settings["max_overflow"],
+            pool_timeout=settings["pool_timeout"],
+            pool_recycle=settings["pool_recycle"],
+            pool_pre_ping=True
+        )
+
+    connect_args = {"check_same_thread": False}
+    if settings["sqlite_busy_timeout_ms"]:
+        connect_args["timeout"] = settings["sqlite_busy_timeout_ms"] / 1000
+
+    engine = create_engine(url, echo=settings["echo"], connect_args=connect_args)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if settings["sqlite_wal"]:
+            # readers no longer block the writer, and commits only need a WAL fsync
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        if settings["sqlite_busy_timeout_ms"]:
+            cursor.execute(f"PRAGMA busy_timeout={int(settings['sqlite_busy_timeout_ms'])}")
+        cursor.close()
+
+    return engine
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush= False)
 
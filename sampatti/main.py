@@ -1,12 +1,42 @@
-import os
+import os, time, threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from . import models
 from .database import engine
+from .env import config
 from .routers import user, cashfree, webhook, auth
+from .controllers import schema_migrations, service_calls, payment_events
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# Schema changes are a deploy step (python -m sampatti.controllers.schema_migrations);
+# local development keeps migrating on startup unless MIGRATE_ON_STARTUP=false.
+MIGRATE_ON_STARTUP = config("MIGRATE_ON_STARTUP", default=True, cast=bool)
+# Build the super agent (Chroma, LLM and embedding clients) before serving instead of on the first message.
+WARM_AGENTS_ON_STARTUP = config("WARM_AGENTS_ON_STARTUP", default=False, cast=bool)
+# Retry payment events left pending or failed (e.g. by a restart) at startup and then periodically.
+PAYMENT_EVENT_RECOVERY = config("PAYMENT_EVENT_RECOVERY", default=True, cast=bool)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # agent tools calling this API now run the controller functions directly
+    service_calls.mark_in_service()
+    if MIGRATE_ON_STARTUP:
+        schema_migrations.migrate(engine)
+    if WARM_AGENTS_ON_STARTUP:
+        from .controllers import super_agent
+        super_agent.get_super_agent()
+    recovery_stop = threading.Event()
+    if PAYMENT_EVENT_RECOVERY:
+        threading.Thread(target=payment_events.run_recovery, args=(recovery_stop,), name="payment-event-recovery", daemon=True).start()
+    print(f"Startup finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+    yield
+    recovery_stop.set()
+    engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 origins = ["*"]
 
 app.add_middleware(
@@ -21,9 +51,7 @@ static_dir = os.path.join(os.getcwd(), 'static')
 
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-models.Base.metadata.create_all(engine)
-
 app.include_router(user.router)
 app.include_router(cashfree.router)
 app.include_router(webhook.router)
-app.include_router(auth.router)
\ No newline at end of file
+app.include_router(auth.router)
@@ -1,6 +1,6 @@
 from datetime import datetime
 import uuid
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Table, Boolean
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Table, Boolean, Float, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -17,7 +17,11 @@ worker_employer = Table('worker_employer', Base.metadata,
     Column('worker_id', String, default = ''),
     Column('date_of_onboarding', String, default=''),
     Column('monthly_leaves', Integer, default=0),
-    Column('referralCode', String, default='')
+    Column('referralCode', String, default=''),
+    # worker_number leads the primary key; lookups by employer (and worker name) need their own index
+    Index('ix_worker_employer_employer_worker_name', 'employer_number', 'worker_name'),
+    Index('ix_worker_employer_worker_employer_id', 'worker_id', 'employer_id'),
+    Index('ix_worker_employer_order_id', 'order_id')
 )       
 
 
@@ -35,6 +39,10 @@ class Domestic_Worker(Base):
     vendorId = Column(String, nullable=True)
     employers = relationship("Employer", secondary="worker_employer", back_populates='workers') 
 
+    __table_args__ = (
+        Index("ix_domestic_worker_worker_number", "workerNumber"),
+    )
+
 
 class Employer(Base):
     __tablename__ = "Employer"
@@ -51,6 +59,11 @@ class Employer(Base):
     beneficiaryId = Column(String, default='')
     workers = relationship("Domestic_Worker", secondary="worker_employer",back_populates='employers')
 
+    __table_args__ = (
+        Index("ix_employer_employer_number", "employerNumber"),
+        Index("ix_employer_referral_code", "referralCode"),
+    )
+
 class EmployerReferralMapping(Base):
     __tablename__ = "EmployerReferralMapping"
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -100,6 +113,10 @@ class SalaryDetails(Base):
     order_id=Column(String)
     deduction=Column(Integer)
 
+    __table_args__ = (
+        Index("ix_salary_details_worker_month_year", "worker_id", "month", "year"),
+    )
+
 class AttendanceRecords(Base):
     __tablename__ = "AttendanceRecords"
     id = Column(String, primary_key=True)
@@ -143,6 +160,10 @@ class AttendanceRecord(Base):
     month = Column(Integer, nullable=False)
     year = Column(Integer, nullable=False)
     date_of_leave = Column(Date, nullable=False)
+
+    __table_args__ = (
+        Index("ix_attendance_records_worker_employer_year_month", "worker_id", "employer_id", "year", "month"),
+    )
     
     
 class cashAdvance(Base):
@@ -164,6 +185,10 @@ class cashAdvance(Base):
 
     repayments = relationship("CashAdvanceRepaymentLog", back_populates="advance")
 
+    __table_args__ = (
+        Index("ix_cash_advance_record_worker_employer", "worker_id", "employer_id"),
+    )
+
 
 class CashAdvanceRepaymentLog(Base):
     __tablename__ = "CashAdvanceRepaymentLog"    #managment
@@ -200,6 +225,11 @@ class CashAdvanceManagement(Base):
     payment_status = Column(String)
     order_id = Column(String)
 
+    __table_args__ = (
+        Index("ix_cash_advance_management_worker_employer", "worker_id", "employer_id"),
+        Index("ix_cash_advance_management_order_id", "order_id"),
+    )
+
 
 class SalaryManagementRecords(Base):
 
@@ -221,6 +251,10 @@ class SalaryManagementRecords(Base):
     order_id = Column(String)
     payment_status = Column(String)
 
+    __table_args__ = (
+        Index("ix_salary_management_records_order_id", "order_id"),
+    )
+
 
 class SurveyResponse(Base):
     __tablename__ = 'survey_responses'
@@ -233,3 +267,77 @@ class SurveyResponse(Base):
     worker_number = Column(String)  
     response = Column(String)
     timestamp = Column(String, default=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+class ConversationLog(Base):
+    __tablename__ = "ConversationLog"
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    agent = Column(String, nullable=False)
+    employerNumber = Column(String, nullable=False)
+    timestamp = Column(Float, nullable=False)
+    message = Column(String)
+
+    __table_args__ = (
+        Index("ix_conversation_log_agent_employer_timestamp", "agent", "employerNumber", "timestamp"),
+    )
+
+
+class ConversationLogBackfill(Base):
+    __tablename__ = "ConversationLogBackfill"
+    agent = Column(String, primary_key=True)
+    employerNumber = Column(String, primary_key=True)
+    importedCount = Column(Integer, default=0)
+    date = Column(String)
+
+
+class ConversationSequence(Base):
+    __tablename__ = "ConversationSequence"
+    scope = Column(String, primary_key=True)
+    chatKey = Column(String, primary_key=True)
+    lastSequence = Column(Integer, default=0, nullable=False)
+
+
+class PaymentEvent(Base):
+    __tablename__ = "PaymentEvent"
+    orderId = Column(String, primary_key=True)
+    employerNumber = Column(String, nullable=False)
+    paymentStatus = Column(String)
+    paymentAmount = Column(Float, default=0)
+    payload = Column(String)
+    status = Column(String, default="pending", nullable=False)  # pending, processing, done, failed, dead
+    invoiceSent = Column(Boolean, default=False, nullable=False)
+    salaryLedgerUpdated = Column(Boolean, default=False, nullable=False)
+    cashbackProcessed = Column(Boolean, default=False, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String)
+    receivedAt = Column(Float)
+    claimedAt = Column(Float)
+    retryAt = Column(Float)
+    processedAt = Column(Float)
+
+    __table_args__ = (
+        Index("ix_payment_event_status", "status"),
+    )
+
+class SalarySlipProgress(Base):
+    __tablename__ = "SalarySlipProgress"
+    id = Column(String, primary_key=True)  # {worker_id}_{month}_{year}
+    worker_id = Column(String, nullable=False)
+    month = Column(String, nullable=False)
+    year = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)  # rendered, uploaded, failed
+    objectName = Column(String)
+    error = Column(String)
+    updatedAt = Column(Float)
+
+    __table_args__ = (
+        Index("ix_salary_slip_progress_period_status", "month", "year", "status"),
+    )
+
+class SheetRowWatermark(Base):
+    __tablename__ = "SheetRowWatermark"
+    sheet = Column(String, primary_key=True)
+    task = Column(String, primary_key=True)
+    rowId = Column(String, primary_key=True)  # the row's id column, or its position when it has none
+    rowHash = Column(String, nullable=False)  # content of the row when the task last finished with it
+    processedAt = Column(Float)
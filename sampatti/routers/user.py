@@ -1,5 +1,5 @@
 import os, uuid
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
 from .. import schemas, models
 from ..database import get_db
@@ -8,7 +8,7 @@ from ..controllers import onboarding_agent, rag_funcs, userControllers
 from ..controllers import employment_contract_gen, salary_summary_gen, cash_advance_agent, super_agent
 from datetime import datetime, timedelta
 from ..controllers import whatsapp_message, talk_to_agent_excel_file, uploading_files_to_spaces, onboarding_tools
-from ..controllers import utility_functions, rag_funcs, onboarding_tasks, cash_advance_management, salary_slip_generation
+from ..controllers import utility_functions, rag_funcs, onboarding_tasks, cash_advance_management, salary_slip_generation, webhook_queue, agent_dispatcher, embedding_cache, tool_session, order_status_cache, payment_events, broadcast
 from pydantic import BaseModel
 from typing import Optional
 from ..auth import get_current_user
@@ -100,16 +100,27 @@ def send_employer_invoice(employerNumber : int, orderId : str, db : Session = De
     return userControllers.send_employer_invoice(employerNumber, orderId, db)
     
 @router.get('/salary_payment_reminder')
-def salary_payment_reminder(db : Session = Depends(get_db)):
-    return userControllers.salary_payment_reminder(db)
+def salary_payment_reminder(run_id : str = None, db : Session = Depends(get_db)):
+    return userControllers.salary_payment_reminder(db, run_id)
 
 @router.get("/send_greetings")
-def send_greetings(db : Session = Depends(get_db)):
-    return userControllers.send_greetings(db)
+def send_greetings(run_id : str = None, db : Session = Depends(get_db)):
+    return userControllers.send_greetings(db, run_id)
 
 @router.get("/send_apology_message")
-def send_apology_message(db : Session = Depends(get_db)):
-    return userControllers.send_apology_message(db)
+def send_apology_message(run_id : str = None, db : Session = Depends(get_db)):
+    return userControllers.send_apology_message(db, run_id)
+
+@router.get("/broadcast_status")
+def broadcast_status(run_id : str):
+    summary = broadcast.broadcast_status(run_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return summary
+
+@router.post("/resume_broadcasts")
+def resume_broadcasts():
+    return broadcast.resume_unfinished_broadcasts()
 
 @router.get('/generate_talk_to_agent_sheet')
 def generate_sheet():
@@ -238,13 +249,13 @@ def generate_employment_contract(employerNumber: int, workerNumber : int, upi :
     return userControllers.generate_employment_contract(employerNumber, workerNumber, upi, accountNumber, ifsc, panNumber, name, salary, db)
 
 @router.post("/add_vendors_to_cashfree_from_sheet")
-def run_tasks_till_add_vendor():
-    return onboarding_tasks.run_tasks_till_add_vendor()
+def run_tasks_till_add_vendor(dry_run : bool = False, incremental : bool = True):
+    return onboarding_tasks.run_tasks_till_add_vendor(dry_run, incremental)
 
 
 @router.post("/process_vendor_status_from_sheet")
-def run_tasks_after_vendor_addition():
-    return onboarding_tasks.run_tasks_after_vendor_addition()
+def run_tasks_after_vendor_addition(dry_run : bool = False, incremental : bool = True):
+    return onboarding_tasks.run_tasks_after_vendor_addition(dry_run, incremental)
 
 @router.get("/get_worker_employer_relation")
 def get_worker_employer_relation(employerNumber : int, workerName : str, db : Session = Depends(get_db)):
@@ -289,7 +300,7 @@ def queryE(employer_number: int, typeofMessage: str, query: str, mediaId: str =
 
 @router.post("/super_agent")
 def super_agent_query(employer_number: int, type_of_message: str, query: str, media_id: str = ""):
-    return super_agent.super_agent_query(employer_number, type_of_message, query, media_id)
+    return agent_dispatcher.dispatch_super_agent_query(employer_number, type_of_message, query, media_id).result()
 
 @router.post("/add_in_employer")
 def populate_db(employer_number: int, worker_id: str, db: Session = Depends(get_db)):
@@ -341,4 +352,32 @@ def delete_all_history(employer_number: int) -> dict:
 
 @router.post("/generate_SS_slip_for_worker")
 def generate_salary_slip(workerNumber: str, month: str, year: int, db: Session = Depends(get_db)):
-    return salary_slip_generation.generate_salary_slip(workerNumber, month, year, db)
\ No newline at end of file
+    return salary_slip_generation.generate_salary_slip(workerNumber, month, year, db)
+
+@router.get("/orai_queue_stats")
+def orai_queue_stats():
+    return webhook_queue.queue_stats()
+
+@router.get("/super_agent_dispatcher_stats")
+def super_agent_dispatcher_stats():
+    return agent_dispatcher.get_dispatcher().stats()
+
+@router.get("/embedding_cache_stats")
+def embedding_cache_stats():
+    return embedding_cache.embedding_cache_stats()
+
+@router.get("/intent_classifier_report")
+def intent_classifier_report():
+    return super_agent.get_intent_preclassifier().get_report()
+
+@router.get("/tool_session_stats")
+def tool_session_stats():
+    return tool_session.tool_session_stats()
+
+@router.get("/order_status_cache_stats")
+def order_status_cache_stats():
+    return order_status_cache.order_status_cache.get_stats()
+
+@router.post("/process_pending_payment_events")
+def process_pending_payment_events():
+    return payment_events.process_pending_payment_events()
@@ -1,17 +1,22 @@
 import json, os
-import httpx
 from fastapi import APIRouter, BackgroundTasks, Depends, Request, HTTPException
 import requests
 from ..database import get_db
 from sqlalchemy.orm import Session
 from ..controllers import onboarding_agent, userControllers, survey_agent, onboarding_tasks
 from dotenv import load_dotenv
-from ..controllers import whatsapp_message, super_agent
+from ..controllers import whatsapp_message, super_agent, webhook_queue, agent_dispatcher
 from .. import models
 from ..controllers.userControllers import generate_unique_id
+from ..controllers import http_client, payment_events, whatsapp_async
+from ..controllers.order_status_cache import order_status_cache
 
 load_dotenv()
 orai_api_key = os.environ.get('ORAI_API_KEY')
+# with USE_WEBHOOK_QUEUE=true messages are only stored by this route; they are processed by
+# the consumers, which must run next to the app: python -m sampatti.controllers.orai_queue_consumer.
+# It stays off by default because a deployment without consumers would never answer a message.
+use_webhook_queue = os.environ.get('USE_WEBHOOK_QUEUE', 'false').lower() == 'true'
 
 router = APIRouter(
     prefix="/webhook",
@@ -20,46 +25,54 @@ router = APIRouter(
 
 # Define the webhook route
 @router.post("/cashfree")
-async def cashfree_webhook(request: Request, db : Session = Depends(get_db)):
+async def cashfree_webhook(request: Request, background_tasks: BackgroundTasks, db : Session = Depends(get_db)):
     try:
         payload = await request.json()
         
         print("Webhook payload received:", payload)
         
-        customer_id = payload['data']['customer_details'].get('customer_id')
-        customer_phone = payload['data']['customer_details'].get('customer_phone')
-        order_id = payload['data']['order'].get('order_id')
-        bank_reference = payload['data']['payment'].get('bank_reference')
-        payment_status = payload['data']['payment'].get('payment_status')
-
-        if payment_status != "SUCCESS":
-            return {"status" : f"{payment_status}"}
+        event = payment_events.PaymentWebhookEvent.from_payload(payload)
+
+        # the invoice, salary update and cashback below all read this order; serve them from the cache
+        order_status_cache.record_payment(event.order_id, event.payment_status)
+
+        if event.payment_status != "SUCCESS":
+            return {"status" : f"{event.payment_status}"}
         
-        print(f"Customer ID: {customer_id}")
-        print(f"Customer Phone: {customer_phone}")
-        print(f"Order ID: {order_id}")
-        print(f"Bank Reference: {bank_reference}")
-        print(f"Payment Status: {payment_status}")
-
-        customer_phone = f"91{customer_phone}"
-
-        userControllers.send_employer_invoice(employerNumber=customer_phone, orderId=order_id, db=db)
-        userControllers.update_salary_details(employerNumber=customer_phone, orderId=order_id, db=db)
-        userControllers.process_employer_cashback_for_first_payment(employerNumber=customer_phone, payload=payload, db=db)
-        return {"status": "success"}
+        print(f"Customer ID: {event.customer_id}")
+        print(f"Order ID: {event.order_id}")
+        print(f"Bank Reference: {event.bank_reference}")
+
+        # Cashfree retries until it gets a 200, so acknowledge once the event is stored
+        # and run invoice, salary ledger and cashback after the response
+        if not payment_events.record_event(event, payload, db):
+            return {"status": "duplicate"}
+
+        background_tasks.add_task(payment_events.process_payment_event, event.order_id)
+        return {"status": "accepted"}
     
     except Exception as e:
         print(f"Error handling webhook: {e}")
         raise HTTPException(status_code=400, detail="Error processing webhook data")
     
 
+def extract_wa_id(data: dict):
+    try:
+        return data["entry"][0]["changes"][0]["value"]["contacts"][0]["wa_id"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+
 @router.post("/orai")
 async def orai_webhook(request: Request, background_tasks: BackgroundTasks):
     try:
         data = await request.json()
-       
-        # Immediately start background processing
-        background_tasks.add_task(process_orai_webhook, data)
+
+        # Persist the message and let the queue consumers process it
+        if use_webhook_queue:
+            webhook_queue.enqueue(data, extract_wa_id(data))
+        else:
+            background_tasks.add_task(process_orai_webhook, data)
 
         # Immediate response
         return {"status": "received"}
@@ -69,7 +82,8 @@ async def orai_webhook(request: Request, background_tasks: BackgroundTasks):
         raise HTTPException(status_code=400, detail="Error processing webhook data")
 
 
-def process_orai_webhook(data: dict):
+def process_orai_webhook(data: dict, raise_errors: bool = False):
+    """raise_errors is set by the queue consumers so a transient failure is retried and dead-lettered"""
     try:
         formatted_json = json.dumps(data, indent=2)
         formatted_json_oneline = json.dumps(data, separators=(',', ':'))
@@ -85,7 +99,15 @@ def process_orai_webhook(data: dict):
         entry = data.get("entry", [])[0] if data.get("entry") else {}
         changes = entry.get("changes", [])[0] if entry.get("changes") else {}
         value = changes.get("value", {})
-        message_id = data["entry"][0]["changes"][0]["value"]["messages"][0]["id"]
+        if not value.get("messages"):
+            # delivery and read status callbacks carry no message; nothing to process or retry
+            print("No message in webhook payload, skipping")
+            return
+        message_id = value["messages"][0].get("id")
+        if raise_errors and webhook_queue.was_replied(message_id):
+            # a retry of a message that was already answered must not answer it again
+            print(f"Message {message_id} was already replied to, skipping")
+            return
 
         contacts = value.get("contacts", [])
         employerNumber = contacts[0].get("wa_id") if contacts else None
@@ -136,7 +158,7 @@ def process_orai_webhook(data: dict):
             headers = {
                 'Content-Type': 'application/json'
             }
-            response = requests.post(url, headers=headers, data=formatted_json)
+            response = http_client.post(url, headers=headers, data=formatted_json)
                 
 
         if employerNumber == "919731011117":
@@ -157,7 +179,7 @@ def process_orai_webhook(data: dict):
             }
             
             try:
-                staging_response = requests.post(staging_url, headers=headers, data=formatted_json)
+                staging_response = http_client.post(staging_url, headers=headers, data=formatted_json)
                 print(f"Forwarded to staging server. Status: {staging_response.status_code}")   
                 print(f"Response: {staging_response.text}")
             except Exception as e:
@@ -173,7 +195,7 @@ def process_orai_webhook(data: dict):
             }
             
             try:
-                staging_response = requests.post(staging_url, headers=headers, data=formatted_json)
+                staging_response = http_client.post(staging_url, headers=headers, data=formatted_json)
                 print(f"Forwarded to staging server. Status: {staging_response.status_code}")   
                 print(f"Response: {staging_response.text}")
             except Exception as e:
@@ -190,7 +212,7 @@ def process_orai_webhook(data: dict):
             }
             
             try:
-                staging_response = requests.post(staging_url, headers=headers, data=formatted_json)
+                staging_response = http_client.post(staging_url, headers=headers, data=formatted_json)
                 print(f"Forwarded to staging server. Status: {staging_response.status_code}")   
                 print(f"Response: {staging_response.text}")
             except Exception as e:
@@ -205,7 +227,7 @@ def process_orai_webhook(data: dict):
             }
             
             try:
-                staging_response = requests.post(staging_url, headers=headers, data=formatted_json)
+                staging_response = http_client.post(staging_url, headers=headers, data=formatted_json)
                 print(f"Forwarded to staging server. Status: {staging_response.status_code}")
                 print("response: ", staging_response.text)
                 print(f"Response: {staging_response}")
@@ -221,7 +243,7 @@ def process_orai_webhook(data: dict):
             }
             
             try:
-                staging_response = requests.post(staging_url, headers=headers, data=formatted_json)
+                staging_response = http_client.post(staging_url, headers=headers, data=formatted_json)
                 print(f"Forwarded to staging server. Status: {staging_response.status_code}")
                 print("response: ", staging_response.text)
                 print(f"Response: {staging_response}")
@@ -237,7 +259,7 @@ def process_orai_webhook(data: dict):
             }
             
             try:
-                staging_response = requests.post(staging_url, headers=headers, data=formatted_json)
+                staging_response = http_client.post(staging_url, headers=headers, data=formatted_json)
                 print(f"Forwarded to staging server. Status: {staging_response.status_code}")   
                 print(f"Response: {staging_response.text}")
             except Exception as e:
@@ -249,32 +271,34 @@ def process_orai_webhook(data: dict):
 
         elif message_type == "text":
             query = message.get("text", {}).get("body")
-            super_agent.super_agent_query(employerNumber, message_type, query, "", data)
+            return agent_dispatcher.dispatch_super_agent_query(employerNumber, message_type, query, "", data, raise_errors)
 
         elif message_type == "audio":
             query = message.get("audio", {}).get("id")
-            super_agent.super_agent_query(employerNumber, message_type, query, media_id, data)
+            return agent_dispatcher.dispatch_super_agent_query(employerNumber, message_type, query, media_id, data, raise_errors)
             
         elif message_type == "image":
             query = message.get("image", {}).get("id")
-            super_agent.super_agent_query(employerNumber, message_type, query, media_id, data)
+            return agent_dispatcher.dispatch_super_agent_query(employerNumber, message_type, query, media_id, data, raise_errors)
 
         elif message_type == "button":
             #print("Button message received, but button text extraction is currently disabled.")
             query = data["entry"][0]["changes"][0]["value"]["messages"][0]["button"]["text"]
             print("Button message received.")
-            super_agent.super_agent_query(employerNumber, message_type, query, media_id, data)
+            return agent_dispatcher.dispatch_super_agent_query(employerNumber, message_type, query, media_id, data, raise_errors)
 
         elif message_type == "contacts":
             numb = data["entry"][0]["changes"][0]["value"]["messages"][0]["contacts"][0]["phones"][0]["wa_id"]
             print("Extracted the Contact Number from the Button: ", numb)
-            super_agent.super_agent_query(employerNumber, "text", numb, "", data)
+            return agent_dispatcher.dispatch_super_agent_query(employerNumber, "text", numb, "", data, raise_errors)
 
         else:
-            super_agent.super_agent_query(employerNumber, "text", "Hi", media_id, data)
+            return agent_dispatcher.dispatch_super_agent_query(employerNumber, "text", "Hi", media_id, data, raise_errors)
 
     except Exception as e:
         print(f"Error in background processing of orai webhook: {e}")
+        if raise_errors and webhook_queue.is_retryable(e):
+            raise
         
         
 @router.post("/cashfree_vendor_status")
@@ -312,7 +336,7 @@ async def cashfree_vendor_status(request: Request, db: Session = Depends(get_db)
             }
             
             try:
-                staging_response = requests.post(staging_url, headers=headers, data=payload)
+                staging_response = http_client.post(staging_url, headers=headers, data=payload)
                 print(f"Forwarded to staging server. Status: {staging_response.status_code}")   
                 print(f"Response: {staging_response.text}")
             except Exception as e:
@@ -323,8 +347,7 @@ async def cashfree_vendor_status(request: Request, db: Session = Depends(get_db)
         headers = {"Content-Type": "application/json"}
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.post(staging_url, json=payload, headers=headers)
+            resp = await http_client.get_async_http_client().post(staging_url, json=payload, headers=headers, timeout=10.0)
             print(f"Forwarded to staging. Status={resp.status_code}, Body={resp.text}")
         except Exception as forward_err:
             # Don’t fail your main webhook if staging is down;
@@ -346,7 +369,7 @@ async def cashfree_vendor_status(request: Request, db: Session = Depends(get_db)
             onboarding_tasks.run_tasks_after_vendor_addition()
             text_message = f"Hello {name} {phone} {vpa} {account_number} {ifsc} {pan_status},The vendor has been added successfully."
         elif updated_status == "BANK_VALIDATION_FAILED":
-            whatsapp_message.display_user_message_on_xbotic(phone, "Bank validation failed. Please check the details and try again.")
+            await whatsapp_async.display_user_message_on_xbotic(phone, "Bank validation failed. Please check the details and try again.")
         else:
             print(f"Vendor status is {updated_status}, skipping post-addition tasks.")
             text_message = f"Hello {name} {phone} {vpa} {account_number} {ifsc} {pan_status},There is an issue with vendor addition. Status: {updated_status}"
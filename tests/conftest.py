@@ -0,0 +1,11 @@
+import os, tempfile
+
+# the engine is built when sampatti.database is imported, so the test database is configured first
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+os.environ.setdefault("DATABASE_ECHO", "false")
+# provider clients read their keys at import; the tests talk to mock transports
+os.environ.setdefault("ORAI_API_KEY", "test")
+os.environ.setdefault("ORAI_NAMESPACE", "test")
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import requests
+
+pytest.importorskip("cashfree_pg")
+
+from sampatti.controllers import broadcast, http_client
+from sampatti.controllers.order_status_cache import order_status_cache
+
+
+@pytest.fixture
+def broadcast_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(broadcast, "BROADCAST_DB_PATH", str(tmp_path / "broadcasts.db"))
+    monkeypatch.setattr(broadcast, "BROADCAST_RETRY_DELAY", 0)
+    monkeypatch.setattr(broadcast._local, "conn", None, raising=False)
+    yield
+    broadcast._local.conn.close()
+
+
+@pytest.fixture
+def whatsapp(monkeypatch):
+    state = {"in_flight": 0, "max_in_flight": 0, "calls": {}}
+
+    async def handler(request):
+        recipient = json.loads(request.content)["to"]
+        state["calls"][recipient] = state["calls"].get(recipient, 0) + 1
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        if recipient.endswith("3"):
+            return httpx.Response(400, json={"error": "invalid recipient"})
+        if recipient.endswith("4") and state["calls"][recipient] == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"messages": [{"id": "wamid"}]})
+
+    monkeypatch.setattr(http_client, "build_async_client", lambda *args, **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return state
+
+
+def test_template_broadcast_sends_concurrently(broadcast_db, whatsapp):
+    audience = [(str(n), f"9190000000{n:02d}", {}) for n in range(20)]
+
+    summary = broadcast.run_broadcast("greetings-1", "template", {"template_name": "greetings"}, audience, max_workers=5, messages_per_second=1000)
+
+    assert (summary["delivered"], summary["failed"], summary["pending"]) == (18, 2, 0)
+    assert 1 < whatsapp["max_in_flight"] <= 5
+    # the 503 was retried on the next pass, the 400 was not
+    assert whatsapp["calls"]["919000000004"] == 2
+    assert whatsapp["calls"]["919000000003"] == 1
+
+
+class CashfreeOrders(requests.adapters.BaseAdapter):
+    """Answers order status lookups; an order listed in throttle_once gets a 429 the first time"""
+
+    def __init__(self, throttle_once):
+        super().__init__()
+        self.throttle_once = set(throttle_once)
+        self.lookups = []
+
+    def send(self, request, **kwargs):
+        order_id = request.url.rsplit("/", 1)[-1]
+        self.lookups.append(order_id)
+        response = requests.Response()
+        response.url, response.request = request.url, request
+        if order_id in self.throttle_once:
+            self.throttle_once.discard(order_id)
+            response.status_code, response._content = 429, b'{"message": "too many requests"}'
+        else:
+            response.status_code = 200
+            response._content = json.dumps({"order_id": order_id, "order_status": "ACTIVE", "payment_session_id": f"session-{order_id}"}).encode()
+        return response
+
+    def close(self):
+        pass
+
+
+def test_salary_reminder_counts_provider_throttling(broadcast_db, whatsapp):
+    cashfree = CashfreeOrders(throttle_once=["order-3"])
+    session = requests.Session()
+    session.mount("https://api.cashfree.com", cashfree)
+    http_client.set_http_client(session)
+    order_status_cache.put("order-1", {"order_id": "order-1", "order_status": "PAID"})
+    audience = [(str(n), f"9190000000{n:02d}", {"worker_name": f"Worker {n}", "order_id": f"order-{n}"}) for n in (1, 2, 3, 4)]
+
+    try:
+        summary = broadcast.run_broadcast("reminder-1", "salary_reminder", {"template_name": "salary_reminder", "period": "May 2026"}, audience, messages_per_second=1000)
+    finally:
+        http_client.set_http_client(None)
+        for n in (1, 2, 3, 4):
+            order_status_cache.entries.pop(f"order-{n}", None)
+
+    assert (summary["delivered"], summary["skipped"], summary["failed"]) == (2, 1, 1)
+    # the PAID order came from the cache; order-3 was looked up again after its 429
+    assert sorted(cashfree.lookups) == ["order-2", "order-3", "order-3", "order-4"]
+    # only Cashfree's 429 counts; WhatsApp's 503 for the order-4 recipient was retried but is not throttling
+    assert summary["throttled"] == 1
+    assert "rate_limit_waits" in summary
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("langchain")
+
+from sqlalchemy import insert, select
+from sampatti import models
+from sampatti.database import SessionLocal, engine
+from sampatti.controllers import cash_advance_tool, service_calls
+
+EMPLOYER_NUMBER = 919000000001
+
+
+@pytest.fixture
+def worker_relation():
+    models.Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.execute(insert(models.worker_employer).values(
+            worker_number=918000000001, employer_number=EMPLOYER_NUMBER, worker_name="Ramesh",
+            salary_amount=10000, worker_id="worker-1", employer_id="employer-1"
+        ))
+        db.commit()
+    yield
+    with SessionLocal() as db:
+        db.execute(models.worker_employer.delete())
+        db.commit()
+
+
+def test_update_salary_in_process(worker_relation, monkeypatch):
+    # update_worker_salary returns None, which the in-process call answers with an empty body
+    monkeypatch.setattr(service_calls, "SERVICE_CALL_MODE", "in_process")
+
+    result = cash_advance_tool.update_salary_func(EMPLOYER_NUMBER, "Ramesh", 15000)
+
+    assert result["success"], result
+    assert result["data"] == {}
+    with SessionLocal() as db:
+        salary = db.execute(select(models.worker_employer.c.salary_amount).where(
+            models.worker_employer.c.employer_number == EMPLOYER_NUMBER
+        )).scalar_one()
+    assert salary == 15000
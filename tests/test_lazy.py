@@ -0,0 +1,42 @@
+import threading
+import time
+
+from sampatti.controllers.lazy import build_once
+
+
+def test_concurrent_first_calls_build_once():
+    builds = []
+
+    @build_once
+    def get_client():
+        time.sleep(0.05)
+        builds.append(object())
+        return builds[-1]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert all(result is builds[0] for result in results)
+
+
+def test_failed_build_is_retried():
+    attempts = []
+
+    @build_once
+    def get_client():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("provider unavailable")
+        return "client"
+
+    try:
+        get_client()
+    except ConnectionError:
+        pass
+    assert get_client() == "client"
+    assert len(attempts) == 2
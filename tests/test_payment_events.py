@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from sqlalchemy import create_engine, inspect, text
+from sampatti import models
+from sampatti.database import SessionLocal, engine
+from sampatti.controllers import payment_events, schema_migrations, userControllers
+
+ORDER_ID = "order-1"
+
+
+@pytest.fixture
+def failing_event(monkeypatch):
+    models.Base.metadata.create_all(engine)
+    event = payment_events.PaymentWebhookEvent(order_id=ORDER_ID, employer_number="919000000001", payment_status="SUCCESS")
+    with SessionLocal() as db:
+        assert payment_events.record_event(event, {}, db)
+
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("sheet unavailable")
+    monkeypatch.setattr(userControllers, "load_order_context", unavailable)
+    yield
+    with SessionLocal() as db:
+        db.query(models.PaymentEvent).delete()
+        db.commit()
+
+
+def get_event():
+    with SessionLocal() as db:
+        return db.get(models.PaymentEvent, ORDER_ID)
+
+
+def test_failed_event_waits_for_backoff_then_dies(failing_event):
+    payment_events.process_payment_event(ORDER_ID)
+    event = get_event()
+    assert (event.status, event.attempts) == ("failed", 1)
+    assert event.retryAt > time.time()
+
+    # not due yet
+    assert payment_events.process_pending_payment_events()["processed"] == 0
+
+    for attempt in range(2, payment_events.MAX_ATTEMPTS + 1):
+        with SessionLocal() as db:
+            db.get(models.PaymentEvent, ORDER_ID).retryAt = time.time() - 1
+            db.commit()
+        assert payment_events.process_pending_payment_events()["processed"] == 1
+        assert get_event().attempts == attempt
+
+    assert get_event().status == "dead"
+    assert payment_events.process_pending_payment_events() == {"processed": 0, "dead": 0}
+
+
+def test_stale_last_attempt_is_parked_as_dead(failing_event):
+    with SessionLocal() as db:
+        event = db.get(models.PaymentEvent, ORDER_ID)
+        event.status = "processing"
+        event.attempts = payment_events.MAX_ATTEMPTS
+        event.claimedAt = time.time() - payment_events.STALE_PROCESSING_SECONDS - 1
+        db.commit()
+
+    assert payment_events.process_pending_payment_events() == {"processed": 0, "dead": 1}
+    assert get_event().status == "dead"
+
+
+def test_migration_adds_retry_column(tmp_path):
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old_engine.begin() as conn:
+        conn.execute(text('CREATE TABLE "PaymentEvent" ("orderId" VARCHAR PRIMARY KEY, "status" VARCHAR)'))
+
+    schema_migrations.migrate(old_engine)
+
+    assert "retryAt" in {column["name"] for column in inspect(old_engine).get_columns("PaymentEvent")}
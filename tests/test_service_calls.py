@@ -0,0 +1,91 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+pytest.importorskip("jose")
+
+from sampatti.controllers import http_client, service_calls
+from sampatti.routers import auth
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """A local stand-in for the service that answers each path with a scripted list of statuses"""
+    state = {"script": {}, "calls": {}}
+
+    class Handler(BaseHTTPRequestHandler):
+        def answer(self):
+            path = self.path.split("?")[0]
+            state["calls"][path] = state["calls"].get(path, 0) + 1
+            statuses = state["script"][path]
+            status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+            body = json.dumps({"status": status}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = answer
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(service_calls, "SERVICE_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(service_calls, "SERVICE_CALL_MODE", "http")
+    monkeypatch.setattr(service_calls, "SERVICE_CALL_BACKOFF", 0)
+    monkeypatch.setattr(auth, "SERVICE_TOKEN", "test")
+    http_client.set_http_client(http_client.build_session())
+    yield state
+    server.shutdown()
+    http_client.set_http_client(None)
+
+
+def test_post_is_retried_when_turned_away(service):
+    service["script"]["/user/rag_process_query"] = [429, 503, 200]
+
+    response = service_calls.post("/user/rag_process_query", params={"query": "hi"})
+
+    assert response.status_code == 200
+    assert service["calls"]["/user/rag_process_query"] == 3
+
+
+def test_post_is_not_repeated_after_a_gateway_timeout(service):
+    service["script"]["/user/send_audio_message"] = [504, 200]
+
+    response = service_calls.post("/user/send_audio_message", params={"text": "hi"})
+
+    assert response.status_code == 504
+    assert service["calls"]["/user/send_audio_message"] == 1
+
+
+def test_get_is_retried_on_bad_gateway(service):
+    service["script"]["/user/check_worker"] = [502, 200]
+
+    response = service_calls.get("/user/check_worker", params={"workerNumber": 1})
+
+    assert response.status_code == 200
+    assert service["calls"]["/user/check_worker"] == 2
+
+
+def test_in_process_response_reads_like_requests(monkeypatch):
+    monkeypatch.setattr(service_calls, "SERVICE_CALL_MODE", "in_process")
+    monkeypatch.setitem(service_calls.LOCAL_ROUTES, ("GET", "/user/check_worker"), lambda params, body: {"worker": None})
+
+    response = service_calls.get("/user/check_worker", params={"workerNumber": 1})
+    assert (response.ok, response.reason, response.headers["Content-Type"]) == (True, "OK", "application/json")
+    assert response.json() == {"worker": None}
+
+    def missing(params, body):
+        raise service_calls.HTTPException(status_code=404, detail="Worker not found")
+    monkeypatch.setitem(service_calls.LOCAL_ROUTES, ("GET", "/user/check_worker"), missing)
+
+    response = service_calls.get("/user/check_worker", params={"workerNumber": 1})
+    assert (response.ok, response.reason) == (False, "Not Found")
+    with pytest.raises(requests.RequestException):
+        response.raise_for_status()